@@ -3,6 +3,21 @@ import { NextResponse } from "next/server";
 import { readFileSync } from "fs";
 import { join } from "path";
 
+// Load the comparison index precomputed by update_prices.py (null if missing)
+function loadComparisonIndex() {
+  try {
+    const filePath = join(
+      process.cwd(),
+      "macbook_scraper",
+      "output",
+      "comparison_index.json",
+    );
+    return JSON.parse(readFileSync(filePath, "utf-8"));
+  } catch (error) {
+    return null;
+  }
+}
+
 // Load scraped data from the scraper output
 function loadScrapedData() {
   try {
@@ -102,8 +117,16 @@ function filterValidProducts(products) {
   });
 }
 
-// Get all marketplace prices from scraped data + hardcoded fallbacks
-function getMarketplacePrices() {
+// Scraped products per shop, already filtered and transformed
+function getScrapedMarketplaces(index) {
+  // Fast path: the scraper already did the work in comparison_index.json
+  if (index) {
+    return {
+      cellphonesProducts: index.marketplaces.cellphones || [],
+      shopDunkProducts: index.marketplaces.shopDunk || [],
+    };
+  }
+
   const scrapedProducts = loadScrapedData();
   const validProducts = filterValidProducts(scrapedProducts);
 
@@ -128,6 +151,14 @@ function getMarketplacePrices() {
     .filter((p) => p.shop === "shopdunk")
     .map(transformScrapedProduct);
 
+  return { cellphonesProducts, shopDunkProducts };
+}
+
+// Get all marketplace prices from scraped data + hardcoded fallbacks
+function getMarketplacePrices(index) {
+  const { cellphonesProducts, shopDunkProducts } =
+    getScrapedMarketplaces(index);
+
   console.log("🔍 Debug - CellphoneS products:", cellphonesProducts.length);
   console.log("🔍 Debug - ShopDunk products:", shopDunkProducts.length);
 
@@ -652,7 +683,8 @@ export async function GET(request) {
       console.log(`🔄 Fetching prices for ${currency}...`);
       const exchangeRate = await getExchangeRate(currency);
 
-      const marketplacePrices = getMarketplacePrices();
+      const index = loadComparisonIndex();
+      const marketplacePrices = getMarketplacePrices(index);
 
       const fptWithConverted = calculatePrices(
         marketplacePrices.fptShop,
@@ -677,9 +709,16 @@ export async function GET(request) {
         ...marketplacePrices.shopDunk.filter((p) => p.scraped),
       ].length;
 
-      const scrapedData = loadScrapedData();
-      const lastUpdate =
-        scrapedData && scrapedData.length > 0 ? new Date().toISOString() : null;
+      let lastUpdate = null;
+      if (index) {
+        lastUpdate = index.lastScraped;
+      } else {
+        const scrapedData = loadScrapedData();
+        lastUpdate =
+          scrapedData && scrapedData.length > 0
+            ? new Date().toISOString()
+            : null;
+      }
 
       return NextResponse.json({
         success: true,
@@ -698,6 +737,52 @@ export async function GET(request) {
       });
     }
 
+    // Cross-shop comparison: ?id=<canonical id> or ?sort=price_asc&limit=20
+    if (pathname.includes("/api/comparison")) {
+      const index = loadComparisonIndex();
+      if (!index) {
+        return NextResponse.json(
+          { success: false, error: "Comparison index not available" },
+          { status: 503 },
+        );
+      }
+
+      const id = searchParams.get("id");
+      if (id) {
+        const group = index.groups[id];
+        if (!group) {
+          return NextResponse.json(
+            { success: false, error: "Unknown configuration" },
+            { status: 404 },
+          );
+        }
+        return NextResponse.json({
+          success: true,
+          lastScraped: index.lastScraped,
+          group,
+        });
+      }
+
+      const sort = searchParams.get("sort") || "price_asc";
+      const order = index.sort[sort];
+      if (!order) {
+        return NextResponse.json(
+          { success: false, error: `Unknown sort: ${sort}` },
+          { status: 400 },
+        );
+      }
+      const limit = parseInt(searchParams.get("limit") || "0", 10);
+      const ids = limit > 0 ? order.slice(0, limit) : order;
+
+      return NextResponse.json({
+        success: true,
+        lastScraped: index.lastScraped,
+        sort,
+        total: order.length,
+        groups: ids.map((groupId) => index.groups[groupId]),
+      });
+    }
+
     if (pathname.includes("/api/health")) {
       return NextResponse.json({
         status: "healthy",
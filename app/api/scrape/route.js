@@ -5,9 +5,14 @@
  * Usage:
  * - Manual: GET/POST to /api/scrape
  * - Cron: Automated calls from Vercel Cron or system cron
+ *
+ * If `update_prices.py --daemon` is running, the request is forwarded to its
+ * control socket (warm browsers, no interpreter startup). Otherwise the
+ * script is spawned as a one-off process.
  */
 
 import { exec } from 'child_process';
+import net from 'net';
 import { promisify } from 'util';
 import { NextResponse } from 'next/server';
 import path from 'path';
@@ -18,6 +23,34 @@ const execAsync = promisify(exec);
 export const dynamic = 'force-dynamic';
 export const maxDuration = 300; // 5 minutes max execution time
 
+// Send one JSON request to the scraper daemon and resolve with its JSON reply
+function triggerDaemon(socketPath, payload, timeoutMs) {
+  return new Promise((resolve, reject) => {
+    const client = net.createConnection(socketPath);
+    let buffer = '';
+
+    client.setTimeout(timeoutMs);
+    client.on('connect', () => client.write(JSON.stringify(payload) + '\n'));
+    client.on('data', (chunk) => {
+      buffer += chunk;
+      const newline = buffer.indexOf('\n');
+      if (newline !== -1) {
+        client.end();
+        try {
+          resolve(JSON.parse(buffer.slice(0, newline)));
+        } catch (error) {
+          reject(error);
+        }
+      }
+    });
+    client.on('timeout', () => {
+      client.destroy();
+      reject(new Error('Scraper daemon timed out'));
+    });
+    client.on('error', reject);
+  });
+}
+
 export async function GET(request) {
   return handleScrape(request);
 }
@@ -48,6 +81,35 @@ async function handleScrape(request) {
     const scraperPath = path.join(process.cwd(), 'macbook_scraper');
     const scriptPath = path.join(scraperPath, 'update_prices.py');
 
+    // Prefer the resident daemon when one is listening
+    const socketPath = process.env.SCRAPER_DAEMON_SOCKET ||
+      path.join(scraperPath, 'output', 'update_daemon.sock');
+    try {
+      const result = await triggerDaemon(socketPath, { cmd: 'run' }, 280000);
+      const duration = ((Date.now() - startTime) / 1000).toFixed(2);
+
+      console.log(`✅ Scraper daemon run finished (success: ${result.success})`);
+
+      return NextResponse.json({
+        success: Boolean(result.success),
+        message: result.success
+          ? 'Price scraper completed successfully'
+          : 'Price scraper failed',
+        mode: 'daemon',
+        timestamp: new Date().toISOString(),
+        duration: `${duration}s`,
+        summary: result.summary || null,
+        error: result.error || null,
+      }, {
+        status: result.success ? 200 : 500
+      });
+    } catch (error) {
+      if (error.code !== 'ENOENT' && error.code !== 'ECONNREFUSED') {
+        throw error;
+      }
+      console.log('ℹ️  No scraper daemon running, spawning update_prices.py');
+    }
+
     // Check if Python is available
     let pythonCmd = 'python3';
     try {
@@ -4,10 +4,17 @@ Backend API Tests for VietMac Compare MacBook Pro Price Tracker
 Tests the /api/macbook-prices endpoint and related functionality
 """
 
+import argparse
+import gzip
 import requests
 import json
 import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import urlsplit
 
 # Get base URL from environment
 BASE_URL = os.getenv('NEXT_PUBLIC_BASE_URL', 'https://vietmac-compare.preview.emergentagent.com')
@@ -283,6 +290,197 @@ def run_all_tests():
         print(f"⚠️  {total - passed} tests failed. Backend needs attention.")
         return False
 
+# Endpoints hit by --load (weighted round-robin: listed twice = twice as often)
+LOAD_ENDPOINTS = [
+    '/api/health',
+    '/api/macbook-prices',
+    '/api/comparison?sort=price_asc&limit=20',
+]
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1', '0.0.0.0')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize_samples(samples, duration):
+    """Latency percentiles, throughput, error rate and payload size of a list of samples"""
+    latencies = sorted(s['latency_ms'] for s in samples if s['error'] is None)
+    errors = [s for s in samples if s['error'] is not None]
+    ok = [s for s in samples if s['error'] is None]
+    total_bytes = sum(s['bytes'] for s in ok)
+
+    def ms(value):
+        return round(value, 1) if value is not None else None
+
+    return {
+        'requests': len(samples),
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(samples), 4) if samples else 0.0,
+        'error_kinds': {kind: sum(1 for e in errors if e['error'] == kind)
+                        for kind in sorted({e['error'] for e in errors})},
+        'throughput_rps': round(len(ok) / duration, 1) if duration else 0.0,
+        'throughput_kbps': round(total_bytes / 1024 / duration, 1) if duration else 0.0,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 50)),
+            'p95': ms(percentile(latencies, 95)),
+            'p99': ms(percentile(latencies, 99)),
+            'max': ms(latencies[-1] if latencies else None),
+        },
+        'payload_bytes': round(total_bytes / len(ok)) if ok else 0,
+        'payload_gzip_bytes': round(sum(s['gzip_bytes'] for s in ok) / len(ok)) if ok else 0,
+    }
+
+
+def run_load_test(base_url, rps=20.0, duration=30.0, concurrency=16, endpoints=None, timeout=10):
+    """
+    Fire GET requests at a fixed rate (open loop) for ``duration`` seconds.
+
+    Requests are sent ``rps`` times per second whether or not earlier ones
+    have finished, and latency is measured from the scheduled send time, so
+    a slow server shows up as higher latency instead of a lower request rate
+    (no coordinated omission). Non-2xx responses and exceptions count as errors.
+
+    Returns:
+        Report dict: overall and per-endpoint summaries
+    """
+    endpoints = endpoints or LOAD_ENDPOINTS
+    local = threading.local()
+    samples = []
+    lock = threading.Lock()
+
+    def session():
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def fire(path, scheduled):
+        sample = {'endpoint': path, 'error': None, 'bytes': 0, 'gzip_bytes': 0}
+        try:
+            response = session().get(f"{base_url}{path}", timeout=timeout)
+            body = response.content
+            sample['latency_ms'] = (time.perf_counter() - scheduled) * 1000
+            sample['bytes'] = len(body)
+            sample['gzip_bytes'] = len(gzip.compress(body, compresslevel=6))
+            if not 200 <= response.status_code < 300:
+                sample['error'] = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            sample['latency_ms'] = (time.perf_counter() - scheduled) * 1000
+            sample['error'] = type(e).__name__
+        with lock:
+            samples.append(sample)
+
+    total = int(rps * duration)
+    print(f"🔥 {total} requests at {rps:g} req/s for {duration:g}s "
+          f"({concurrency} workers) against {base_url}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled = start + i / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, endpoints[i % len(endpoints)], scheduled)
+    elapsed = time.perf_counter() - start
+
+    return {
+        'base_url': base_url,
+        'timestamp': datetime.now().isoformat(),
+        'target_rps': rps,
+        'duration': round(elapsed, 2),
+        'concurrency': concurrency,
+        'overall': summarize_samples(samples, elapsed),
+        'endpoints': {
+            path: summarize_samples([s for s in samples if s['endpoint'] == path], elapsed)
+            for path in dict.fromkeys(endpoints)
+        },
+    }
+
+
+def print_load_report(report, baseline=None):
+    """Print a load report, with deltas against a baseline report (e.g. the previous artifact version)"""
+    def delta(new, old, unit=''):
+        if baseline is None or old in (None, 0) or new is None:
+            return ''
+        return f" ({(new - old) / old * 100:+.0f}% vs {old:,}{unit})"
+
+    print(f"\n{'='*60}")
+    print(f"📈 LOAD TEST: {report.get('label') or report['base_url']}")
+    print(f"{'='*60}")
+    rows = [('overall', report['overall'])] + list(report['endpoints'].items())
+    for name, stats in rows:
+        old = None
+        if baseline is not None:
+            old = baseline['overall'] if name == 'overall' else baseline['endpoints'].get(name)
+        old = old or {'latency_ms': {}}
+        latency = stats['latency_ms']
+        status = "✅" if stats['error_rate'] == 0 else "⚠️ "
+        print(f"\n{status} {name}")
+        print(f"   Requests: {stats['requests']}  Errors: {stats['errors']} ({stats['error_rate']:.1%})"
+              + (f"  {stats['error_kinds']}" if stats['error_kinds'] else ''))
+        print(f"   Throughput: {stats['throughput_rps']} req/s, {stats['throughput_kbps']} KB/s")
+        for pct in ('p50', 'p95', 'p99'):
+            if latency[pct] is not None:
+                print(f"   {pct}: {latency[pct]} ms{delta(latency[pct], old['latency_ms'].get(pct), ' ms')}")
+        print(f"   Payload: {stats['payload_bytes']:,} B{delta(stats['payload_bytes'], old.get('payload_bytes'), ' B')}, "
+              f"gzip {stats['payload_gzip_bytes']:,} B{delta(stats['payload_gzip_bytes'], old.get('payload_gzip_bytes'), ' B')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='VietMac backend API tests and load generator')
+    parser.add_argument('--base-url', type=str, default=None,
+                        help='Site to test (default: NEXT_PUBLIC_BASE_URL, or http://localhost:3000 with --load)')
+    parser.add_argument('--load', action='store_true',
+                        help='Run the load generator instead of the schema tests')
+    parser.add_argument('--rps', type=float, default=20, help='Requests per second in --load mode')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of load in --load mode')
+    parser.add_argument('--concurrency', type=int, default=16, help='Maximum requests in flight')
+    parser.add_argument('--endpoint', action='append', default=None,
+                        help=f"Path to load (repeatable; default: {', '.join(LOAD_ENDPOINTS)})")
+    parser.add_argument('--label', type=str, default=None,
+                        help='Name of this run, e.g. the artifact version being served')
+    parser.add_argument('--json', type=str, default=None, help='Write the load report to this file')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='Earlier load report (--json) to compare latency and payload sizes against')
+    parser.add_argument('--allow-remote', action='store_true',
+                        help='Allow --load against a non-local host')
+    args = parser.parse_args()
+
+    if not args.load:
+        global BASE_URL, API_BASE
+        if args.base_url:
+            BASE_URL = args.base_url.rstrip('/')
+            API_BASE = f"{BASE_URL}/api"
+        return 0 if run_all_tests() else 1
+
+    base_url = (args.base_url or os.getenv('NEXT_PUBLIC_BASE_URL') or 'http://localhost:3000').rstrip('/')
+    if urlsplit(base_url).hostname not in LOCAL_HOSTS and not args.allow_remote:
+        parser.error(f"refusing to load-test {base_url}; point --base-url at a local instance or pass --allow-remote")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    report = run_load_test(base_url, rps=args.rps, duration=args.duration,
+                           concurrency=args.concurrency, endpoints=args.endpoint)
+    report['label'] = args.label
+    print_load_report(report, baseline)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Saved load report to: {args.json}")
+
+    return 0 if report['overall']['error_rate'] == 0 else 1
+
+
 if __name__ == "__main__":
-    success = run_all_tests()
+    sys.exit(main())
     exit(0 if success else 1)
\ No newline at end of file
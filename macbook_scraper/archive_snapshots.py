@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Snapshot Archive CLI - Convert, inspect and restore archived runs
+
+Usage:
+    python3 archive_snapshots.py convert            # import products_*.json and Scrapy exports
+    python3 archive_snapshots.py convert --remove   # ...and delete the converted full copies
+    python3 archive_snapshots.py list
+    python3 archive_snapshots.py show --at 2025-10-09T20:00 --out snapshot.json
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.snapshot_archive import SnapshotArchive
+
+SCRAPER_DIR = Path(__file__).parent
+ARCHIVE_DIR = SCRAPER_DIR / "output" / "archive"
+
+# Archive name -> (legacy full-copy files, description)
+SOURCES = {
+    'products': (SCRAPER_DIR / "output", "products_*.json", "update_prices.py runs"),
+    'scrapy': (SCRAPER_DIR / "data" / "outputs", "macbook_prices_*.json", "Scrapy feed exports"),
+}
+
+
+def get_archive(name, keyframe_interval=24):
+    return SnapshotArchive(ARCHIVE_DIR / name, keyframe_interval=keyframe_interval)
+
+
+def convert(args):
+    for name, (directory, pattern, description) in SOURCES.items():
+        files = sorted(directory.glob(pattern))
+        if not files:
+            continue
+        before = sum(f.stat().st_size for f in files)
+        archive = get_archive(name, args.keyframe_interval)
+        counts, imported = archive.import_files(files)
+        stats = archive.stats()
+        print(f"✅ {description}: {len(files)} files ({before / 1024:.0f} KB) -> "
+              f"{counts['keyframe']} keyframes, {counts['delta']} deltas, {counts['skipped']} skipped "
+              f"({stats['bytes'] / 1024:.0f} KB in {archive.archive_dir})")
+
+        if args.remove:
+            # Skipped files never made it into the archive: keep them
+            for f in imported:
+                f.unlink()
+            print(f"🗑️  Removed {len(imported)} converted files from {directory}")
+
+
+def list_runs(args):
+    archive = get_archive(args.archive)
+    for ts in archive.timestamps():
+        print(datetime.fromtimestamp(ts).isoformat(timespec='seconds'))
+    stats = archive.stats()
+    print(f"\n{stats['runs']} runs in {stats['segments']} segments ({stats['bytes'] / 1024:.0f} KB)")
+
+
+def show(args):
+    snapshot = get_archive(args.archive).reconstruct(at=args.at)
+    if snapshot is None:
+        print(f"❌ No archived run at or before {args.at}")
+        return 1
+
+    output = json.dumps(snapshot, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"✅ Saved snapshot to: {args.out}")
+    else:
+        print(output)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Keyframe + delta archive of scraped runs')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('convert', help='Import legacy full-copy snapshot files')
+    p.add_argument('--keyframe-interval', type=int, default=24,
+                   help='Runs per keyframe (default: 24)')
+    p.add_argument('--remove', action='store_true',
+                   help='Delete the files after converting them')
+    p.set_defaults(func=convert)
+
+    p = subparsers.add_parser('list', help='List archived runs')
+    p.add_argument('--archive', choices=list(SOURCES), default='products')
+    p.set_defaults(func=list_runs)
+
+    p = subparsers.add_parser('show', help='Reconstruct a run')
+    p.add_argument('--archive', choices=list(SOURCES), default='products')
+    p.add_argument('--at', type=str, default=None,
+                   help='ISO time; the latest run at or before it is shown (default: newest)')
+    p.add_argument('--out', type=str, default=None,
+                   help='Write the snapshot to this file instead of stdout')
+    p.set_defaults(func=show)
+
+    args = parser.parse_args()
+    return args.func(args) or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
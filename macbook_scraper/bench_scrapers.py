@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Scraper Benchmark - Throughput of update_prices.py against the mock shops
+
+Starts mock_shop_server.py in-process, then runs `update_prices.py --shops
+SHOP` once per shop with VIETMAC_SHOP_MIRROR pointing at it and a scratch
+--output-dir, so the real shops and output/ are never touched. Reports wall
+time, pages/sec and products/sec per shop, the faults the server injected,
+and where the time went (the run's telemetry stages).
+
+Browser-backed shops need their backend installed (Playwright for
+ShopDunk, SeleniumBase for FPTShop/TopZone); a shop that fails to run is
+reported as failed.
+
+Usage:
+    python3 bench_scrapers.py
+    python3 bench_scrapers.py --shops cellphones --latency-ms 200 --error-rate 0.05
+    python3 bench_scrapers.py --lazy-after 8 --set fptshop.block_rate=0.3 --json output/scraper_bench.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mock_shop_server import MockShopServer, add_fault_arguments, shop_options_from_args
+from scrapers.registry import SHOPS
+from utils.shop_mirror import MIRROR_ENV
+
+SCRAPER_DIR = Path(__file__).parent
+
+FAULT_KEYS = ('errors', 'blocked', 'challenges', 'not_modified')
+
+
+def run_shop(shop_name, server, timeout):
+    """Run update_prices.py for one shop against the mock server; return its metrics"""
+    server.shop.reset_stats()
+    with tempfile.TemporaryDirectory(prefix=f'bench-{shop_name}-') as output_dir:
+        start = time.perf_counter()
+        try:
+            proc = subprocess.run(
+                [sys.executable, 'update_prices.py', '--shops', shop_name, '--output-dir', output_dir],
+                cwd=SCRAPER_DIR,
+                env={**os.environ, MIRROR_ENV: server.url},
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+            error = None if proc.returncode == 0 else \
+                (proc.stderr.strip().splitlines() or ['no products scraped'])[-1]
+        except subprocess.TimeoutExpired:
+            error = f"timed out after {timeout}s"
+        wall = time.perf_counter() - start
+
+        latest_file = Path(output_dir) / "latest_products.json"
+        summary = json.loads(latest_file.read_text(encoding='utf-8'))['summary'] if latest_file.exists() else {}
+
+    served = server.shop.stats()['shops'].get(shop_name, {})
+    shop_result = summary.get('by_shop', {}).get(shop_name, {})
+    products = shop_result.get('count', 0)
+    pages = sum(count for key, count in served.items() if key.endswith('_pages'))
+    stages = summary.get('timings', {}).get('shops', {}).get(shop_name, {}).get('stages', {})
+
+    return {
+        'shop': shop_name,
+        'ok': error is None and shop_result.get('success', False),
+        'error': error or shop_result.get('error'),
+        'wall_seconds': round(wall, 3),
+        'requests': served.get('requests', 0),
+        'pages': pages,
+        'products': products,
+        'pages_per_sec': round(pages / wall, 2) if wall else 0.0,
+        'products_per_sec': round(products / wall, 2) if wall else 0.0,
+        'kb_served': round(served.get('bytes', 0) / 1024, 1),
+        'faults': {key: served.get(key, 0) for key in FAULT_KEYS if served.get(key)},
+        'stages': dict(sorted(stages.items(), key=lambda s: s[1], reverse=True)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the scrapers against local mock shops')
+    parser.add_argument('--shops', type=str, default=','.join(SHOPS),
+                        help=f"Comma-separated shops to benchmark (default: {','.join(SHOPS)})")
+    parser.add_argument('--timeout', type=float, default=900,
+                        help='Seconds before a shop run is abandoned (default: 900)')
+    parser.add_argument('--top', type=int, default=4,
+                        help='Slowest telemetry stages to show per shop')
+    parser.add_argument('--json', type=str, default=None,
+                        help='Also write the results to this JSON file')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    shops = [name.strip() for name in args.shops.split(',') if name.strip()]
+    unknown = [name for name in shops if name not in SHOPS]
+    if unknown:
+        parser.error(f"unknown shop(s): {', '.join(unknown)}")
+    try:
+        options = shop_options_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = MockShopServer(**options).start()
+    print(f"🏪 Mock shops on {server.url} ({len(server.shop.catalog)} products per shop)\n")
+
+    results = []
+    try:
+        for shop_name in shops:
+            print(f"⏱️  {shop_name}...", flush=True)
+            result = run_shop(shop_name, server, args.timeout)
+            results.append(result)
+
+            status = "✅" if result['ok'] else "❌"
+            print(f"{status} {shop_name}: {result['wall_seconds']:.1f}s wall, "
+                  f"{result['pages']} pages ({result['pages_per_sec']:.2f}/s), "
+                  f"{result['products']} products ({result['products_per_sec']:.2f}/s)")
+            if result['error']:
+                print(f"   Error: {result['error']}")
+            if result['faults']:
+                print(f"   Injected: {', '.join(f'{k}={v}' for k, v in result['faults'].items())}")
+            for stage, seconds in list(result['stages'].items())[:args.top]:
+                print(f"   {seconds:8.2f}s  {stage}")
+    finally:
+        server.stop()
+
+    print(f"\n{'Shop':<12}{'Wall (s)':>10}{'Pages':>8}{'Pages/s':>10}{'Products':>10}{'Products/s':>12}")
+    for result in results:
+        print(f"{result['shop']:<12}{result['wall_seconds']:>10.1f}{result['pages']:>8}"
+              f"{result['pages_per_sec']:>10.2f}{result['products']:>10}{result['products_per_sec']:>12.2f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'mock_server': {k: v for k, v in options.items() if k != 'recordings'},
+                'results': results,
+            }, f, indent=2)
+        print(f"\n✅ Saved results to: {args.json}")
+
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark - Import-time budget for the scraper entry points
+
+Measures how long each entry point takes to start (on top of a bare
+interpreter) and which modules it imports, using `python -X importtime`.
+Fails when an entry point exceeds the startup budget or eagerly imports a
+browser backend it doesn't need.
+
+Usage:
+    python3 bench_startup.py
+    python3 bench_startup.py --budget-ms 150 --repeat 7 --json output/startup_bench.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SCRAPER_DIR = Path(__file__).parent
+
+# Modules that must only be imported when a shop actually needs a browser or HTML parsing
+HEAVY_MODULES = ('playwright', 'seleniumbase', 'bs4')
+
+CASES = [
+    {
+        'name': 'update_prices --help',
+        'args': ['update_prices.py', '--help'],
+        'forbidden': HEAVY_MODULES,
+    },
+    {
+        'name': 'monitor_prices --help',
+        'args': ['monitor_prices.py', '--help'],
+        'forbidden': HEAVY_MODULES,
+    },
+    {
+        'name': 'resolve cellphones (HTTP path)',
+        'args': ['-c', "from scrapers.registry import get_scraper_class; get_scraper_class('cellphones')"],
+        'forbidden': HEAVY_MODULES,
+    },
+]
+
+
+def run_once(args):
+    """Run one interpreter with -X importtime; return (wall seconds, import report)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=SCRAPER_DIR,
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed')
+    return elapsed, parse_importtime(proc.stderr)
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output into {module: cumulative microseconds}"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        try:
+            _, cumulative, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = int(cumulative)
+        except ValueError:
+            continue
+    return modules
+
+
+def measure(args, repeat):
+    """Best-of-N wall time plus the import report of that run"""
+    best = None
+    for _ in range(repeat):
+        elapsed, modules = run_once(args)
+        if best is None or elapsed < best[0]:
+            best = (elapsed, modules)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check scraper entry points against a startup budget')
+    parser.add_argument('--budget-ms', type=float, default=250,
+                        help='Maximum startup time on top of a bare interpreter (default: 250ms)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per entry point; the fastest one counts (default: 5)')
+    parser.add_argument('--top', type=int, default=5,
+                        help='Slowest top-level imports to show per entry point')
+    parser.add_argument('--json', type=str, default=None,
+                        help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    baseline, _ = measure(['-c', 'pass'], args.repeat)
+    print(f"Bare interpreter: {baseline * 1000:.1f}ms (budget: +{args.budget_ms:.0f}ms)\n")
+
+    results = []
+    failed = False
+
+    for case in CASES:
+        result = {'name': case['name']}
+        try:
+            elapsed, modules = measure(case['args'], args.repeat)
+        except RuntimeError as e:
+            result.update({'ok': False, 'error': str(e)})
+            print(f"❌ {case['name']}: failed to run - {e}")
+            results.append(result)
+            failed = True
+            continue
+
+        overhead_ms = (elapsed - baseline) * 1000
+        heavy = sorted({
+            name for name in modules
+            if name.split('.')[0] in case['forbidden']
+        })
+        ok = overhead_ms <= args.budget_ms and not heavy
+        failed = failed or not ok
+
+        top_level = sorted(
+            ((name, us) for name, us in modules.items() if '.' not in name),
+            key=lambda item: item[1],
+            reverse=True,
+        )[:args.top]
+
+        result.update({
+            'ok': ok,
+            'wall_ms': round(elapsed * 1000, 1),
+            'overhead_ms': round(overhead_ms, 1),
+            'heavy_imports': heavy,
+            'top_imports_ms': {name: round(us / 1000, 1) for name, us in top_level},
+        })
+        results.append(result)
+
+        status = "✅" if ok else "❌"
+        print(f"{status} {case['name']}: {overhead_ms:.1f}ms over baseline ({elapsed * 1000:.1f}ms wall)")
+        if heavy:
+            print(f"   Heavy modules imported eagerly: {', '.join(heavy)}")
+        for name, us in top_level:
+            print(f"   {us / 1000:8.1f}ms  {name}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'baseline_ms': round(baseline * 1000, 1),
+                'budget_ms': args.budget_ms,
+                'results': results,
+            }, f, indent=2)
+        print(f"\n✅ Saved results to: {args.json}")
+
+    print(f"\n{'❌ Startup budget exceeded' if failed else '✅ All entry points within budget'}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# Download handler that renders marked requests in a shared Playwright browser
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/settings.html#download-handlers
+
+import asyncio
+import logging
+import sys
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from scrapy.core.downloader.handlers.http import HTTPDownloadHandler
+from scrapy.http import HtmlResponse
+from scrapy.utils.defer import deferred_from_coro
+from twisted.internet import defer
+
+# utils/ lives next to the Scrapy project
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.browser_pool import DEFAULT_CONTEXT
+
+logger = logging.getLogger(__name__)
+
+
+class PlaywrightRenderHandler:
+    """
+    Renders requests with ``meta['render']`` in one shared Chromium; every
+    other request goes through Scrapy's regular HTTP/1.1 handler.
+
+    Pages are pooled (PLAYWRIGHT_MAX_PAGES), so a crawl launches the browser
+    once and reuses its tabs instead of paying a browser per URL. Settings:
+
+    - PLAYWRIGHT_READY_SELECTORS: host -> CSS selector to wait for
+      (``meta['wait_for']`` overrides it per request)
+    - PLAYWRIGHT_READY_TIMEOUT: ms to wait for that selector
+    - PLAYWRIGHT_SCROLL: scroll to the bottom to trigger lazy loading
+    - PLAYWRIGHT_SETTLE_MS: extra wait after readiness/scroll
+    - PLAYWRIGHT_BLOCK_RESOURCES: resource types to abort (image, font...)
+
+    Needs the asyncio Twisted reactor (TWISTED_REACTOR in settings.py).
+    """
+
+    lazy = False
+
+    def __init__(self, settings, crawler=None):
+        self.http = HTTPDownloadHandler(settings, crawler)
+        self.stats = crawler.stats if crawler else None
+        self.headless = settings.getbool('PLAYWRIGHT_HEADLESS', True)
+        self.max_pages = settings.getint('PLAYWRIGHT_MAX_PAGES', 4)
+        self.ready_selectors = settings.getdict('PLAYWRIGHT_READY_SELECTORS')
+        self.ready_timeout = settings.getint('PLAYWRIGHT_READY_TIMEOUT', 15000)
+        self.goto_timeout = settings.getint('PLAYWRIGHT_GOTO_TIMEOUT', 60000)
+        self.scroll = settings.getbool('PLAYWRIGHT_SCROLL', True)
+        self.settle_ms = settings.getint('PLAYWRIGHT_SETTLE_MS', 1000)
+        self.block_resources = set(settings.getlist('PLAYWRIGHT_BLOCK_RESOURCES'))
+
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._launch_lock = None
+        self._slots = None
+        self._idle_pages = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler)
+
+    def download_request(self, request, spider):
+        if not request.meta.get('render'):
+            return self.http.download_request(request, spider)
+        return deferred_from_coro(self._render(request))
+
+    def _inc(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(f'playwright/{key}', count)
+
+    async def _ensure_context(self):
+        """Launch Playwright, Chromium and the shared context on first use"""
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.max_pages)
+        async with self._launch_lock:
+            if self._context is not None and self._browser.is_connected():
+                return self._context
+
+            from playwright.async_api import async_playwright
+
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            logger.info("Launching shared Chromium for rendered requests...")
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=['--disable-blink-features=AutomationControlled'],
+            )
+            self._context = await self._browser.new_context(**DEFAULT_CONTEXT)
+            if self.block_resources:
+                await self._context.route('**/*', self._route)
+            self._idle_pages = []
+            self._inc('browser_launches')
+            return self._context
+
+    async def _route(self, route):
+        if route.request.resource_type in self.block_resources:
+            self._inc('blocked_requests')
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _render(self, request):
+        context = await self._ensure_context()
+        async with self._slots:
+            page = self._idle_pages.pop() if self._idle_pages else await context.new_page()
+            reusable = False
+            try:
+                response = await page.goto(request.url, wait_until='domcontentloaded',
+                                           timeout=self.goto_timeout)
+                await self._wait_until_ready(page, request)
+                body = await page.content()
+                url = page.url
+                # The body is the rendered DOM, not the transferred (compressed) bytes
+                headers = await response.all_headers() if response else {}
+                reusable = True
+            finally:
+                if reusable and not page.is_closed():
+                    self._idle_pages.append(page)
+                else:
+                    await page.close()
+
+        for name in ('content-encoding', 'content-length', 'transfer-encoding'):
+            headers.pop(name, None)
+
+        self._inc('rendered_pages')
+        return HtmlResponse(
+            url=url,
+            status=response.status if response else 200,
+            headers=headers,
+            body=body,
+            encoding='utf-8',
+            request=request,
+            flags=['playwright'],
+        )
+
+    async def _wait_until_ready(self, page, request):
+        selector = request.meta.get('wait_for') or \
+            self.ready_selectors.get(urlsplit(request.url).hostname.removeprefix('www.'))
+        if selector:
+            try:
+                await page.wait_for_selector(selector, timeout=self.ready_timeout)
+            except Exception:
+                self._inc('ready_timeouts')
+                logger.warning(f"Readiness selector {selector!r} not found on {request.url}")
+        if self.scroll:
+            await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
+        if self.settle_ms:
+            await page.wait_for_timeout(self.settle_ms)
+
+    async def _shutdown(self):
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    @defer.inlineCallbacks
+    def close(self):
+        yield self.http.close()
+        yield deferred_from_coro(self._shutdown())
@@ -0,0 +1,162 @@
+# HTTP cache storage and policy for the shop crawls
+#
+# See documentation in:
+# https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
+
+import logging
+import sqlite3
+import zlib
+from pathlib import Path
+from time import time
+
+from w3lib.http import headers_dict_to_raw, headers_raw_to_dict
+
+from scrapy.downloadermiddlewares.httpcache import HttpCacheMiddleware
+from scrapy.extensions.httpcache import RFC2616Policy
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+from scrapy.utils.project import data_path
+
+from .middlewares import CHALLENGE_MARKERS
+
+logger = logging.getLogger(__name__)
+
+# Added to retrieved responses so the policy knows their age
+STORED_AT_HEADER = b'X-Cache-Stored-At'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    fingerprint TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers BLOB NOT NULL,
+    body BLOB NOT NULL,
+    stored_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteCacheStorage:
+    """
+    One SQLite file per spider (HTTPCACHE_DIR/<spider>.db) holding zlib
+    compressed headers and bodies, instead of the filesystem backend's
+    directory of small files per response.
+    """
+
+    def __init__(self, settings):
+        self.cachedir = Path(data_path(settings['HTTPCACHE_DIR'], createdir=True))
+        self.expiration_secs = settings.getint('HTTPCACHE_EXPIRATION_SECS')
+        self.level = settings.getint('HTTPCACHE_COMPRESSION_LEVEL', 6)
+        self.conn = None
+        self._fingerprinter = None
+
+    def open_spider(self, spider):
+        self.conn = sqlite3.connect(str(self.cachedir / f"{spider.name}.db"))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._fingerprinter = spider.crawler.request_fingerprinter
+        logger.debug(f"Using SQLite cache storage in {self.cachedir}")
+
+    def close_spider(self, spider):
+        self.conn.commit()
+        self.conn.close()
+
+    def _key(self, request):
+        return self._fingerprinter.fingerprint(request).hex()
+
+    def retrieve_response(self, spider, request):
+        row = self.conn.execute(
+            "SELECT url, status, headers, body, stored_at FROM responses WHERE fingerprint = ?",
+            (self._key(request),),
+        ).fetchone()
+        if row is None:
+            return None
+        url, status, raw_headers, raw_body, stored_at = row
+        if 0 < self.expiration_secs < time() - stored_at:
+            return None
+
+        headers = Headers(headers_raw_to_dict(zlib.decompress(raw_headers)))
+        body = zlib.decompress(raw_body)
+        headers[STORED_AT_HEADER] = str(stored_at)
+        respcls = responsetypes.from_args(headers=headers, url=url, body=body)
+        return respcls(url=url, headers=headers, status=status, body=body)
+
+    def store_response(self, spider, request, response):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self._key(request),
+                    response.url,
+                    response.status,
+                    zlib.compress(headers_dict_to_raw(
+                        {k: v for k, v in response.headers.items() if k != STORED_AT_HEADER}), self.level),
+                    zlib.compress(response.body, self.level),
+                    time(),
+                ),
+            )
+
+
+def is_listing(request):
+    """Whether a request is for a listing (the default page type)"""
+    return request.meta.get('page_type', 'listing') == 'listing'
+
+
+class ListingFreshnessPolicy(RFC2616Policy):
+    """
+    Freshness by page type (request.meta['page_type'], set by the spiders):
+
+    - listing: prices change, so always revalidate with If-None-Match /
+      If-Modified-Since; a 304 costs headers only. A 5xx never falls back
+      to the cached copy (that would publish stale prices as fresh).
+      Browser-rendered listings can't be revalidated and are not cached.
+    - detail: specs don't change, fresh for HTTPCACHE_DETAIL_MAX_AGE.
+
+    Challenge pages and non-200 responses are never stored.
+    """
+
+    def __init__(self, settings):
+        super().__init__(settings)
+        self.detail_max_age = settings.getint('HTTPCACHE_DETAIL_MAX_AGE', 3 * 86400)
+
+    def should_cache_request(self, request):
+        if request.meta.get('render') and is_listing(request):
+            return False
+        return super().should_cache_request(request)
+
+    def should_cache_response(self, response, request):
+        if response.status != 200:
+            return False
+        head = response.body[:20000]
+        return not any(marker in head for marker in CHALLENGE_MARKERS)
+
+    def is_cached_response_fresh(self, cachedresponse, request):
+        if request.meta.get('page_type') == 'detail':
+            stored_at = float(cachedresponse.headers.get(STORED_AT_HEADER, 0))
+            return time() - stored_at < self.detail_max_age
+        if b'ETag' in cachedresponse.headers:
+            request.headers[b'If-None-Match'] = cachedresponse.headers[b'ETag']
+        if b'Last-Modified' in cachedresponse.headers:
+            request.headers[b'If-Modified-Since'] = cachedresponse.headers[b'Last-Modified']
+        return False
+
+    def is_cached_response_valid(self, cachedresponse, response, request):
+        if is_listing(request):
+            # Only "not modified" revalidates a listing; errors surface as errors
+            return response.status == 304
+        return super().is_cached_response_valid(cachedresponse, response, request)
+
+
+class ListingCacheMiddleware(HttpCacheMiddleware):
+    """
+    HttpCacheMiddleware that answers a failed download with the cached
+    copy only for detail pages. A listing that could not be revalidated
+    (timeout, connection error) fails instead of serving stale prices.
+    """
+
+    def process_exception(self, request, exception, spider):
+        if is_listing(request):
+            request.meta.pop('cached_response', None)
+            return None
+        return super().process_exception(request, exception, spider)
@@ -6,10 +6,17 @@
 import scrapy
 
 class MacbookScraperItem(scrapy.Item):
-    # define the fields for your item here like:
+    # Same product schema as the scrapers/ classes (latest_products.json)
     model = scrapy.Field()
-    configuration = scrapy.Field()
+    raw_name = scrapy.Field()
     price_vnd = scrapy.Field()
-    shop_name = scrapy.Field()
+    price_text = scrapy.Field()
     url = scrapy.Field()
+    product_id = scrapy.Field()
+    image_url = scrapy.Field()
+    shop = scrapy.Field()
+    specs = scrapy.Field()
+    canonical_id = scrapy.Field()
+    clean_name = scrapy.Field()
+    source_page = scrapy.Field()
     scraped_at = scrapy.Field()
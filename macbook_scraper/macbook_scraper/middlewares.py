@@ -8,6 +8,15 @@ from scrapy import signals
 # useful for handling different item types with a single interface
 from itemadapter import ItemAdapter
 
+# Responses that mean "slow down": rate limits, WAF blocks, overload
+BLOCK_STATUSES = {403, 429, 503}
+
+# Markers of Cloudflare interstitials served with a 200. Captcha widgets
+# (g-recaptcha, h-captcha) and Cloudflare's challenge-platform script also
+# appear on ordinary pages (login, comment and newsletter forms), so they
+# are not counted as blocks.
+CHALLENGE_MARKERS = (b'cf-chl', b'Just a moment...', b'cf-browser-verification')
+
 
 class MacbookScraperSpiderMiddleware:
     # Not all methods need to be defined. If a method is not defined,
@@ -53,48 +62,140 @@ class MacbookScraperSpiderMiddleware:
         spider.logger.info("Spider opened: %s" % spider.name)
 
 
+class SlotState:
+    """AIMD controller state of one downloader slot (host)"""
+
+    def __init__(self, concurrency, delay):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.latency = None  # EWMA, seconds
+        self.successes = 0
+        self.responses = 0
+        self.blocked = 0
+
+
 class MacbookScraperDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    """
+    Latency-adaptive per-host concurrency and delay (AIMD).
+
+    Every response updates the host's latency EWMA. Rate limits, blocks and
+    challenge pages, and latency far above ADAPTIVE_TARGET_LATENCY, halve
+    the slot's concurrency and double its delay (multiplicative decrease).
+    Each window of ``concurrency`` clean responses under the target adds
+    one to the concurrency and takes ADAPTIVE_DELAY_STEP off the delay
+    (additive increase). So each host settles near the highest rate it
+    tolerates.
+
+    With AutoThrottle enabled it owns the delay, so only concurrency is
+    adjusted. Current limits are published as adaptive/<slot>/* stats.
+    """
+
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.enabled = settings.getbool('ADAPTIVE_ENABLED', True)
+        self.autothrottle = settings.getbool('AUTOTHROTTLE_ENABLED')
+        self.min_concurrency = settings.getint('ADAPTIVE_MIN_CONCURRENCY', 1)
+        self.max_concurrency = settings.getint(
+            'ADAPTIVE_MAX_CONCURRENCY', settings.getint('CONCURRENT_REQUESTS_PER_DOMAIN'))
+        self.start_concurrency = settings.getint('ADAPTIVE_START_CONCURRENCY', 2)
+        self.min_delay = settings.getfloat('ADAPTIVE_MIN_DELAY', settings.getfloat('DOWNLOAD_DELAY'))
+        self.max_delay = settings.getfloat('ADAPTIVE_MAX_DELAY', 30.0)
+        self.delay_step = settings.getfloat('ADAPTIVE_DELAY_STEP', 0.25)
+        self.target_latency = settings.getfloat('ADAPTIVE_TARGET_LATENCY', 2.0)
+        self.alpha = settings.getfloat('ADAPTIVE_LATENCY_ALPHA', 0.3)
+        self.slots = {}
 
     @classmethod
     def from_crawler(cls, crawler):
         # This method is used by Scrapy to create your spiders.
-        s = cls()
+        s = cls(crawler)
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
         return None
 
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
-
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        # Cache hits say nothing about the host
+        if not self.enabled or 'cached' in response.flags:
+            return response
+
+        key = request.meta.get('download_slot')
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if slot is None:
+            return response
+
+        state = self._state(key, slot)
+        state.responses += 1
+        latency = request.meta.get('download_latency')
+        if latency is not None:
+            state.latency = latency if state.latency is None else \
+                self.alpha * latency + (1 - self.alpha) * state.latency
+
+        blocked = self.is_blocked(response)
+        if blocked:
+            state.blocked += 1
+            self.stats.inc_value(f'adaptive/{key}/{blocked}')
+
+        if blocked or (state.latency or 0) > 2 * self.target_latency:
+            self._decrease(state)
+        elif state.latency is None or state.latency <= self.target_latency:
+            state.successes += 1
+            # One additive step per window of concurrency clean responses
+            if state.successes >= state.concurrency:
+                state.successes = 0
+                self._increase(state)
+
+        self._apply(key, slot, state)
         return response
 
     def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
+        # Timeouts and dropped connections are congestion too
+        key = request.meta.get('download_slot')
+        slot = self.crawler.engine.downloader.slots.get(key)
+        if self.enabled and slot is not None:
+            # Even when the slot's first request is the one that failed
+            state = self._state(key, slot)
+            self.stats.inc_value(f'adaptive/{key}/exceptions')
+            self._decrease(state)
+            self._apply(key, slot, state)
+        return None
 
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
+    def is_blocked(self, response):
+        """Reason a response signals blocking ('status_429', 'challenge'...) or None"""
+        if response.status in BLOCK_STATUSES:
+            return f'status_{response.status}'
+        head = response.body[:20000]
+        if any(marker in head for marker in CHALLENGE_MARKERS):
+            return 'challenge'
+        return None
+
+    def _state(self, key, slot):
+        state = self.slots.get(key)
+        if state is None:
+            state = self.slots[key] = SlotState(
+                min(self.start_concurrency, self.max_concurrency), max(slot.delay, self.min_delay))
+        return state
+
+    def _decrease(self, state):
+        state.successes = 0
+        state.concurrency = max(self.min_concurrency, state.concurrency // 2)
+        state.delay = min(self.max_delay, max(state.delay * 2, self.delay_step))
+
+    def _increase(self, state):
+        state.concurrency = min(self.max_concurrency, state.concurrency + 1)
+        state.delay = max(self.min_delay, state.delay - self.delay_step)
+
+    def _apply(self, key, slot, state):
+        slot.concurrency = state.concurrency
+        if not self.autothrottle:
+            slot.delay = state.delay
+        self.stats.set_value(f'adaptive/{key}/concurrency', slot.concurrency)
+        self.stats.set_value(f'adaptive/{key}/delay', round(slot.delay, 3))
+        if state.latency is not None:
+            self.stats.set_value(f'adaptive/{key}/latency_ms', round(state.latency * 1000))
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
@@ -1,20 +1,192 @@
-import motor.motor_asyncio
+import logging
 import os
+import time
+from datetime import datetime
+
 from dotenv import load_dotenv
+from scrapy.exceptions import NotConfigured
+from twisted.internet import defer, task, threads
+
+try:
+    from pymongo import ASCENDING, MongoClient, UpdateOne
+    from pymongo.errors import BulkWriteError
+except ImportError:
+    MongoClient = None
+
+logger = logging.getLogger(__name__)
+
+ENV_FILE = os.path.join(os.path.dirname(__file__), '../../../.env')
+
+
+def scraped_at_bucket(scraped_at, bucket_secs):
+    """Floor an item's scraped_at ('%Y-%m-%d %H:%M:%S' or ISO) to its bucket"""
+    if isinstance(scraped_at, datetime):
+        ts = scraped_at.timestamp()
+    elif scraped_at:
+        ts = datetime.fromisoformat(str(scraped_at)).timestamp()
+    else:
+        ts = time.time()
+    return datetime.fromtimestamp(ts - ts % bucket_secs)
+
 
 class MacbookScraperPipeline:
-    def __init__(self):
-        load_dotenv(os.path.join(os.path.dirname(__file__), '../../../.env'))
-        self.client = None
+    """
+    Buffers items and upserts them into the prices collection in batches.
+
+    Each document is keyed by shop + url + scraped_at bucket, so re-crawling
+    within a bucket updates the same document instead of adding a duplicate.
+    The buffer is flushed with one unordered bulk_write when it reaches
+    MONGO_BULK_SIZE items, every MONGO_FLUSH_INTERVAL seconds (a timer, so a
+    quiet spider does not sit on its buffer) and on close_spider.
+
+    bulk_write runs in the reactor's thread pool, one flush at a time, so
+    the reactor (shared with the Playwright download handler) never blocks
+    on MongoDB; process_item waits for a size-triggered flush, which keeps
+    the buffer bounded.
+
+    Pass ``client`` (e.g. a mongomock.MongoClient) to test without mongod,
+    and ``clock`` (a twisted.internet.task.Clock) to drive the timer. In a
+    crawl the pipeline is disabled (NotConfigured) when pymongo is not
+    installed or no MongoDB URL is configured.
+    """
+
+    collection_name = 'prices'
+
+    def __init__(self, client=None, mongo_url=None, db_name=None,
+                 bulk_size=500, flush_interval=5.0, bucket_secs=3600, stats=None, clock=None):
+        load_dotenv(ENV_FILE)
+        self.client = client
+        self.owns_client = client is None
+        self.mongo_url = mongo_url or os.environ.get('MONGO_URL')
+        self.db_name = db_name or os.environ.get('DB_NAME')
+        self.bulk_size = bulk_size
+        self.flush_interval = flush_interval
+        self.bucket_secs = bucket_secs
+        self.stats = stats
+        self.clock = clock
         self.db = None
+        self.buffer = []
+        self.last_flush = 0.0
+        self._write_lock = defer.DeferredLock()
+        self._timer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if MongoClient is None:
+            raise NotConfigured("pymongo is not installed; prices are not written to MongoDB")
+        load_dotenv(ENV_FILE)
+        mongo_url = settings.get('MONGO_URL') or os.environ.get('MONGO_URL')
+        if not mongo_url:
+            raise NotConfigured("MONGO_URL is not set; prices are not written to MongoDB")
+        return cls(
+            mongo_url=mongo_url,
+            db_name=settings.get('MONGO_DATABASE'),
+            bulk_size=settings.getint('MONGO_BULK_SIZE', 500),
+            flush_interval=settings.getfloat('MONGO_FLUSH_INTERVAL', 5.0),
+            bucket_secs=settings.getint('MONGO_BUCKET_SECS', 3600),
+            stats=crawler.stats,
+        )
 
     def open_spider(self, spider):
-        self.client = motor.motor_asyncio.AsyncIOMotorClient(os.environ.get('MONGO_URL'))
-        self.db = self.client[os.environ.get('DB_NAME')]
+        if self.client is None:
+            self.client = MongoClient(self.mongo_url)
+        self.db = self.client[self.db_name]
+        collection = self.db[self.collection_name]
+        collection.create_index(
+            [('shop', ASCENDING), ('url', ASCENDING), ('bucket', ASCENDING)],
+            unique=True, name='shop_url_bucket',
+        )
+        collection.create_index([('bucket', ASCENDING)], name='bucket')
+        collection.create_index([('model', ASCENDING), ('bucket', ASCENDING)], name='model_bucket')
+
+        if self.clock is None:
+            # Imported here: Scrapy installs its reactor after loading pipelines
+            from twisted.internet import reactor
+            self.clock = reactor
+        self.last_flush = self.clock.seconds()
+        self._timer = task.LoopingCall(self._flush_if_due)
+        self._timer.clock = self.clock
+        self._timer.start(self.flush_interval, now=False).addErrback(
+            lambda failure: logger.error(f"Mongo flush timer stopped: {failure.getErrorMessage()}"))
 
     def close_spider(self, spider):
+        if self._timer is not None and self._timer.running:
+            self._timer.stop()
+        d = self.flush()
+        if self.owns_client:
+            d.addBoth(self._close_client)
+        return d
+
+    def _close_client(self, result):
         self.client.close()
+        return result
 
-    async def process_item(self, item, spider):
-        await self.db['prices'].insert_one(dict(item))
+    def process_item(self, item, spider):
+        doc = dict(item)
+        doc['bucket'] = scraped_at_bucket(doc.get('scraped_at'), self.bucket_secs)
+        key = {'shop': doc.get('shop'), 'url': doc.get('url'), 'bucket': doc['bucket']}
+        self.buffer.append(UpdateOne(key, {'$set': doc}, upsert=True))
+
+        if len(self.buffer) >= self.bulk_size:
+            return self.flush().addCallback(lambda _: item)
         return item
+
+    def _flush_if_due(self):
+        if self.clock.seconds() - self.last_flush < self.flush_interval:
+            return None
+        # A failed write is logged, not allowed to stop the timer
+        return self.flush().addErrback(
+            lambda failure: logger.error(f"Mongo flush failed: {failure.getErrorMessage()}"))
+
+    def flush(self):
+        """
+        Write the buffered upserts in one unordered bulk_write
+
+        Returns:
+            Deferred firing with the bulk write result details (None if the
+            buffer was empty)
+        """
+        if self.clock is not None:
+            self.last_flush = self.clock.seconds()
+        if not self.buffer:
+            return defer.succeed(None)
+
+        operations, self.buffer = self.buffer, []
+        d = self._write_lock.run(threads.deferToThread, self._bulk_write, operations)
+        d.addCallback(self._record_flush, len(operations))
+        return d
+
+    def _bulk_write(self, operations):
+        """bulk_write in a pool thread; returns (details, latency_ms)"""
+        start = time.perf_counter()
+        try:
+            result = self.db[self.collection_name].bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            # Unordered: everything but the failed operations was written
+            details = e.details
+        return details, (time.perf_counter() - start) * 1000
+
+    def _record_flush(self, result, operations):
+        """Flush stats, back on the reactor thread"""
+        details, latency_ms = result
+        errors = len(details.get('writeErrors', []))
+        if errors:
+            logger.error(f"{errors} of {operations} upserts failed")
+            self._inc('mongo/write_errors', errors)
+
+        self._inc('mongo/flushes')
+        self._inc('mongo/operations', operations)
+        self._inc('mongo/upserted', details.get('nUpserted', 0))
+        self._inc('mongo/modified', details.get('nModified', 0))
+        self._inc('mongo/flush_latency_ms_total', latency_ms)
+        if self.stats is not None:
+            self.stats.max_value('mongo/flush_latency_ms_max', latency_ms)
+            self.stats.set_value('mongo/flush_latency_ms_last', latency_ms)
+        logger.info(f"Flushed {operations} upserts in {latency_ms:.1f} ms")
+        return details
+
+    def _inc(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
@@ -22,9 +22,11 @@ ADDONS = {}
 ROBOTSTXT_OBEY = True
 
 # Concurrency and throttling settings
-#CONCURRENT_REQUESTS = 16
-CONCURRENT_REQUESTS_PER_DOMAIN = 1
-DOWNLOAD_DELAY = 1
+# Listing and detail pages are fetched in parallel; AutoThrottle backs off
+# per host from these ceilings based on observed latency
+CONCURRENT_REQUESTS = 32
+CONCURRENT_REQUESTS_PER_DOMAIN = 8
+DOWNLOAD_DELAY = 0.25
 
 # Disable cookies (enabled by default)
 #COOKIES_ENABLED = False
@@ -46,9 +48,20 @@ DOWNLOAD_DELAY = 1
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
-#    "macbook_scraper.middlewares.MacbookScraperDownloaderMiddleware": 543,
-#}
+DOWNLOADER_MIDDLEWARES = {
+    "macbook_scraper.middlewares.MacbookScraperDownloaderMiddleware": 543,
+    # Listings never fall back to the cache on download errors (see httpcache.py)
+    "scrapy.downloadermiddlewares.httpcache.HttpCacheMiddleware": None,
+    "macbook_scraper.httpcache.ListingCacheMiddleware": 900,
+}
+
+# Per-host AIMD concurrency/delay (see MacbookScraperDownloaderMiddleware);
+# with AutoThrottle on, only concurrency is adjusted
+ADAPTIVE_ENABLED = True
+ADAPTIVE_START_CONCURRENCY = 2
+ADAPTIVE_MIN_CONCURRENCY = 1
+ADAPTIVE_MAX_DELAY = 30.0
+ADAPTIVE_TARGET_LATENCY = 2.0
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -62,26 +75,54 @@ ITEM_PIPELINES = {
    "macbook_scraper.pipelines.MacbookScraperPipeline": 300,
 }
 
+# MongoDB pipeline: buffered upserts keyed by shop + url + scraped_at bucket
+# (MONGO_URL / MONGO_DATABASE fall back to the MONGO_URL / DB_NAME env vars)
+MONGO_BULK_SIZE = 500
+MONGO_FLUSH_INTERVAL = 5.0
+MONGO_BUCKET_SECS = 3600
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
-#AUTOTHROTTLE_ENABLED = True
+AUTOTHROTTLE_ENABLED = True
 # The initial download delay
-#AUTOTHROTTLE_START_DELAY = 5
+AUTOTHROTTLE_START_DELAY = 1
 # The maximum download delay to be set in case of high latencies
-#AUTOTHROTTLE_MAX_DELAY = 60
+AUTOTHROTTLE_MAX_DELAY = 30
 # The average number of requests Scrapy should be sending in parallel to
 # each remote server
-#AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
+AUTOTHROTTLE_TARGET_CONCURRENCY = 4.0
 # Enable showing throttling stats for every response received:
 #AUTOTHROTTLE_DEBUG = False
 
+# Requests with meta['render'] are rendered in one shared Playwright browser;
+# everything else uses the regular HTTP downloader
+DOWNLOAD_HANDLERS = {
+    "http": "macbook_scraper.handlers.PlaywrightRenderHandler",
+    "https": "macbook_scraper.handlers.PlaywrightRenderHandler",
+}
+TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
+PLAYWRIGHT_MAX_PAGES = 4
+PLAYWRIGHT_READY_SELECTORS = {
+    "cellphones.com.vn": ".product-item, .product, .item-product",
+    "shopdunk.com": ".product-item",
+    "fptshop.com.vn": ".cdt-product, .product-item, [data-product], .product-card",
+    "topzone.vn": ".product-item, .product-card, .item, .product",
+}
+PLAYWRIGHT_READY_TIMEOUT = 15000
+PLAYWRIGHT_SCROLL = True
+PLAYWRIGHT_SETTLE_MS = 2000
+PLAYWRIGHT_BLOCK_RESOURCES = ["image", "media", "font"]
+
 # Enable and configure HTTP caching (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html#httpcache-middleware-settings
-#HTTPCACHE_ENABLED = True
-#HTTPCACHE_EXPIRATION_SECS = 0
-#HTTPCACHE_DIR = "httpcache"
-#HTTPCACHE_IGNORE_HTTP_CODES = []
-#HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
+# Listings are revalidated with conditional requests, detail pages are reused
+# for HTTPCACHE_DETAIL_MAX_AGE, challenges and errors are never stored
+HTTPCACHE_ENABLED = True
+HTTPCACHE_EXPIRATION_SECS = 0
+HTTPCACHE_DIR = "httpcache"
+HTTPCACHE_STORAGE = "macbook_scraper.httpcache.SQLiteCacheStorage"
+HTTPCACHE_POLICY = "macbook_scraper.httpcache.ListingFreshnessPolicy"
+HTTPCACHE_DETAIL_MAX_AGE = 3 * 86400
 
 # Set settings whose default value is deprecated to a future-proof value
 FEED_EXPORT_ENCODING = "utf-8"
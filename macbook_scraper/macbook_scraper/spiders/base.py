@@ -0,0 +1,154 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import scrapy
+
+# scrapers/ and utils/ live next to the Scrapy project
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from scrapers.registry import get_scraper_class
+from utils.shop_mirror import mirror_host
+from utils.spec_parser import SpecParser
+from utils.url_frontier import URLFrontier
+
+from ..items import MacbookScraperItem
+
+SELECTORS_PATH = os.path.join(os.path.dirname(__file__), '../selectors.json')
+
+
+class ShopSpider(scrapy.Spider):
+    """
+    Listing (and optional detail) crawl of one shop.
+
+    Start pages, name cleanup, price parsing and render modes come from the
+    shop's scraper class in scrapers/, selectors from selectors.json, and
+    specs from SpecParser, so items have the same schema as
+    latest_products.json. Requests are scheduled concurrently and paced by
+    AutoThrottle; pages the scraper renders in a browser carry
+    meta['render'].
+    """
+
+    shop = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        with open(SELECTORS_PATH, 'r') as f:
+            self.selectors = json.load(f)[self.shop]
+        self.scraper = get_scraper_class(self.shop)()
+        self.spec_parser = SpecParser()
+        self.frontier = URLFrontier()
+        # PAGES point at the mock shop when VIETMAC_SHOP_MIRROR is set
+        if mirror_host():
+            self.allowed_domains = [*getattr(self, 'allowed_domains', []), mirror_host()]
+
+    def start_requests(self):
+        for page_info in self.scraper.PAGES:
+            render = self.scraper.render_mode(page_info)
+            yield scrapy.Request(
+                page_info['url'],
+                callback=self.parse,
+                cb_kwargs={'page_info': page_info},
+                meta={'page_type': 'listing', **({'render': render} if render != 'http' else {})},
+            )
+
+    def _first(self, node, selectors):
+        """First node matching any of the fallback selectors"""
+        for selector in selectors:
+            match = node.css(selector)
+            if match:
+                return match[0]
+        return None
+
+    def _text(self, node):
+        # Same as BeautifulSoup's get_text(strip=True)
+        return ''.join(s.strip() for s in node.css('::text').getall())
+
+    def product_cards(self, response):
+        for selector in self.selectors['product_container']:
+            cards = response.css(selector)
+            if cards:
+                self.logger.info(f"Found {len(cards)} items with selector: {selector}")
+                return cards
+        self.logger.warning(f"No product items found on {response.url}")
+        return []
+
+    def parse(self, response, page_info):
+        for card in self.product_cards(response):
+            product = self.parse_card(card, response)
+            if product is None:
+                continue
+            product['source_page'] = page_info['url']
+
+            if not self.frontier.add(product['url'], shop=self.shop):
+                continue
+            yield from self.complete(product, response)
+
+    def parse_card(self, card, response):
+        """Product fields of one listing card (None if it is not a MacBook)"""
+        name_elem = self._first(card, self.selectors['name'])
+        if name_elem is None:
+            return None
+        name_attr = self.selectors.get('name_attr')
+        raw_name = (name_attr and name_elem.attrib.get(name_attr)) or self._text(name_elem)
+        if 'MacBook' not in raw_name:
+            return None
+
+        price_text = None
+        price_elem = self._first(card, self.selectors['price'])
+        if price_elem is not None:
+            price_attr = self.selectors.get('price_attr')
+            price_text = (price_attr and price_elem.attrib.get(price_attr)) or self._text(price_elem)
+
+        link_elem = self._first(card, self.selectors['link'])
+        href = link_elem.attrib.get('href') if link_elem is not None else None
+
+        image_url = None
+        img_elem = self._first(card, self.selectors.get('image', []))
+        if img_elem is not None:
+            image_url = next(
+                (img_elem.attrib[attr] for attr in self.selectors['image_attrs'] if img_elem.attrib.get(attr)),
+                None,
+            )
+
+        product_id_attr = self.selectors.get('product_id_attr')
+        return {
+            'model': self.scraper._parse_model_name(raw_name),
+            'raw_name': raw_name,
+            'price_vnd': self.scraper._clean_price(price_text),
+            'price_text': price_text,
+            'url': response.urljoin(href) if href else None,
+            'product_id': card.attrib.get(product_id_attr) if product_id_attr else None,
+            'image_url': image_url,
+        }
+
+    def complete(self, product, response):
+        """Yield the finished item, or the requests needed to finish it"""
+        yield self.build_item(product)
+
+    def build_item(self, product, spec_name=None):
+        """Add specs and shop fields; specs are parsed from spec_name (default: raw name)"""
+        parsed_specs = self.spec_parser.parse(spec_name or product['raw_name'])
+        item = MacbookScraperItem(
+            **product,
+            shop=self.shop,
+            specs={
+                'model_type': parsed_specs.get('model_type'),
+                'chip': parsed_specs.get('chip'),
+                'chip_variant': parsed_specs.get('chip_variant'),
+                'screen_size': parsed_specs.get('screen_size'),
+                'cpu_cores': parsed_specs.get('cpu_cores'),
+                'gpu_cores': parsed_specs.get('gpu_cores'),
+                'ram_gb': parsed_specs.get('ram_gb'),
+                'storage_gb': parsed_specs.get('storage_gb'),
+                'storage_display': parsed_specs.get('storage_display'),
+                'year': parsed_specs.get('year'),
+            },
+            canonical_id=parsed_specs.get('id'),
+            clean_name=parsed_specs.get('clean_name'),
+            scraped_at=time.strftime('%Y-%m-%d %H:%M:%S'),
+        )
+        if not self.selectors.get('product_id_attr'):
+            item['product_id'] = parsed_specs.get('id')
+        return item
@@ -0,0 +1,40 @@
+import scrapy
+
+from .base import ShopSpider
+
+
+class CellphonesSpider(ShopSpider):
+    name = "cellphones"
+    shop = "cellphones"
+    allowed_domains = ["cellphones.com.vn"]
+
+    def complete(self, product, response):
+        # Listing names often lack the screen size; it is in the detail page's spec table
+        if not product['url']:
+            yield self.build_item(product, spec_name=product['model'])
+            return
+        yield scrapy.Request(
+            product['url'],
+            callback=self.parse_detail,
+            cb_kwargs={'product': product},
+            meta={'page_type': 'detail'},
+            errback=self.detail_failed,
+        )
+
+    def parse_detail(self, response, product):
+        for row in response.css(self.selectors['detail_spec_rows']):
+            cells = row.css('td')
+            if len(cells) != 2:
+                continue
+            if 'kích thước màn hình' in self._text(cells[0]).lower():
+                screen_size = self._text(cells[1]).replace(' inch', '')
+                if screen_size not in product['model']:
+                    product['model'] = f"{product['model']} {screen_size}"
+                break
+        yield self.build_item(product, spec_name=product['model'])
+
+    def detail_failed(self, failure):
+        # Keep the listing data when the detail page can't be fetched
+        product = failure.request.cb_kwargs['product']
+        self.logger.warning(f"Detail fetch failed for {product['url']}: {failure.value}")
+        yield self.build_item(product, spec_name=product['model'])
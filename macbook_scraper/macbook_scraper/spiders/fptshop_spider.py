@@ -0,0 +1,7 @@
+from .base import ShopSpider
+
+
+class FPTShopSpider(ShopSpider):
+    name = "fptshop"
+    shop = "fptshop"
+    allowed_domains = ["fptshop.com.vn"]
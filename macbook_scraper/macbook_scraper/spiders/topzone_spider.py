@@ -0,0 +1,7 @@
+from .base import ShopSpider
+
+
+class TopZoneSpider(ShopSpider):
+    name = "topzone"
+    shop = "topzone"
+    allowed_domains = ["topzone.vn"]
@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+Mock Shop Server - Local stand-in for the four shops, for benchmarks
+
+Serves listing and detail pages under each shop's URL layout, mirrored as
+http://HOST:PORT/<shop host>/<path>, e.g.
+http://127.0.0.1:8900/cellphones.com.vn/laptop/mac.html. A page is served
+from the recordings directory when one was saved for it
+(<recordings>/<shop host>/<path>.html), otherwise it is generated in the
+shop's own markup from a synthetic catalog, so the real parsers run on it.
+
+Faults are injected per request, globally or per shop:
+- latency (plus jitter) before every response
+- 5xx errors
+- 403 blocks and 200 challenge interstitials (Cloudflare style)
+- lazy loading: only the first N cards are in the HTML, the rest are
+  added by JavaScript on scroll, so plain HTTP fetches see a partial page
+
+Each shop also serves /sitemap.xml (an index) and /sitemap-products.xml
+listing every catalog product page, for sitemap discovery. With --json-ld,
+listings and detail pages also embed their products as schema.org JSON-LD
+(an ItemList of Products / a Product), as many storefronts do.
+
+Listings send an ETag and answer If-None-Match with 304. Counters are
+served as JSON at /__stats (reset with /__reset).
+
+Point the scrapers at it with VIETMAC_SHOP_MIRROR (utils/shop_mirror.py):
+
+    python3 mock_shop_server.py --port 8900 --latency-ms 150 --error-rate 0.02
+    VIETMAC_SHOP_MIRROR=http://127.0.0.1:8900 python3 update_prices.py --shops cellphones
+
+Usage:
+    python3 mock_shop_server.py --lazy-after 8 --set fptshop.block_rate=0.3
+    python3 mock_shop_server.py --record   # save the live shop pages as recordings
+"""
+import argparse
+import hashlib
+import html
+import json
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+DEFAULT_RECORDINGS = Path(__file__).parent / "data" / "mock_shop"
+
+# Shop host (without www.) -> shop name
+SHOP_HOSTS = {
+    'cellphones.com.vn': 'cellphones',
+    'shopdunk.com': 'shopdunk',
+    'fptshop.com.vn': 'fptshop',
+    'topzone.vn': 'topzone',
+}
+
+# Fault profile every shop starts from; --set SHOP.KEY=VALUE overrides one shop
+DEFAULT_PROFILE = {
+    'latency_ms': 0.0,
+    'jitter_ms': 0.0,
+    'error_rate': 0.0,
+    'block_rate': 0.0,
+    'challenge_rate': 0.0,
+    'lazy_after': 0,
+}
+
+PAGE_PARAMS = ('p', 'pagenumber', 'page')
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+# Sitemap entries that are not MacBook product pages (discovery skips them)
+SITEMAP_DECOYS = ('/phu-kien/op-lung-macbook-air-13-inch.html', '/iphone-16-pro-max.html')
+
+CHALLENGE_PAGE = """<!DOCTYPE html>
+<html><head><title>Just a moment...</title></head>
+<body><div id="cf-browser-verification" class="cf-chl">
+<h1>Checking your browser before accessing the site.</h1>
+<script src="/cdn-cgi/challenge-platform/h/b/orchestrate/chl_page/v1"></script>
+</div></body></html>"""
+
+# Appends the cards held back by lazy_after once the page is scrolled
+LAZY_SCRIPT = """<script>
+(function () {
+  var done = false;
+  function load() {
+    if (done) return;
+    done = true;
+    var cards = JSON.parse(document.getElementById('lazy-products').textContent);
+    var grid = document.getElementById('product-grid');
+    cards.forEach(function (card) { grid.insertAdjacentHTML('beforeend', card); });
+  }
+  window.addEventListener('scroll', load);
+})();
+</script>"""
+
+# (model type, size, chip, cpu cores, gpu cores, base price in million VND)
+MODELS = [
+    ('MacBook Air', 13, 'M2', 8, 8, 18.5),
+    ('MacBook Air', 13, 'M3', 8, 10, 22.9),
+    ('MacBook Air', 15, 'M3', 8, 10, 27.9),
+    ('MacBook Air', 13, 'M4', 10, 8, 24.9),
+    ('MacBook Air', 15, 'M4', 10, 10, 30.9),
+    ('MacBook Pro', 14, 'M4', 10, 10, 39.9),
+    ('MacBook Pro', 14, 'M4 Pro', 12, 16, 49.9),
+    ('MacBook Pro', 16, 'M4 Pro', 14, 20, 62.9),
+    ('MacBook Pro', 16, 'M4 Max', 16, 40, 89.9),
+    ('MacBook Pro', 14, 'M5', 10, 10, 42.9),
+]
+CONFIGS = [(16, 256), (16, 512), (24, 512), (32, 1024)]
+COLORS = ['Bạc', 'Xám', 'Đen', 'Vàng', 'Xanh']
+
+SCREEN_SIZES = {13: '13.6 inch', 14: '14.2 inch', 15: '15.3 inch', 16: '16.2 inch'}
+
+
+def _storage(gb):
+    return f"{gb // 1024}TB" if gb >= 1024 else f"{gb}GB"
+
+
+def _price(vnd):
+    return f"{vnd:,}".replace(',', '.') + 'đ'
+
+
+def build_catalog(variants=1):
+    """Synthetic catalog: every model x configuration x color variant"""
+    catalog = []
+    for model_type, size, chip, cpu, gpu, base in MODELS:
+        for ram, storage in CONFIGS:
+            for color in COLORS[:max(1, variants)]:
+                price = int((base + (ram - 16) * 0.5 + storage / 256 * 2.5) * 1_000_000)
+                catalog.append({
+                    'model_type': model_type, 'size': size, 'chip': chip,
+                    'cpu': cpu, 'gpu': gpu, 'ram': ram, 'storage': storage,
+                    'color': color if variants > 1 else None,
+                    'price': price - price % 10_000,
+                })
+    return catalog
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+class ShopLayout:
+    """How one shop names products, lays out cards and links detail pages"""
+
+    shop = None
+    price_factor = 1.0
+
+    def name(self, p):
+        raise NotImplementedError
+
+    def detail_path(self, p):
+        raise NotImplementedError
+
+    def card(self, p, url, image):
+        raise NotImplementedError
+
+    def product_id(self, p, url):
+        return None
+
+    def price(self, p):
+        return int(p['price'] * self.price_factor) // 10_000 * 10_000
+
+    def color(self, p):
+        return f" {p['color']}" if p['color'] else ''
+
+    def detail_page(self, p):
+        return f"<h1>{html.escape(self.name(p))}</h1><div class=\"price\">{_price(self.price(p))}</div>"
+
+
+class CellphonesLayout(ShopLayout):
+    shop = 'cellphones'
+
+    def name(self, p):
+        # No screen size in the card name; the scraper reads it from the detail page
+        return (f"{p['model_type']} {p['chip']} {p['cpu']}CPU {p['gpu']}GPU {p['ram']}GB "
+                f"{_storage(p['storage'])}{self.color(p)} | Chính hãng Apple Việt Nam")
+
+    def detail_path(self, p):
+        return '/' + _slug(f"{p['model_type']} {p['size']} inch {p['chip']} {p['ram']}gb "
+                           f"{_storage(p['storage'])} {p['color'] or ''}") + '.html'
+
+    def card(self, p, url, image):
+        return (f'<div class="product-info"><a class="product__link" href="{url}">'
+                f'<div class="product__image"><img src="{image}"></div>'
+                f'<div class="product__name"><h3>{html.escape(self.name(p))}</h3></div></a>'
+                f'<p class="product__price--show">{_price(self.price(p))}</p></div>')
+
+    def detail_page(self, p):
+        return (super().detail_page(p) + '<table class="technical-content">'
+                f'<tr><td>Kích thước màn hình</td><td>{SCREEN_SIZES[p["size"]]}</td></tr>'
+                f'<tr><td>Loại CPU</td><td>Apple {p["chip"]}</td></tr></table>')
+
+
+class ShopDunkLayout(ShopLayout):
+    shop = 'shopdunk'
+    price_factor = 0.98
+
+    def name(self, p):
+        return (f"{p['model_type']} {p['chip']} {p['size']} inch ({p['cpu']}C CPU/{p['gpu']}C GPU/"
+                f"{p['ram']}GB/{_storage(p['storage'])}){self.color(p)}")
+
+    def detail_path(self, p):
+        return '/' + _slug(self.name(p))
+
+    def product_id(self, p, url):
+        return str(int(hashlib.md5(url.encode()).hexdigest()[:6], 16))
+
+    def card(self, p, url, image):
+        return (f'<div class="product-item" data-productid="{self.product_id(p, url)}">'
+                f'<a href="{url}"><img src="{image}"><h3>{html.escape(self.name(p))}</h3></a>'
+                f'<div class="prices"><span class="actual-price">{_price(self.price(p))}</span></div></div>')
+
+
+class FPTShopLayout(ShopLayout):
+    shop = 'fptshop'
+    price_factor = 1.01
+
+    def name(self, p):
+        return (f"{p['model_type']} {p['size']} {p['chip']} {p['cpu']}CPU/{p['gpu']}GPU/"
+                f"{p['ram']}GB/{_storage(p['storage'])}{self.color(p)}")
+
+    def detail_path(self, p):
+        return '/may-tinh-xach-tay/' + _slug(self.name(p))
+
+    def card(self, p, url, image):
+        return (f'<div class="cdt-product"><a href="{url}" title="{html.escape(self.name(p))}">'
+                f'<img src="{image}"></a><h3>{html.escape(self.name(p))}</h3>'
+                f'<div class="price" data-price="{self.price(p)}">{_price(self.price(p))}</div></div>')
+
+
+class TopZoneLayout(ShopLayout):
+    shop = 'topzone'
+    price_factor = 0.99
+
+    def name(self, p):
+        return (f"{p['model_type']} {p['size']} inch {p['chip']} {p['ram']}GB/"
+                f"{_storage(p['storage'])}{self.color(p)}")
+
+    def detail_path(self, p):
+        return '/mac/' + _slug(self.name(p))
+
+    def card(self, p, url, image):
+        return (f'<li class="product-item"><a href="{url}"><img src="{image}">'
+                f'<h3>{html.escape(self.name(p))}</h3>'
+                f'<strong class="price">{_price(self.price(p))}</strong></a></li>')
+
+
+LAYOUTS = {layout.shop: layout for layout in
+           (CellphonesLayout(), ShopDunkLayout(), FPTShopLayout(), TopZoneLayout())}
+
+
+def listing_filter(path, query):
+    """Which catalog products a listing URL shows, judged from its slug"""
+    slug = path.lower()
+    size = re.search(r'(\d{2})-inch', query.get('kich-thuoc-man-hinh', [''])[0])
+    chip = re.search(r'-m(\d)(?:\b|-)', slug)
+    year_chip = 'M5' if '2025' in slug else None
+
+    def matches(p):
+        if 'air' in slug and p['model_type'] != 'MacBook Air':
+            return False
+        if 'pro' in slug and p['model_type'] != 'MacBook Pro':
+            return False
+        if chip and not p['chip'].startswith(f"M{chip.group(1)}"):
+            return False
+        if year_chip and p['chip'] != year_chip:
+            return False
+        return not size or p['size'] == int(size.group(1))
+    return matches
+
+
+class MockShop:
+    """Catalog, fault profiles and counters shared by all handler threads"""
+
+    def __init__(self, base_url, profiles=None, variants=1, page_size=0,
+                 recordings=DEFAULT_RECORDINGS, seed=None, json_ld=False):
+        self.base_url = base_url
+        self.catalog = build_catalog(variants)
+        self.page_size = page_size
+        self.json_ld = json_ld
+        self.recordings = Path(recordings) if recordings else None
+        self.profiles = {shop: {**DEFAULT_PROFILE, **(profiles or {}).get(shop, {})}
+                         for shop in LAYOUTS}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        # Detail path -> catalog product, per shop
+        self.details = {
+            shop: {layout.detail_path(p): p for p in self.catalog}
+            for shop, layout in LAYOUTS.items()
+        }
+        # lastmod of every product page in the sitemaps
+        self.catalog_updated = time.time()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.counters = defaultdict(lambda: defaultdict(int))
+            self.started = time.time()
+
+    def stats(self):
+        with self.lock:
+            return {
+                'seconds': round(time.time() - self.started, 3),
+                'shops': {shop: dict(counts) for shop, counts in self.counters.items()},
+            }
+
+    def count(self, shop, key, n=1):
+        with self.lock:
+            self.counters[shop][key] += n
+
+    def roll(self, rate):
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def error_status(self):
+        with self.lock:
+            return self.random.choice((500, 502, 503))
+
+    def delay(self, profile):
+        with self.lock:
+            jitter = self.random.uniform(-profile['jitter_ms'], profile['jitter_ms'])
+        return max(0.0, profile['latency_ms'] + jitter) / 1000
+
+    def shop_url(self, host, path):
+        return f"{self.base_url}/{host}{path}"
+
+    def recording(self, host, path):
+        """Recorded page for host/path with real shop links pointed at the mirror"""
+        if not self.recordings:
+            return None
+        file = self.recordings / host / ((path.strip('/') or 'index') + '.html')
+        if not file.is_file():
+            return None
+        body = file.read_bytes()
+        bare = host.removeprefix('www.')
+        for origin in (f"https://www.{bare}", f"https://{bare}"):
+            body = body.replace(origin.encode(), self.shop_url(host, '').encode())
+        return body
+
+    def json_ld_product(self, shop, host, p):
+        """schema.org Product of a catalog product as the shop lists it"""
+        layout = LAYOUTS[shop]
+        url = self.shop_url(host, layout.detail_path(p))
+        product = {
+            '@type': 'Product',
+            'name': layout.name(p),
+            'url': url,
+            'image': f"{self.base_url}/static/{_slug(layout.name(p))}.png",
+            'offers': {'@type': 'Offer', 'price': layout.price(p), 'priceCurrency': 'VND', 'url': url},
+        }
+        if layout.product_id(p, url):
+            product['sku'] = layout.product_id(p, url)
+        return product
+
+    def json_ld_script(self, data):
+        payload = json.dumps({'@context': 'https://schema.org', **data}, ensure_ascii=False).replace('</', '<\\/')
+        return f'<script type="application/ld+json">{payload}</script>'
+
+    def listing_page(self, shop, host, path, query):
+        layout = LAYOUTS[shop]
+        products = [p for p in self.catalog if listing_filter(path, query)(p)]
+        if self.page_size:
+            page = next((int(query[k][0]) for k in PAGE_PARAMS if query.get(k, [''])[0].isdigit()), 1)
+            products = products[(page - 1) * self.page_size:page * self.page_size]
+
+        cards = [
+            layout.card(p, self.shop_url(host, layout.detail_path(p)),
+                        f"{self.base_url}/static/{_slug(layout.name(p))}.png")
+            for p in products
+        ]
+        lazy_after = self.profiles[shop]['lazy_after']
+        visible, lazy = (cards[:lazy_after], cards[lazy_after:]) if lazy_after else (cards, [])
+
+        head = ''
+        if self.json_ld:
+            head = self.json_ld_script({'@type': 'ItemList', 'itemListElement': [
+                {'@type': 'ListItem', 'position': i + 1, 'item': self.json_ld_product(shop, host, p)}
+                for i, p in enumerate(products)
+            ]})
+        parts = [f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(path)}</title>{head}</head>",
+                 f"<body><div id=\"product-grid\">{''.join(visible)}</div>"]
+        if lazy:
+            payload = json.dumps(lazy, ensure_ascii=False).replace('</', '<\\/')
+            parts.append(f'<script type="application/json" id="lazy-products">{payload}</script>')
+            parts.append(LAZY_SCRIPT)
+        parts.append("</body></html>")
+        return ''.join(parts).encode('utf-8'), 'listing'
+
+    def sitemap(self, shop, host, path):
+        """Sitemap index (/sitemap.xml) or product urlset (/sitemap-products.xml)"""
+        lastmod = datetime.fromtimestamp(self.catalog_updated, timezone.utc).isoformat(timespec='seconds')
+        if path == '/sitemap.xml':
+            loc = html.escape(self.shop_url(host, '/sitemap-products.xml'))
+            body = f"<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>"
+            root = 'sitemapindex'
+        else:
+            layout = LAYOUTS[shop]
+            paths = [layout.detail_path(p) for p in self.catalog] + list(SITEMAP_DECOYS)
+            body = ''.join(f"<url><loc>{html.escape(self.shop_url(host, p))}</loc><lastmod>{lastmod}</lastmod></url>"
+                           for p in paths)
+            root = 'urlset'
+        return f'<?xml version="1.0" encoding="UTF-8"?><{root} xmlns="{SITEMAP_NS}">{body}</{root}>'.encode('utf-8')
+
+    def page(self, shop, host, path, query):
+        """(body, page type) for a shop path"""
+        recorded = self.recording(host, path)
+        if recorded is not None:
+            return recorded, 'recorded'
+        if path in ('/sitemap.xml', '/sitemap-products.xml'):
+            return self.sitemap(shop, host, path), 'sitemap'
+        product = self.details[shop].get(path)
+        if product is not None:
+            layout = LAYOUTS[shop]
+            head = self.json_ld_script(self.json_ld_product(shop, host, product)) if self.json_ld else ''
+            body = (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\">{head}</head>"
+                    f"<body>{layout.detail_page(product)}</body></html>")
+            return body.encode('utf-8'), 'detail'
+        return self.listing_page(shop, host, path, query)
+
+
+class MockShopHandler(BaseHTTPRequestHandler):
+    server_version = 'MockShop/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='text/html; charset=utf-8', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        shop_state = self.server.shop
+        parts = urlsplit(self.path)
+        if parts.path == '/__stats':
+            return self._send(200, json.dumps(shop_state.stats()).encode(), 'application/json')
+        if parts.path == '/__reset':
+            shop_state.reset_stats()
+            return self._send(200, b'{}', 'application/json')
+
+        host, _, path = parts.path.lstrip('/').partition('/')
+        shop = SHOP_HOSTS.get(host.removeprefix('www.'))
+        path = '/' + path
+        if shop is None:
+            return self._send(404, b'Unknown shop host')
+        if path == '/robots.txt':
+            return self._send(200, b'User-agent: *\nAllow: /\n', 'text/plain')
+
+        profile = shop_state.profiles[shop]
+        shop_state.count(shop, 'requests')
+        wait = shop_state.delay(profile)
+        if wait:
+            time.sleep(wait)
+            shop_state.count(shop, 'latency_ms', round(wait * 1000))
+
+        if shop_state.roll(profile['block_rate']):
+            shop_state.count(shop, 'blocked')
+            return self._send(403, CHALLENGE_PAGE.encode())
+        if shop_state.roll(profile['challenge_rate']):
+            shop_state.count(shop, 'challenges')
+            return self._send(200, CHALLENGE_PAGE.encode())
+        if shop_state.roll(profile['error_rate']):
+            shop_state.count(shop, 'errors')
+            return self._send(shop_state.error_status(), b'Server error')
+
+        body, page_type = shop_state.page(shop, host, path, parse_qs(parts.query))
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            shop_state.count(shop, 'not_modified')
+            return self._send(304, b'', headers={'ETag': etag})
+
+        shop_state.count(shop, f'{page_type}_pages')
+        shop_state.count(shop, 'bytes', len(body))
+        content_type = 'application/xml' if page_type == 'sitemap' else 'text/html; charset=utf-8'
+        self._send(200, body, content_type, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+
+class MockShopServer:
+    """Threaded mock shop server, startable in-process (e.g. by bench_scrapers.py)"""
+
+    def __init__(self, host='127.0.0.1', port=0, **shop_options):
+        self.httpd = ThreadingHTTPServer((host, port), MockShopHandler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.httpd.shop = MockShop(self.url, **shop_options)
+        self.thread = None
+
+    @property
+    def shop(self):
+        return self.httpd.shop
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='mock-shop', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def add_fault_arguments(parser):
+    """Fault and catalog options shared with bench_scrapers.py"""
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay before every response')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Random +/- added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0, help='Share of 5xx responses (0-1)')
+    parser.add_argument('--block-rate', type=float, default=0, help='Share of 403 challenge responses (0-1)')
+    parser.add_argument('--challenge-rate', type=float, default=0,
+                        help='Share of 200 challenge interstitials (0-1)')
+    parser.add_argument('--lazy-after', type=int, default=0,
+                        help='Cards in the HTML; the rest are added by JavaScript on scroll (0 = all)')
+    parser.add_argument('--set', action='append', default=[], metavar='SHOP.KEY=VALUE',
+                        help='Per-shop override, e.g. fptshop.block_rate=0.3 (repeatable)')
+    parser.add_argument('--variants', type=int, default=1,
+                        help=f"Color variants per configuration (1-{len(COLORS)}) to grow the catalog")
+    parser.add_argument('--page-size', type=int, default=0,
+                        help='Cards per listing page, paginated with ?p= / ?pagenumber= (0 = one page)')
+    parser.add_argument('--recordings', type=str, default=str(DEFAULT_RECORDINGS),
+                        help='Recorded pages directory (<host>/<path>.html)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible fault injection')
+    parser.add_argument('--json-ld', action='store_true',
+                        help='Embed the products of every page as schema.org JSON-LD')
+
+
+def shop_options_from_args(args):
+    """MockShop keyword arguments from the parsed fault arguments"""
+    base = {
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'block_rate': args.block_rate,
+        'challenge_rate': args.challenge_rate,
+        'lazy_after': args.lazy_after,
+    }
+    profiles = {shop: dict(base) for shop in LAYOUTS}
+    for override in args.set:
+        key, _, value = override.partition('=')
+        shop, _, name = key.partition('.')
+        if shop not in profiles or name not in DEFAULT_PROFILE or not value:
+            raise ValueError(f"Bad --set {override!r} (expected SHOP.KEY=VALUE, keys: {', '.join(DEFAULT_PROFILE)})")
+        profiles[shop][name] = type(DEFAULT_PROFILE[name])(value)
+    return {
+        'profiles': profiles,
+        'variants': args.variants,
+        'page_size': args.page_size,
+        'recordings': args.recordings,
+        'seed': args.seed,
+        'json_ld': args.json_ld,
+    }
+
+
+def record_pages(recordings):
+    """Save the live listing pages of the HTTP-fetchable shops as recordings"""
+    import requests
+    from scrapers.registry import SHOPS, get_scraper_class
+
+    session = requests.Session()
+    headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+                             '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'}
+    for shop_name in SHOPS:
+        for page in get_scraper_class(shop_name).PAGES:
+            parts = urlsplit(page['url'])
+            target = Path(recordings) / parts.netloc / ((parts.path.strip('/') or 'index') + '.html')
+            try:
+                response = session.get(page['url'], headers=headers, timeout=30)
+            except requests.RequestException as e:
+                print(f"❌ {page['url']}: {e}")
+                continue
+            if response.status_code != 200:
+                print(f"❌ {page['url']}: HTTP {response.status_code}")
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(response.content)
+            print(f"✅ {page['url']} -> {target} ({len(response.content) / 1024:.0f} KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve mock copies of the shops for benchmarks')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--record', action='store_true',
+                        help='Fetch the live listing pages into --recordings and exit')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    if args.record:
+        record_pages(args.recordings)
+        return 0
+
+    try:
+        options = shop_options_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    server = MockShopServer(args.host, args.port, **options)
+    print(f"🏪 Mock shops on {server.url} ({len(server.shop.catalog)} products per shop)")
+    for host, shop in SHOP_HOSTS.items():
+        print(f"   {shop:<11} {server.url}/{host}/")
+    print(f"\n   export VIETMAC_SHOP_MIRROR={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
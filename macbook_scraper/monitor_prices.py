@@ -4,44 +4,84 @@ Price Monitoring and Alerting System
 Tracks price changes and sends notifications
 """
 import json
+import sys
 from datetime import datetime
 from pathlib import Path
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.alert_delivery import DeliveryQueue
+from utils.alert_subscriptions import AlertSubscriptions
+from utils.output_writer import publish_json
+from utils.price_store import PriceStore, to_timestamp
 
 
 class PriceMonitor:
-    def __init__(self):
+    def __init__(self, store=None, subscriptions=None, drain_timeout=10):
         self.output_dir = Path(__file__).parent / "output"
         self.history_file = self.output_dir / "price_history.json"
         self.alerts_file = self.output_dir / "price_alerts.json"
-
-    def load_history(self):
-        """Load price history"""
-        if self.history_file.exists():
-            with open(self.history_file, 'r', encoding='utf-8') as f:
+        self.analytics_file = self.output_dir / "price_analytics.json"
+        self.store = store or PriceStore(self.output_dir / "prices.db")
+        self._analytics = None
+        self._subscriptions = subscriptions
+        self._delivery = None
+        self.drain_timeout = drain_timeout
+
+        # One-time import of the old JSON history (last price per product)
+        if self.store.is_empty() and self.history_file.exists():
+            imported = self.store.import_history_json(self.history_file)
+            print(f"📦 Imported {imported} prices from {self.history_file.name} into {self.store.db_path.name}")
+
+    def load_latest_run(self):
+        """Load the latest scraped run (timestamp and products)"""
+        latest_file = self.output_dir / "latest_products.json"
+        if latest_file.exists():
+            with open(latest_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
         return {}
 
-    def save_history(self, history):
-        """Save price history"""
-        with open(self.history_file, 'w', encoding='utf-8') as f:
-            json.dump(history, f, indent=2, ensure_ascii=False)
-
     def load_latest_prices(self):
         """Load latest scraped prices"""
-        latest_file = self.output_dir / "latest_products.json"
-        if latest_file.exists():
-            with open(latest_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('products', [])
-        return []
+        return self.load_latest_run().get('products', [])
+
+    @property
+    def analytics(self):
+        """Analytics over the full history, computed and published on first use"""
+        if self._analytics is None:
+            try:
+                from utils.price_analytics import compute_analytics
+            except ImportError:
+                print("⚠️  numpy not installed - skipping price analytics")
+                self._analytics = {}
+                return self._analytics
+            self._analytics = compute_analytics(self.store)
+            publish_json(self._analytics, self.analytics_file)
+            print(f"📊 Saved analytics for {len(self._analytics['products'])} products to: {self.analytics_file}")
+        return self._analytics
+
+    @property
+    def subscriptions(self):
+        """Alert subscriptions (opened on first use)"""
+        if self._subscriptions is None:
+            self._subscriptions = AlertSubscriptions(self.output_dir / "subscriptions.db")
+        return self._subscriptions
+
+    def annotate_changes(self, changes):
+        """Add all-time-low and drop-streak context to drops and new products"""
+        products = self.analytics.get('products', {})
+        for change in changes['price_drops'] + changes['new_products']:
+            stats = products.get(change['product_id'])
+            if stats:
+                change['all_time_low'] = stats['is_all_time_low']
+                change['drop_streak'] = stats['drop_streak']
+                change['avg_30d'] = (stats['30d'] or {}).get('avg')
+        return changes
 
     def detect_changes(self):
         """Detect price changes"""
-        history = self.load_history()
-        current_products = self.load_latest_prices()
+        run = self.load_latest_run()
+        current_products = run.get('products', [])
 
         changes = {
             'price_drops': [],
@@ -50,50 +90,45 @@ class PriceMonitor:
             'timestamp': datetime.now().isoformat()
         }
 
-        for product in current_products:
-            product_key = f"{product['shop']}_{product['model']}"
-            current_price = product.get('price_vnd')
-
-            if not current_price:
-                continue
-
-            if product_key in history:
-                old_price = history[product_key].get('price_vnd')
-                if old_price and current_price != old_price:
-                    change_pct = ((current_price - old_price) / old_price) * 100
-
-                    change_info = {
-                        'shop': product['shop'],
-                        'model': product['model'],
-                        'old_price': old_price,
-                        'new_price': current_price,
-                        'change_vnd': current_price - old_price,
-                        'change_pct': round(change_pct, 2),
-                        'url': product.get('url')
-                    }
-
-                    if current_price < old_price:
-                        changes['price_drops'].append(change_info)
-                    else:
-                        changes['price_increases'].append(change_info)
-            else:
+        # Append this run's prices in one transaction; a run that was already
+        # recorded has nothing new to report
+        run_ts = to_timestamp(run.get('timestamp'))
+        if not self.store.record_run(current_products, ts=run_ts):
+            return changes
+        self._analytics = None
+
+        shops = sorted({p['shop'] for p in current_products if p.get('shop')})
+        for row in self.store.changes_at(run_ts, shops=shops):
+            current_price, old_price = row['new_price'], row['old_price']
+
+            if old_price is None:
                 changes['new_products'].append({
-                    'shop': product['shop'],
-                    'model': product['model'],
+                    'product_id': row['product_id'],
+                    'shop': row['shop'],
+                    'model': row['model'],
+                    'canonical_id': row['canonical_id'],
                     'price': current_price,
-                    'url': product.get('url')
+                    'url': row['url']
                 })
-
-            # Update history
-            history[product_key] = {
-                'price_vnd': current_price,
-                'last_updated': datetime.now().isoformat(),
-                'model': product['model'],
-                'shop': product['shop']
-            }
-
-        # Save updated history
-        self.save_history(history)
+            elif current_price != old_price:
+                change_pct = ((current_price - old_price) / old_price) * 100
+
+                change_info = {
+                    'product_id': row['product_id'],
+                    'shop': row['shop'],
+                    'model': row['model'],
+                    'canonical_id': row['canonical_id'],
+                    'old_price': old_price,
+                    'new_price': current_price,
+                    'change_vnd': current_price - old_price,
+                    'change_pct': round(change_pct, 2),
+                    'url': row['url']
+                }
+
+                if current_price < old_price:
+                    changes['price_drops'].append(change_info)
+                else:
+                    changes['price_increases'].append(change_info)
 
         return changes
 
@@ -127,6 +162,7 @@ class PriceMonitor:
                     <span class="old-price">{drop['old_price']:,}₫</span> →
                     <span class="price">{drop['new_price']:,}₫</span><br>
                     <strong style="color: #16a34a;">Save {abs(drop['change_vnd']):,}₫ ({abs(drop['change_pct'])}%)</strong><br>
+                    {'🏆 All-time low<br>' if drop.get('all_time_low') else ''}
                     <a href="{drop['url']}">View Product</a>
                 </div>
                 """
@@ -149,41 +185,45 @@ class PriceMonitor:
 
         return html
 
-    def send_email_alert(self, changes, to_email, smtp_config=None):
-        """Send email alert (requires SMTP configuration)"""
-        if not smtp_config:
-            print("⚠️  Email alerts not configured. Set SMTP settings to enable.")
-            return False
-
-        email_content = self.generate_alert_email(changes)
-        if not email_content:
-            return False
-
-        try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = f"MacBook Price Alert - {len(changes['price_drops'])} Drops Found"
-            msg['From'] = smtp_config['from_email']
-            msg['To'] = to_email
-
-            msg.attach(MIMEText(email_content, 'html'))
-
-            with smtplib.SMTP(smtp_config['smtp_host'], smtp_config['smtp_port']) as server:
-                server.starttls()
-                server.login(smtp_config['smtp_user'], smtp_config['smtp_password'])
-                server.send_message(msg)
+    def render_alert_items(self, items):
+        """Email body for one recipient's queued alert items"""
+        return self.generate_alert_email({
+            'price_drops': [item for item in items if item.get('old_price') is not None],
+            'new_products': [item for item in items if item.get('old_price') is None],
+        })
+
+    def get_delivery(self, smtp_config=None):
+        """Background alert delivery queue (started on first use)"""
+        if self._delivery is None:
+            # Backoff short enough that a failed send is retried a few times
+            # within the drain at the end of run(), not only on the next run
+            self._delivery = DeliveryQueue(self.output_dir / "outbox.db", smtp_config=smtp_config,
+                                           render_email=self.render_alert_items,
+                                           retry_backoff=self.drain_timeout / 8)
+        return self._delivery
 
-            print(f"✅ Email alert sent to {to_email}")
-            return True
-
-        except Exception as e:
-            print(f"❌ Failed to send email: {e}")
+    def send_email_alert(self, changes, to_email, smtp_config=None):
+        """Queue an email alert for background delivery (SMTP_* env vars or smtp_config)"""
+        items = changes['price_drops'] + changes['new_products']
+        if not items:
             return False
+        self.get_delivery(smtp_config).enqueue(to_email, items)
+        print(f"📬 Email alert queued for {to_email}")
+        return True
 
     def run(self, send_email=False, email_to=None):
         """Run price monitoring"""
         print("🔍 Monitoring price changes...")
 
         changes = self.detect_changes()
+        if changes['price_drops'] or changes['new_products']:
+            self.annotate_changes(changes)
+
+        # Only rules on the changed canonical ids are evaluated
+        notifications = {}
+        if changes['price_drops'] or changes['new_products']:
+            notifications = self.subscriptions.match(changes)
+        changes['notifications'] = notifications
 
         # Save alerts
         with open(self.alerts_file, 'w', encoding='utf-8') as f:
@@ -196,6 +236,7 @@ class PriceMonitor:
         print(f"📉 Price Drops: {len(changes['price_drops'])}")
         print(f"📈 Price Increases: {len(changes['price_increases'])}")
         print(f"🆕 New Products: {len(changes['new_products'])}")
+        print(f"🔔 Subscribers to notify: {len(notifications)}")
         print(f"{'='*60}\n")
 
         if changes['price_drops']:
@@ -206,14 +247,31 @@ class PriceMonitor:
                 print(f"{i}. {drop['model']} ({drop['shop']})")
                 print(f"   {drop['old_price']:,}₫ → {drop['new_price']:,}₫")
                 print(f"   Save {abs(drop['change_vnd']):,}₫ ({abs(drop['change_pct'])}%)")
+                if drop.get('all_time_low'):
+                    print("   🏆 All-time low")
+                if drop.get('drop_streak', 0) > 1:
+                    print(f"   📉 {drop['drop_streak']} drops in a row")
                 print()
 
-        # Send email if configured
+        # Queue notifications; delivery runs on a background thread and
+        # also resumes alerts left in the outbox by earlier runs
+        if (self.output_dir / "outbox.db").exists():
+            self.get_delivery()
+        for recipient, matches in notifications.items():
+            self.get_delivery().enqueue(recipient, [match['change'] for match in matches])
         if send_email and email_to:
-            # Load SMTP config from environment or config file
-            # For now, just save the alert
-            print("💾 Alert saved to:", self.alerts_file)
+            self.send_email_alert(changes, email_to)
+
+        # Bounded drain: whatever is not sent in time stays in the outbox
+        if self._delivery is not None:
+            left = self._delivery.close(timeout=self.drain_timeout)
+            self._delivery = None
+            if left:
+                print(f"⚠️  {left} alerts still pending in outbox.db (retried on the next run)")
+            else:
+                print("✅ All alerts delivered")
 
+        print("💾 Alert saved to:", self.alerts_file)
         return changes
 
 
@@ -223,10 +281,30 @@ def main():
 
     parser = argparse.ArgumentParser(description='Monitor MacBook price changes')
     parser.add_argument('--email', type=str, help='Send email alert to this address')
+    parser.add_argument('--subscribe', type=str, metavar='EMAIL',
+                        help='Register an alert rule for this address and exit')
+    parser.add_argument('--target', type=str, default='*',
+                        help='Canonical id (m4-air-13-16-512gb), family (m4-air) or * (default)')
+    parser.add_argument('--below', type=int, metavar='VND',
+                        help='Alert when the price crosses under this amount')
+    parser.add_argument('--drop-pct', type=float, metavar='PCT',
+                        help='Alert on drops of at least this percentage')
+    parser.add_argument('--shop', type=str, help='Only match offers from this shop')
 
     args = parser.parse_args()
 
     monitor = PriceMonitor()
+
+    if args.subscribe:
+        try:
+            sub_id = monitor.subscriptions.subscribe(
+                args.subscribe, target=args.target, max_price=args.below,
+                min_drop_pct=args.drop_pct, shop=args.shop)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"✅ Subscription #{sub_id} registered for {args.subscribe}")
+        return
+
     monitor.run(send_email=bool(args.email), email_to=args.email)
 
 
@@ -6,10 +6,9 @@ Scraper Manager - Runs all 4 scrapers and generates final output
 import json
 import logging
 from datetime import datetime
-from scrapers.cellphones_scraper import CellphonesScraper
-from scrapers.shopdunk_scraper import ShopDunkScraper
-from scrapers.fptshop_scraper import FPTShopScraper
-from scrapers.topzone_scraper import TopZoneScraper
+from scrapers.registry import SHOPS, get_scraper_class
+from utils.telemetry import RunTelemetry
+from utils.url_frontier import URLFrontier
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,13 +19,12 @@ logger = logging.getLogger(__name__)
 
 class ScraperManager:
     def __init__(self):
-        self.scrapers = {
-            'cellphones': CellphonesScraper(),
-            'shopdunk': ShopDunkScraper(),
-            'fptshop': FPTShopScraper(),
-            'topzone': TopZoneScraper(),
-        }
+        # Scrapers are created when their turn comes, so one shop's missing
+        # browser backend doesn't stop the others from running
+        self.shops = list(SHOPS)
         self.results = {}
+        self.telemetry = RunTelemetry()
+        self.frontier = URLFrontier()
 
     def run_all(self):
         """Run all scrapers sequentially"""
@@ -36,13 +34,14 @@ class ScraperManager:
         start_time = datetime.now()
 
         # Run each scraper
-        for shop_name, scraper in self.scrapers.items():
+        for shop_name in self.shops:
             try:
                 logger.info(f"\n{'='*80}")
                 logger.info(f"Running {shop_name.upper()} scraper...")
                 logger.info(f"{'='*80}")
 
-                result = scraper.scrape()
+                scraper = get_scraper_class(shop_name)(telemetry=self.telemetry)
+                result = scraper.scrape(frontier=self.frontier)
                 self.results[shop_name] = result
 
                 if result['success']:
@@ -90,6 +89,8 @@ class ScraperManager:
         logger.info(f"Total Duration: {duration:.1f}s")
         logger.info(f"Success Rate: {successful_shops}/4 shops ({successful_shops/4*100:.0f}%)")
         logger.info(f"Total Products: {total_products}")
+        for line in self.telemetry.format_breakdown():
+            logger.info(line)
         logger.info("="*80)
 
     def _save_results(self):
@@ -105,6 +106,7 @@ class ScraperManager:
                     'total_products': sum(r['count'] for r in self.results.values()),
                     'successful_shops': sum(1 for r in self.results.values() if r['success']),
                     'failed_shops': sum(1 for r in self.results.values() if not r['success']),
+                    'timings': self.telemetry.summary(),
                 },
                 'results': self.results,
             }
@@ -156,6 +158,10 @@ class ScraperManager:
 
         logger.info(f"✅ Report saved to: {report_file}")
 
+        metrics_file = 'output/metrics/vietmac_scrape.prom'
+        self.telemetry.write_prometheus(metrics_file, self.results)
+        logger.info(f"✅ Metrics saved to: {metrics_file}")
+
 
 def main():
     print("\n" + "="*80)
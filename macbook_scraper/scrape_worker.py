@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Scrape Worker - Claims page tasks from the work queue and runs them
+
+Start as many as you like (on this machine, or on any machine sharing the
+queue file). Each worker keeps its scrapers and a BrowserPool warm between
+tasks and heartbeats its lease while a page is being scraped.
+
+SIGINT or SIGTERM lets the current task finish, then the worker exits; a
+second SIGINT interrupts the task and hands its lease back to the queue.
+
+Usage:
+    python3 scrape_worker.py                       # run until stopped
+    python3 scrape_worker.py --idle-exit 30        # exit after 30s without work
+"""
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from scrapers.registry import get_scraper_class
+from utils.browser_pool import BrowserPool
+from utils.telemetry import RunTelemetry
+from utils.url_frontier import URLFrontier
+from utils.work_queue import TaskQueue, default_worker_id
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class ScrapeWorker:
+    def __init__(self, queue_path=None, worker_id=None, poll_interval=2.0):
+        self.queue = TaskQueue(queue_path)
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval
+        self.browser_pool = BrowserPool()
+        self.scrapers = {}
+        # Frontier of the run currently being worked on; products another
+        # page of the same run already yielded are not parsed again
+        self.run_id = None
+        self.frontier = None
+        self.stopping = threading.Event()
+
+    def _get_scraper(self, shop):
+        if shop not in self.scrapers:
+            self.scrapers[shop] = get_scraper_class(shop)(browser_pool=self.browser_pool)
+        return self.scrapers[shop]
+
+    def _heartbeat(self, task_id, stop):
+        """Keep the lease alive from a separate thread (and connection)"""
+        queue = TaskQueue(self.queue.db_path, lease_seconds=self.queue.lease_seconds)
+        try:
+            while not stop.wait(self.queue.lease_seconds / 3):
+                if not queue.heartbeat(task_id, self.worker_id):
+                    logger.warning(f"Lost lease on task {task_id}")
+                    return
+        finally:
+            queue.close()
+
+    def _get_frontier(self, run_id):
+        if run_id != self.run_id:
+            self.run_id, self.frontier = run_id, URLFrontier()
+        return self.frontier
+
+    def run_task(self, task):
+        """Scrape one listing or product page and report the outcome to the queue"""
+        logger.info(f"[{self.worker_id}] {task['shop']} {task['url']} "
+                    f"({task['render']}, attempt {task['attempts']})")
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(task['id'], stop), daemon=True)
+        heartbeat.start()
+        telemetry = RunTelemetry()
+        try:
+            scraper = self._get_scraper(task['shop'])
+            scraper.telemetry = telemetry
+            page_info = {'name': task['page_name'], 'url': task['url']}
+            frontier = self._get_frontier(task['run_id'])
+            if task['kind'] == 'detail':
+                products = scraper.scrape_detail(page_info, frontier=frontier)
+            else:
+                products = scraper.scrape_listing(page_info, render=task['render'], frontier=frontier)
+        except KeyboardInterrupt:
+            # Interrupted mid-task: hand the page back now rather than when the lease expires
+            self.queue.release(task['id'], self.worker_id)
+            logger.warning(f"[{self.worker_id}] Interrupted, released {task['url']}")
+            raise
+        except Exception as e:
+            products = None
+            error = str(e)
+        else:
+            error = 'Failed to fetch page'
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if products is None:
+            self.queue.fail(task['id'], self.worker_id, error)
+            logger.error(f"❌ {task['url']}: {error}")
+        else:
+            self.queue.complete(task['id'], self.worker_id,
+                                {'products': products, 'timings': telemetry.export()})
+            logger.info(f"✅ {task['url']}: {len(products)} products")
+
+    def stop(self, signum=None, frame=None):
+        """Exit after the current task (a second SIGINT interrupts it)"""
+        if not self.stopping.is_set():
+            logger.info(f"[{self.worker_id}] Stopping after the current task")
+        self.stopping.set()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    def run(self, idle_exit=None, max_tasks=None):
+        """Claim and run tasks until idle for idle_exit seconds (or forever)"""
+        done = 0
+        idle_since = time.monotonic()
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                handlers[signum] = signal.signal(signum, self.stop)
+        try:
+            while not self.stopping.is_set() and (max_tasks is None or done < max_tasks):
+                task = self.queue.claim(self.worker_id)
+                if task is None:
+                    if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                        break
+                    self.stopping.wait(self.poll_interval)
+                    continue
+
+                self.run_task(task)
+                done += 1
+                idle_since = time.monotonic()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+            self.browser_pool.close()
+            self.queue.close()
+        logger.info(f"[{self.worker_id}] Exiting after {done} tasks")
+        return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run scraping tasks from the work queue')
+    parser.add_argument('--queue', type=str, default=None,
+                        help='Queue database (default: output/work_queue.db)')
+    parser.add_argument('--worker-id', type=str, default=None,
+                        help='Worker name used for leases (default: host-pid)')
+    parser.add_argument('--idle-exit', type=float, default=None,
+                        help='Exit after this many seconds without work')
+    parser.add_argument('--max-tasks', type=int, default=None,
+                        help='Exit after running this many tasks')
+
+    args = parser.parse_args()
+
+    worker = ScrapeWorker(queue_path=args.queue, worker_id=args.worker_id)
+    worker.run(idle_exit=args.idle_exit, max_tasks=args.max_tasks)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,34 +4,72 @@ CellphoneS Scraper - Hybrid HTTP + Playwright scraper
 Uses simple HTTP for most pages, Playwright for JavaScript-heavy pages (M5)
 """
 
-import requests
-from bs4 import BeautifulSoup
 import re
 import time
 import random
 import logging
 import sys
 from pathlib import Path
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
 
 # Add utils directory to path for spec parser
 sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.dom_extract import extract_products
+from utils.pagination import ThreadSessions, fetch_more_pages
 from utils.spec_parser import SpecParser
+from utils.structured_data import card_count, record_for_url, structured_records
+from utils.shop_mirror import mirror_pages, mirror_url
+from utils.telemetry import NullTelemetry
+from utils.refresh_scheduler import listing_offers
+from utils.url_frontier import URLFrontier, canonicalize_url
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class CellphonesScraper:
-    def __init__(self):
-        self.base_url = "https://cellphones.com.vn"
+    # All CellphoneS MacBook URLs
+    PAGES = mirror_pages([
+        {
+            'name': 'All Mac',
+            'url': 'https://cellphones.com.vn/laptop/mac.html'
+        },
+        {
+            'name': 'MacBook Pro 2025 (M5)',
+            'url': 'https://cellphones.com.vn/laptop/mac/macbook-pro/macbook-pro-2025.html'
+        },
+        {
+            'name': 'MacBook Air',
+            'url': 'https://cellphones.com.vn/laptop/mac/macbook-air.html'
+        },
+        {
+            'name': 'MacBook Pro',
+            'url': 'https://cellphones.com.vn/laptop/mac/macbook-pro.html'
+        },
+    ])
+    # Query parameter of a listing's numbered pages (see utils/pagination)
+    PAGE_PARAM = 'p'
+    # Sitemaps listing every product page (see utils/sitemap)
+    SITEMAPS = [mirror_url('https://cellphones.com.vn/sitemap.xml')]
+    # How product pages found in the sitemaps are fetched
+    DETAIL_RENDER = 'http'
+    # Class of a product card; sizes up embedded product data (utils/structured_data)
+    CARD_CLASS = 'product-info'
+
+    def __init__(self, browser_pool=None, telemetry=None):
+        self.base_url = mirror_url("https://cellphones.com.vn")
+        self.browser_pool = browser_pool
+        self.telemetry = telemetry or NullTelemetry()
         self.user_agents = [
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
         ]
-        self.session = requests.Session()
+        # One session per thread: later listing pages are fetched by page workers
+        self.sessions = ThreadSessions()
         self.spec_parser = SpecParser()
+        # Detail page specs (screen size) don't change between runs; the
+        # cache pays off when the instance is kept alive by the daemon
+        self.detail_cache = {}
 
     def _get_headers(self):
         """Generate random headers to avoid detection"""
@@ -70,11 +108,12 @@ class CellphonesScraper:
         for attempt in range(retry):
             try:
                 logger.info(f"Fetching: {url} (attempt {attempt + 1}/{retry})")
-                response = self.session.get(
-                    url,
-                    headers=self._get_headers(),
-                    timeout=15
-                )
+                with self.telemetry.span('navigation'):
+                    response = self.sessions.get().get(
+                        url,
+                        headers=self._get_headers(),
+                        timeout=15
+                    )
 
                 if response.status_code == 200:
                     return response.content
@@ -90,50 +129,60 @@ class CellphonesScraper:
 
         return None
 
+    def _render_page(self, page, url):
+        """Load a listing page in a Playwright page and return its product records"""
+        # Navigate to page
+        logger.info("  Navigating to page...")
+        with self.telemetry.span('navigation'):
+            page.goto(url, wait_until='domcontentloaded', timeout=60000)
+
+        with self.telemetry.span('readiness_wait'):
+            # Wait for products to load
+            logger.info("  Waiting for products to load...")
+            try:
+                page.wait_for_selector('.product-item, .product, .item-product', timeout=15000)
+            except:
+                logger.warning("  Product selector not found, continuing anyway...")
+
+            time.sleep(2)  # Extra wait for lazy-loaded content
+
+        # Extract the product cards in the page instead of shipping its HTML
+        with self.telemetry.span('html_transfer'):
+            return extract_products(page, 'cellphones')
+
     def scrape_page_with_playwright(self, url, retry=3):
         """Scrape JavaScript-heavy pages using Playwright"""
+        from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+
         for attempt in range(retry):
             try:
                 logger.info(f"Fetching with Playwright: {url} (attempt {attempt + 1}/{retry})")
-                with sync_playwright() as p:
-                    # Launch browser
-                    browser = p.chromium.launch(
-                        headless=True,
-                        args=['--disable-blink-features=AutomationControlled']
-                    )
-                    # Create context with realistic settings
-                    context = browser.new_context(
-                        user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                        viewport={'width': 1920, 'height': 1080},
-                        locale='vi-VN',
-                    )
-                    page = context.new_page()
-
-                    # Navigate to page
-                    logger.info("  Navigating to page...")
-                    page.goto(url, wait_until='domcontentloaded', timeout=60000)
 
-                    # Wait for products to load
-                    logger.info("  Waiting for products to load...")
-                    try:
-                        page.wait_for_selector('.product-item, .product, .item-product', timeout=15000)
-                    except:
-                        logger.warning("  Product selector not found, continuing anyway...")
+                # Reuse the warm browser when running inside the daemon
+                if self.browser_pool:
+                    with self.browser_pool.page(telemetry=self.telemetry) as page:
+                        return self._render_page(page, url)
 
-                    time.sleep(2)  # Extra wait for lazy-loaded content
-
-                    # Scroll to load lazy-loaded content
-                    logger.info("  Scrolling to load all products...")
-                    page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                    time.sleep(2)
-
-                    # Get HTML content
-                    content = page.content()
+                with sync_playwright() as p:
+                    with self.telemetry.span('browser_launch'):
+                        # Launch browser
+                        browser = p.chromium.launch(
+                            headless=True,
+                            args=['--disable-blink-features=AutomationControlled']
+                        )
+                        # Create context with realistic settings
+                        context = browser.new_context(
+                            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                            viewport={'width': 1920, 'height': 1080},
+                            locale='vi-VN',
+                        )
+                        page = context.new_page()
+                    records = self._render_page(page, url)
 
                     # Close browser
                     browser.close()
 
-                    return content.encode('utf-8')
+                    return records
 
             except PlaywrightTimeout as e:
                 logger.error(f"Timeout error: {e}")
@@ -148,13 +197,46 @@ class CellphonesScraper:
 
         return None
 
+    def _fetch_page_records(self, url):
+        """Records of one listing page fetched over HTTP; None if it failed"""
+        html = self.scrape_page(url, retry=1)
+        if not html:
+            return None
+        with self.telemetry.span('parse'):
+            return self._listing_records(html)
+
+    def _more_records(self, url, records, render='http'):
+        """Records from pages 2..N of a listing, fetched in parallel over HTTP
+        (rendered in the browser when page 1 was and HTTP shows no product cards)"""
+        more = fetch_more_pages(self._fetch_page_records, url, self.PAGE_PARAM, records,
+                                key=lambda record: record['href'] or record['name'],
+                                render=(lambda page: self.scrape_page_with_playwright(page, retry=1))
+                                if render == 'playwright' else None,
+                                telemetry=self.telemetry, shop='cellphones')
+        if more:
+            logger.info(f"  Found {len(more)} more product items on later pages")
+        return more
+
     def _get_product_details(self, product_url):
         """Fetch product detail page to get more specs."""
-        html = self.scrape_page(product_url)
-        if not html:
-            return {}
+        cache_key = canonicalize_url(product_url)
+        if cache_key in self.detail_cache:
+            return self.detail_cache[cache_key]
 
-        soup = BeautifulSoup(html, 'html.parser')
+        with self.telemetry.span('detail_fetch', url=product_url):
+            html = self.scrape_page(product_url)
+            if not html:
+                return {}
+
+            from bs4 import BeautifulSoup
+
+            details = self._parse_details(BeautifulSoup(html, 'html.parser'))
+
+        self.detail_cache[cache_key] = details
+        return details
+
+    def _parse_details(self, soup):
+        """Specs from a product page's spec table"""
         details = {}
 
         # Find screen size from spec table
@@ -168,26 +250,67 @@ class CellphonesScraper:
                     if 'kích thước màn hình' in spec_name:
                         details['screen_size'] = spec_value
                         break
+
         return details
 
-    def parse_products(self, html):
-        """Parse products from HTML"""
+    def _listing_records(self, html):
+        """Product card records from listing HTML (the utils/dom_extract shape)"""
+        # Products embedded as JSON-LD / hydration state take one JSON decode
+        # instead of a selector query per card; the selectors are the fallback
+        records = structured_records(html, min_count=max(card_count(html, self.CARD_CLASS), 1))
+        if records:
+            logger.info(f"Found {len(records)} products in embedded structured data")
+            return records
+
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html, 'html.parser')
+        records = []
+
+        for item in soup.select('.product-info'):
+            name_elem = item.select_one('.product__name h3')
+            price_elem = item.select_one('.product__price--show')
+            link_elem = item.select_one('a.product__link')
+            img_elem = item.select_one('.product__image img')
+            records.append({
+                'name': name_elem.get_text(strip=True) if name_elem else None,
+                'price_text': price_elem.get_text(strip=True) if price_elem else None,
+                'href': link_elem.get('href') if link_elem else None,
+                'image': img_elem.get('src') if img_elem else None,
+                'product_id': None,
+            })
+
+        return records
+
+    def parse_products(self, html, frontier=None):
+        """Parse products from HTML
+
+        Args:
+            html: Listing page HTML
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped before any detail fetch or spec parse
+        """
+        return self.products_from_records(self._listing_records(html), frontier=frontier)
+
+    def products_from_records(self, records, frontier=None):
+        """Build products from listing card records
+
+        Args:
+            records: Card records from _listing_records or parse_detail or,
+                for rendered pages, straight from the browser (utils/dom_extract)
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped before any detail fetch or spec parse
+        """
         products = []
+        logger.info(f"Found {len(records)} product items")
 
-        # Find all product items
-        product_items = soup.select('.product-info')
-        logger.info(f"Found {len(product_items)} product items")
-
-        for item in product_items:
+        for record in records:
             try:
                 # Extract product name
-                name_elem = item.select_one('.product__name h3')
-                if not name_elem:
+                raw_name = record['name']
+                if not raw_name:
                     continue
 
-                raw_name = name_elem.get_text(strip=True)
-
                 # Filter only MacBooks
                 if 'MacBook' not in raw_name:
                     continue
@@ -195,32 +318,33 @@ class CellphonesScraper:
                 model_name = self._parse_model_name(raw_name)
 
                 # Extract price
-                price_elem = item.select_one('.product__price--show')
-                price_text = price_elem.get_text(strip=True) if price_elem else None
+                price_text = record['price_text']
                 price_vnd = self._clean_price(price_text)
 
                 # Extract URL
-                link_elem = item.select_one('a.product__link')
-                url = link_elem.get('href') if link_elem else None
+                url = record['href']
                 if url and not url.startswith('http'):
                     url = self.base_url + url if url.startswith('/') else self.base_url + '/' + url
 
+                if frontier is not None and not frontier.add(url, shop='cellphones'):
+                    continue
+
                 # Get additional details from product page
                 details = {}
                 if url:
+                    cached = canonicalize_url(url) in self.detail_cache
                     details = self._get_product_details(url)
-                    time.sleep(1) # Polite delay
+                    if not cached:
+                        with self.telemetry.span('polite_delay'):
+                            time.sleep(1) # Polite delay
 
                 # Add screen size to model name if not present
                 if details.get('screen_size') and details['screen_size'].replace(' inch','') not in model_name:
                     model_name = f"{model_name} {details['screen_size'].replace(' inch','')}"
 
-                # Extract image
-                img_elem = item.select_one('.product__image img')
-                image_url = img_elem.get('src') if img_elem else None
-
                 # Parse specs using spec parser
-                parsed_specs = self.spec_parser.parse(model_name)
+                with self.telemetry.span('spec_parse'):
+                    parsed_specs = self.spec_parser.parse(model_name)
 
                 product = {
                     'model': model_name,
@@ -228,7 +352,7 @@ class CellphonesScraper:
                     'price_vnd': price_vnd,
                     'price_text': price_text,
                     'url': url,
-                    'image_url': image_url,
+                    'image_url': record['image'],
                     'shop': 'cellphones',
                     # Add parsed specs
                     'specs': {
@@ -244,6 +368,7 @@ class CellphonesScraper:
                         'year': parsed_specs.get('year'),
                     },
                     'product_id': parsed_specs.get('id'),
+                    'canonical_id': parsed_specs.get('id'),
                     'clean_name': parsed_specs.get('clean_name'),
                 }
 
@@ -256,48 +381,150 @@ class CellphonesScraper:
 
         return products
 
-    def scrape(self):
-        """Main scraping method"""
+    def fetch_detail(self, url):
+        """Fetch a product page's HTML (None if it could not be fetched)"""
+        return self.scrape_page(url)
+
+    def parse_detail(self, html, url, frontier=None):
+        """Parse the product on a product page found by sitemap discovery
+
+        Args:
+            html: Product page HTML
+            url: The page's URL
+            frontier: Optional URLFrontier shared with the rest of the run
+        """
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        # The page has the spec table the listing path would fetch it for
+        self.detail_cache[canonicalize_url(url)] = self._parse_details(soup)
+
+        record = record_for_url(structured_records(html), url)
+        if record:
+            return self.products_from_records([{**record, 'href': url}], frontier=frontier)
+
+        name_elem = soup.select_one('.box-product-name h1') or soup.select_one('h1')
+        price_elem = (soup.select_one('.sale-price') or soup.select_one('.product__price--show') or
+                      soup.select_one('.price'))
+        if not name_elem or not price_elem:
+            # Not a product page, or not on sale
+            logger.info(f"  No product name/price on {url}")
+            return []
+
+        image_elem = soup.select_one('meta[property="og:image"]')
+        return self.products_from_records([{
+            'name': name_elem.get_text(strip=True),
+            'price_text': price_elem.get_text(strip=True),
+            'href': url,
+            'image': image_elem.get('content') if image_elem else None,
+            'product_id': None,
+        }], frontier=frontier)
+
+    def scrape_detail(self, page_info, frontier=None):
+        """Fetch and parse one product page; None if the page could not be fetched"""
+        with self.telemetry.span('detail_fetch', shop='cellphones', url=page_info['url']):
+            html = self.fetch_detail(page_info['url'])
+        if not html:
+            return None
+
+        with self.telemetry.span('parse', shop='cellphones', url=page_info['url']):
+            products = self.parse_detail(html, page_info['url'], frontier=frontier)
+        for product in products:
+            product['source_page'] = page_info['url']
+        return products
+
+    def render_mode(self, page_info):
+        """How a listing page has to be fetched: 'http' or 'playwright'"""
+        # Use Playwright for M5 page (JavaScript-heavy, has anti-bot protection)
+        if 'M5' in page_info['name'] or 'macbook-pro-2025' in page_info['url']:
+            return 'playwright'
+        return 'http'
+
+    def fetch_listing(self, url, render='http'):
+        """Fetch a listing page with the given render mode
+
+        Returns:
+            HTML bytes, or a list of product records for rendered pages
+        """
+        if render == 'playwright':
+            logger.info("  Using Playwright for JavaScript-rendered page...")
+            return self.scrape_page_with_playwright(url)
+        return self.scrape_page(url)
+
+    def scrape_listing(self, page_info, render=None, frontier=None, offers=None):
+        """Fetch and parse one listing page; None if the page could not be fetched
+
+        Args:
+            page_info: {'name', 'url'} of the listing page
+            render: Render mode (defaults to render_mode(page_info))
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped
+            offers: Optional list that receives the page's (url, price) offers,
+                all of them, before the frontier skips any (utils/refresh_scheduler)
+        """
+        with self.telemetry.span('listing', shop='cellphones', url=page_info['url']):
+            render = render or self.render_mode(page_info)
+            listing = self.fetch_listing(page_info['url'], render)
+            if listing is None:
+                return None
+
+            with self.telemetry.span('parse'):
+                records = listing if isinstance(listing, list) else self._listing_records(listing)
+            records += self._more_records(page_info['url'], records, render)
+
+            if offers is not None:
+                offers.extend(listing_offers(records))
+
+            with self.telemetry.span('parse'):
+                products = self.products_from_records(records, frontier=frontier)
+            for product in products:
+                product['source_page'] = page_info['url']
+            return products
+
+    def scrape(self, pages=None, frontier=None):
+        """Main scraping method
+
+        Args:
+            pages: Optional subset of PAGES to scrape (defaults to all pages)
+            frontier: URLFrontier shared with the rest of the run (a private
+                one is used if omitted)
+        """
         logger.info("="*80)
         logger.info("Starting CellphoneS scraper...")
         logger.info("="*80)
 
         all_products = []
-
-        # All CellphoneS MacBook URLs
-        pages = [
-            {
-                'name': 'All Mac',
-                'url': 'https://cellphones.com.vn/laptop/mac.html'
-            },
-            {
-                'name': 'MacBook Pro 2025 (M5)',
-                'url': 'https://cellphones.com.vn/laptop/mac/macbook-pro/macbook-pro-2025.html'
-            },
-            {
-                'name': 'MacBook Air',
-                'url': 'https://cellphones.com.vn/laptop/mac/macbook-air.html'
-            },
-            {
-                'name': 'MacBook Pro',
-                'url': 'https://cellphones.com.vn/laptop/mac/macbook-pro.html'
-            },
-        ]
+        pages = pages or self.PAGES
+        frontier = frontier if frontier is not None else URLFrontier()
 
         seen_urls = set()  # Avoid duplicates
+        # Outcome of every page, with all the offers it listed (utils/refresh_scheduler)
+        page_results = []
 
         for page_info in pages:
             logger.info(f"\nScraping {page_info['name']}...")
 
-            # Use Playwright for M5 page (JavaScript-heavy, has anti-bot protection)
-            if 'M5' in page_info['name'] or 'macbook-pro-2025' in page_info['url']:
-                logger.info("  Using Playwright for JavaScript-rendered page...")
-                html = self.scrape_page_with_playwright(page_info['url'])
-            else:
-                html = self.scrape_page(page_info['url'])
+            offers = []
+
+            products = self.scrape_listing(page_info, frontier=frontier, offers=offers)
+
+            page_results.append({
+
+                'name': page_info['name'],
+
+                'url': page_info['url'],
+
+                # An overlapping page may be all duplicates: empty but scraped
+
+                'status': 'failed' if products is None else 'done',
+
+                'offers': offers,
+
+                'products': products or [],
+
+            })
 
-            if html:
-                products = self.parse_products(html)
+            if products is not None:
                 # Filter out duplicates based on product URL
                 for product in products:
                     product_url = product.get('url')
@@ -309,7 +536,8 @@ class CellphonesScraper:
                 logger.error(f"Failed to scrape {page_info['name']}")
 
             # Polite delay between pages
-            time.sleep(3)
+            with self.telemetry.span('polite_delay', shop='cellphones'):
+                time.sleep(3)
 
         logger.info("="*80)
         logger.info(f"CellphoneS scraping complete: {len(all_products)} total products")
@@ -320,6 +548,7 @@ class CellphonesScraper:
             'shop': 'cellphones',
             'products': all_products,
             'count': len(all_products),
+            'pages': page_results,
         }
 
 
@@ -4,8 +4,6 @@ FPT Shop Scraper - SeleniumBase UC (Undetected Chrome) mode
 Bypasses Cloudflare WAF protection
 """
 
-from seleniumbase import Driver
-from bs4 import BeautifulSoup
 import re
 import time
 import logging
@@ -15,15 +13,52 @@ from pathlib import Path
 # Add utils directory to path for spec parser
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from utils.spec_parser import SpecParser
+from utils.structured_data import card_count, record_for_url, structured_records
+from utils.shop_mirror import mirror_pages, mirror_url
+from utils.telemetry import NullTelemetry
+from utils.refresh_scheduler import listing_offers
+from utils.url_frontier import URLFrontier
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class FPTShopScraper:
-    def __init__(self):
-        self.base_url = "https://fptshop.com.vn"
+    # All FPT Shop MacBook URLs
+    PAGES = mirror_pages([
+        {
+            'name': 'Apple MacBook',
+            'url': 'https://fptshop.com.vn/may-tinh-xach-tay/apple-macbook'
+        },
+        {
+            'name': 'MacBook Air 13 inch',
+            'url': 'https://fptshop.com.vn/may-tinh-xach-tay/macbook-air?kich-thuoc-man-hinh=13-inch&sort=noi-bat'
+        },
+        {
+            'name': 'MacBook Air 15 inch',
+            'url': 'https://fptshop.com.vn/may-tinh-xach-tay/macbook-air?kich-thuoc-man-hinh=15-inch&sort=noi-bat'
+        },
+        {
+            'name': 'MacBook Pro 14 inch',
+            'url': 'https://fptshop.com.vn/may-tinh-xach-tay/macbook-pro?kich-thuoc-man-hinh=14-inch&sort=noi-bat'
+        },
+        {
+            'name': 'MacBook Pro 16 inch',
+            'url': 'https://fptshop.com.vn/may-tinh-xach-tay/macbook-pro?kich-thuoc-man-hinh=16-inch&sort=noi-bat'
+        },
+    ])
+    # Sitemaps listing every product page (see utils/sitemap)
+    SITEMAPS = [mirror_url('https://fptshop.com.vn/sitemap.xml')]
+    # How product pages found in the sitemaps are fetched
+    DETAIL_RENDER = 'uc'
+    # Class of a product card; sizes up embedded product data (utils/structured_data)
+    CARD_CLASS = 'cdt-product'
+
+    def __init__(self, browser_pool=None, telemetry=None):
+        self.base_url = mirror_url("https://fptshop.com.vn")
         self.spec_parser = SpecParser()
+        self.browser_pool = browser_pool
+        self.telemetry = telemetry or NullTelemetry()
 
     def _clean_price(self, price_text):
         """Extract numeric price from text"""
@@ -51,47 +86,59 @@ class FPTShopScraper:
             try:
                 logger.info(f"Launching UC Chrome for: {url} (attempt {attempt + 1}/{retry})")
 
-                # Launch undetected Chrome
-                driver = Driver(
-                    uc=True,  # Undetected Chrome mode
-                    headless=False,  # Headless has higher detection rate
-                    # Add these for better stealth
-                    chromium_arg="--disable-blink-features=AutomationControlled",
-                )
+                # Launch undetected Chrome (or reuse the daemon's warm one)
+                if self.browser_pool:
+                    driver = self.browser_pool.uc_driver(telemetry=self.telemetry)
+                else:
+                    from seleniumbase import Driver
 
-                logger.info("  Navigating to page...")
-                driver.get(url)
+                    with self.telemetry.span('browser_launch'):
+                        driver = Driver(
+                            uc=True,  # Undetected Chrome mode
+                            headless=False,  # Headless has higher detection rate
+                            # Add these for better stealth
+                            chromium_arg="--disable-blink-features=AutomationControlled",
+                        )
 
-                # Wait for potential Cloudflare challenge
-                logger.info("  Waiting for page to load (checking for Cloudflare)...")
-                time.sleep(10)
+                logger.info("  Navigating to page...")
+                with self.telemetry.span('navigation'):
+                    driver.get(url)
 
-                # Check if we got blocked
-                page_source = driver.page_source
-                if '403' in page_source or 'Forbidden' in driver.title:
-                    raise Exception('Got 403 Forbidden')
+                with self.telemetry.span('readiness_wait'):
+                    # Wait for potential Cloudflare challenge
+                    logger.info("  Waiting for page to load (checking for Cloudflare)...")
+                    time.sleep(10)
 
-                if 'Cloudflare' in driver.title or 'Just a moment' in page_source:
-                    logger.warning("  Cloudflare challenge detected, waiting longer...")
-                    time.sleep(15)
+                    # Check if we got blocked
                     page_source = driver.page_source
+                    if '403' in page_source or 'Forbidden' in driver.title:
+                        raise Exception('Got 403 Forbidden')
+
+                    if 'Cloudflare' in driver.title or 'Just a moment' in page_source:
+                        logger.warning("  Cloudflare challenge detected, waiting longer...")
+                        time.sleep(15)
+                        page_source = driver.page_source
 
-                # Scroll to load products
-                logger.info("  Scrolling to load all products...")
-                driver.execute_script('window.scrollTo(0, document.body.scrollHeight)')
-                time.sleep(3)
+                    # Scroll to load products
+                    logger.info("  Scrolling to load all products...")
+                    driver.execute_script('window.scrollTo(0, document.body.scrollHeight)')
+                    time.sleep(3)
 
                 # Get final HTML
-                html = driver.page_source
+                with self.telemetry.span('html_transfer'):
+                    html = driver.page_source
 
-                # Close driver
-                driver.quit()
+                # Close driver (pooled drivers stay open for the next page)
+                if not self.browser_pool:
+                    driver.quit()
 
                 return html
 
             except Exception as e:
                 logger.error(f"Error with UC Chrome: {e}")
-                if driver:
+                if self.browser_pool:
+                    self.browser_pool.discard_uc_driver()
+                elif driver:
                     try:
                         driver.quit()
                     except:
@@ -104,10 +151,18 @@ class FPTShopScraper:
 
         return None
 
-    def parse_products(self, html):
-        """Parse products from HTML"""
+    def _listing_records(self, html):
+        """Product card records from listing HTML (the utils/dom_extract shape)"""
+        # Products embedded as JSON-LD / hydration state take one JSON decode
+        # instead of a selector query per card; the selectors are the fallback
+        records = structured_records(html, min_count=max(card_count(html, self.CARD_CLASS), 1))
+        if records:
+            logger.info(f"Found {len(records)} products in embedded structured data")
+            return records
+
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html, 'html.parser')
-        products = []
 
         # Try multiple selectors for FPT Shop
         selectors = [
@@ -126,21 +181,54 @@ class FPTShopScraper:
 
         if not product_items:
             logger.warning("No product items found with any selector")
-            return []
 
+        records = []
         for item in product_items:
+            name_elem = (item.select_one('h3') or
+                        item.select_one('.product-name') or
+                        item.select_one('[data-title]') or
+                        item.find('a', {'title': True}))
+            price_elem = (item.select_one('.price') or
+                         item.select_one('.product-price') or
+                         item.select_one('[data-price]'))
+            link_elem = item.select_one('a')
+            records.append({
+                'name': (name_elem.get('title') or name_elem.get_text(strip=True)) if name_elem else None,
+                'price_text': (price_elem.get('data-price') or price_elem.get_text(strip=True)) if price_elem else None,
+                'href': link_elem.get('href') if link_elem else None,
+                'image': None,
+                'product_id': None,
+            })
+
+        return records
+
+    def parse_products(self, html, frontier=None):
+        """Parse products from HTML
+
+        Args:
+            html: Listing page HTML
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped before any detail fetch or spec parse
+        """
+        return self.products_from_records(self._listing_records(html), frontier=frontier)
+
+    def products_from_records(self, records, frontier=None):
+        """Build products from listing card records
+
+        Args:
+            records: Card records from _listing_records or parse_detail
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped before the spec parse
+        """
+        products = []
+
+        for record in records:
             try:
                 # Extract product name
-                name_elem = (item.select_one('h3') or
-                            item.select_one('.product-name') or
-                            item.select_one('[data-title]') or
-                            item.find('a', {'title': True}))
-
-                if not name_elem:
+                raw_name = record['name']
+                if not raw_name:
                     continue
 
-                raw_name = name_elem.get('title') or name_elem.get_text(strip=True)
-
                 # Filter only MacBooks
                 if 'MacBook' not in raw_name:
                     continue
@@ -148,24 +236,20 @@ class FPTShopScraper:
                 model_name = self._parse_model_name(raw_name)
 
                 # Extract price
-                price_elem = (item.select_one('.price') or
-                             item.select_one('.product-price') or
-                             item.select_one('[data-price]'))
-
-                price_text = None
-                if price_elem:
-                    price_text = price_elem.get('data-price') or price_elem.get_text(strip=True)
-
+                price_text = record['price_text']
                 price_vnd = self._clean_price(price_text)
 
                 # Extract URL
-                link_elem = item.select_one('a')
-                url = link_elem.get('href') if link_elem else None
+                url = record['href']
                 if url and not url.startswith('http'):
                     url = self.base_url + url if url.startswith('/') else self.base_url + '/' + url
 
+                if frontier is not None and not frontier.add(url, shop='fptshop'):
+                    continue
+
                 # Parse specs using spec parser
-                parsed_specs = self.spec_parser.parse(raw_name)
+                with self.telemetry.span('spec_parse'):
+                    parsed_specs = self.spec_parser.parse(raw_name)
 
                 product = {
                     'model': model_name,
@@ -188,6 +272,7 @@ class FPTShopScraper:
                         'year': parsed_specs.get('year'),
                     },
                     'product_id': parsed_specs.get('id'),
+                    'canonical_id': parsed_specs.get('id'),
                     'clean_name': parsed_specs.get('clean_name'),
                 }
 
@@ -200,30 +285,123 @@ class FPTShopScraper:
 
         return products
 
-    def scrape(self):
-        """Main scraping method"""
+    def fetch_detail(self, url):
+        """Fetch a product page's HTML (None if it could not be fetched)"""
+        return self.scrape_with_uc(url)
+
+    def parse_detail(self, html, url, frontier=None):
+        """Parse the product on a product page found by sitemap discovery
+
+        Args:
+            html: Product page HTML
+            url: The page's URL
+            frontier: Optional URLFrontier shared with the rest of the run
+        """
+        # The product's JSON-LD, when the page has it, spares the HTML parse
+        record = record_for_url(structured_records(html), url)
+        if record:
+            return self.products_from_records([{**record, 'href': url}], frontier=frontier)
+
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        name_elem = soup.select_one('h1')
+        price_elem = (soup.select_one('.st-price-main') or soup.select_one('.price') or
+                      soup.select_one('[data-price]'))
+        if not name_elem or not price_elem:
+            # Not a product page, or not on sale
+            logger.info(f"  No product name/price on {url}")
+            return []
+
+        image_elem = soup.select_one('meta[property="og:image"]')
+        return self.products_from_records([{
+            'name': name_elem.get_text(strip=True),
+            'price_text': price_elem.get('data-price') or price_elem.get_text(strip=True),
+            'href': url,
+            'image': image_elem.get('content') if image_elem else None,
+            'product_id': None,
+        }], frontier=frontier)
+
+    def scrape_detail(self, page_info, frontier=None):
+        """Fetch and parse one product page; None if the page could not be fetched"""
+        with self.telemetry.span('detail_fetch', shop='fptshop', url=page_info['url']):
+            html = self.fetch_detail(page_info['url'])
+        if not html:
+            return None
+
+        with self.telemetry.span('parse', shop='fptshop', url=page_info['url']):
+            products = self.parse_detail(html, page_info['url'], frontier=frontier)
+        for product in products:
+            product['source_page'] = page_info['url']
+        return products
+
+    def render_mode(self, page_info):
+        """How a listing page has to be fetched (every page needs SeleniumBase UC Chrome)"""
+        return 'uc'
+
+    def fetch_listing(self, url, render='uc'):
+        """Fetch a listing page's HTML with the given render mode"""
+        return self.scrape_with_uc(url)
+
+    def scrape_listing(self, page_info, render=None, frontier=None, offers=None):
+        """Fetch and parse one listing page; None if the page could not be fetched
+
+        Args:
+            page_info: {'name', 'url'} of the listing page
+            render: Render mode (defaults to render_mode(page_info))
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped
+            offers: Optional list that receives the page's (url, price) offers,
+                all of them, before the frontier skips any (utils/refresh_scheduler)
+        """
+        with self.telemetry.span('listing', shop='fptshop', url=page_info['url']):
+            html = self.fetch_listing(page_info['url'], render or self.render_mode(page_info))
+            if not html:
+                return None
+
+            with self.telemetry.span('parse'):
+                records = self._listing_records(html)
+                if offers is not None:
+                    offers.extend(listing_offers(records))
+                products = self.products_from_records(records, frontier=frontier)
+            for product in products:
+                product['source_page'] = page_info['url']
+            return products
+
+    def scrape(self, pages=None, frontier=None):
+        """Main scraping method
+
+        Args:
+            pages: Optional subset of PAGES to scrape (defaults to all pages)
+            frontier: URLFrontier shared with the rest of the run (a private
+                one is used if omitted)
+        """
         logger.info("="*80)
         logger.info("Starting FPT Shop scraper with UC Chrome...")
         logger.info("="*80)
 
-        # All FPT Shop MacBook URLs
-        urls = [
-            "https://fptshop.com.vn/may-tinh-xach-tay/apple-macbook",
-            "https://fptshop.com.vn/may-tinh-xach-tay/macbook-air?kich-thuoc-man-hinh=13-inch&sort=noi-bat",
-            "https://fptshop.com.vn/may-tinh-xach-tay/macbook-air?kich-thuoc-man-hinh=15-inch&sort=noi-bat",
-            "https://fptshop.com.vn/may-tinh-xach-tay/macbook-pro?kich-thuoc-man-hinh=14-inch&sort=noi-bat",
-            "https://fptshop.com.vn/may-tinh-xach-tay/macbook-pro?kich-thuoc-man-hinh=16-inch&sort=noi-bat",
-        ]
-
         all_products = []
+        pages = pages or self.PAGES
+        frontier = frontier if frontier is not None else URLFrontier()
         seen_urls = set()  # Avoid duplicates
+        # Outcome of every page, with all the offers it listed (utils/refresh_scheduler)
+        page_results = []
 
-        for url in urls:
+        for page_info in pages:
+            url = page_info['url']
             logger.info(f"\nScraping: {url}")
-            html = self.scrape_with_uc(url)
-
-            if html:
-                products = self.parse_products(html)
+            offers = []
+            products = self.scrape_listing(page_info, frontier=frontier, offers=offers)
+            page_results.append({
+                'name': page_info['name'],
+                'url': page_info['url'],
+                # An overlapping page may be all duplicates: empty but scraped
+                'status': 'failed' if products is None else 'done',
+                'offers': offers,
+                'products': products or [],
+            })
+
+            if products is not None:
                 # Filter out duplicates based on product URL
                 for product in products:
                     product_url = product.get('url')
@@ -235,7 +413,8 @@ class FPTShopScraper:
                 logger.warning(f"Failed to scrape {url}")
 
             # Polite delay between pages
-            time.sleep(10)
+            with self.telemetry.span('polite_delay', shop='fptshop'):
+                time.sleep(10)
 
         logger.info("="*80)
         logger.info(f"FPT Shop scraping complete: {len(all_products)} total unique products")
@@ -247,6 +426,7 @@ class FPTShopScraper:
                 'shop': 'fptshop',
                 'products': all_products,
                 'count': len(all_products),
+                'pages': page_results,
             }
         else:
             logger.error("Failed to scrape FPT Shop - Cloudflare block or no products found")
@@ -256,6 +436,7 @@ class FPTShopScraper:
                 'error': 'Cloudflare block or timeout',
                 'products': [],
                 'count': 0,
+                'pages': page_results,
             }
 
 
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Shop Registry - Lazy lookup of scraper classes by shop name
+
+Entry points used to import every scraper module up front, which pulled in
+Playwright, SeleniumBase and bs4 even for `--help` or a single HTTP-only
+shop. The registry only records where each scraper lives; the module (and
+the scraper's browser backend, which it imports on first use) is loaded
+when the shop is actually run.
+"""
+
+import importlib
+
+# Shop name -> where its scraper lives and how update_prices.py treats it
+SHOPS = {
+    'cellphones': {
+        'module': 'scrapers.cellphones_scraper',
+        'class': 'CellphonesScraper',
+        'backend': 'http+playwright',
+        'default': True,
+        'enabled': True,
+    },
+    'shopdunk': {
+        'module': 'scrapers.shopdunk_scraper',
+        'class': 'ShopDunkScraper',
+        'backend': 'playwright',
+        'default': True,
+        'enabled': True,
+    },
+    'fptshop': {
+        'module': 'scrapers.fptshop_scraper',
+        'class': 'FPTShopScraper',
+        'backend': 'seleniumbase',
+        'default': False,
+        'enabled': True,
+        'warning': 'FPTShop usually gets blocked by Cloudflare',
+    },
+    'topzone': {
+        'module': 'scrapers.topzone_scraper',
+        'class': 'TopZoneScraper',
+        'backend': 'seleniumbase',
+        'default': False,
+        'enabled': False,  # Disabled by default due to timeouts
+        'warning': 'TopZone usually times out',
+    },
+}
+
+_loaded = {}
+
+
+def shop_names(include_all=False):
+    """Shops to run: the reliable defaults, plus the enabled extras with include_all"""
+    return [
+        name for name, info in SHOPS.items()
+        if info['default'] or (include_all and info['enabled'])
+    ]
+
+
+def get_scraper_class(shop_name):
+    """Import and return the scraper class for a shop (cached after first use)"""
+    if shop_name not in _loaded:
+        if shop_name not in SHOPS:
+            raise KeyError(f"Unknown shop: {shop_name} (known: {', '.join(SHOPS)})")
+        info = SHOPS[shop_name]
+        module = importlib.import_module(info['module'])
+        _loaded[shop_name] = getattr(module, info['class'])
+    return _loaded[shop_name]
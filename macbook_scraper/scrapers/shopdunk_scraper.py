@@ -4,8 +4,6 @@ ShopDunk Scraper - Playwright-based scraper
 Handles JavaScript-rendered content
 """
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from bs4 import BeautifulSoup
 import re
 import time
 import logging
@@ -14,16 +12,67 @@ from pathlib import Path
 
 # Add utils directory to path for spec parser
 sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.dom_extract import extract_products
+from utils.pagination import ThreadSessions, fetch_more_pages
 from utils.spec_parser import SpecParser
+from utils.structured_data import card_count, record_for_url, structured_records
+from utils.shop_mirror import mirror_pages, mirror_url
+from utils.telemetry import NullTelemetry
+from utils.refresh_scheduler import listing_offers
+from utils.url_frontier import URLFrontier
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class ShopDunkScraper:
-    def __init__(self):
-        self.base_url = "https://shopdunk.com"
+    # All ShopDunk MacBook URLs
+    PAGES = mirror_pages([
+        {
+            'name': 'Mac',
+            'url': 'https://shopdunk.com/mac'
+        },
+        {
+            'name': 'MacBook Pro M5',
+            'url': 'https://shopdunk.com/macbook-pro-m5'
+        },
+        {
+            'name': 'MacBook Pro M4',
+            'url': 'https://shopdunk.com/macbook-pro-m4'
+        },
+        {
+            'name': 'MacBook Air M4',
+            'url': 'https://shopdunk.com/macbook-air-m4'
+        },
+        {
+            'name': 'MacBook Air',
+            'url': 'https://shopdunk.com/macbook-air'
+        },
+        {
+            'name': 'MacBook Pro',
+            'url': 'https://shopdunk.com/macbook-pro-2'
+        },
+    ])
+    # Query parameter of a listing's numbered pages (see utils/pagination)
+    PAGE_PARAM = 'pagenumber'
+    # Sitemaps listing every product page (see utils/sitemap)
+    SITEMAPS = [mirror_url('https://shopdunk.com/sitemap.xml')]
+    # How product pages found in the sitemaps are fetched
+    DETAIL_RENDER = 'http'
+    # Class of a product card; sizes up embedded product data (utils/structured_data)
+    CARD_CLASS = 'product-item'
+
+    def __init__(self, browser_pool=None, telemetry=None):
+        self.base_url = mirror_url("https://shopdunk.com")
+        self.browser_pool = browser_pool
+        self.telemetry = telemetry or NullTelemetry()
         self.spec_parser = SpecParser()
+        # Pages after the first are tried over plain HTTP (one session per
+        # page worker thread) before falling back to the browser
+        self.sessions = ThreadSessions({
+            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept-Language': 'vi-VN,vi;q=0.9,en;q=0.5',
+        })
 
     def _clean_price(self, price_text):
         """Extract numeric price from text"""
@@ -46,49 +95,58 @@ class ShopDunkScraper:
 
         return name
 
+    def _render_page(self, page, url):
+        """Load a listing page in a Playwright page and return its product records"""
+        # Navigate to page
+        logger.info("  Navigating to page...")
+        with self.telemetry.span('navigation'):
+            page.goto(url, wait_until='domcontentloaded', timeout=60000)
+
+        with self.telemetry.span('readiness_wait'):
+            # Wait for products to load
+            logger.info("  Waiting for products to load...")
+            page.wait_for_selector('.product-item', timeout=30000) # Wait for the product grid
+            time.sleep(2) # Extra wait for any lazy-loaded images or prices
+
+        # Extract the product cards in the page instead of shipping its HTML
+        with self.telemetry.span('html_transfer'):
+            return extract_products(page, 'shopdunk')
+
     def scrape_with_playwright(self, url, retry=3):
         """Scrape using Playwright"""
+        from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
+
         for attempt in range(retry):
             try:
                 logger.info(f"Launching browser for: {url} (attempt {attempt + 1}/{retry})")
 
+                # Reuse the warm browser when running inside the daemon
+                if self.browser_pool:
+                    with self.browser_pool.page(telemetry=self.telemetry) as page:
+                        return self._render_page(page, url)
+
                 with sync_playwright() as p:
-                    # Launch browser
-                    browser = p.chromium.launch(
-                        headless=True,
-                        args=['--disable-blink-features=AutomationControlled']
-                    )
-
-                    # Create context with realistic settings
-                    context = browser.new_context(
-                        user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                        viewport={'width': 1920, 'height': 1080},
-                        locale='vi-VN',
-                    )
-
-                    page = context.new_page()
-
-                    # Navigate to page
-                    logger.info("  Navigating to page...")
-                    page.goto(url, wait_until='domcontentloaded', timeout=60000)
-
-                    # Wait for products to load
-                    logger.info("  Waiting for products to load...")
-                    page.wait_for_selector('.product-item', timeout=30000) # Wait for the product grid
-                    time.sleep(2) # Extra wait for any lazy-loaded images or prices
-
-                    # Scroll to load lazy-loaded content
-                    logger.info("  Scrolling to load all products...")
-                    page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                    time.sleep(3)
-
-                    # Get HTML content
-                    content = page.content()
+                    with self.telemetry.span('browser_launch'):
+                        # Launch browser
+                        browser = p.chromium.launch(
+                            headless=True,
+                            args=['--disable-blink-features=AutomationControlled']
+                        )
+
+                        # Create context with realistic settings
+                        context = browser.new_context(
+                            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                            viewport={'width': 1920, 'height': 1080},
+                            locale='vi-VN',
+                        )
+
+                        page = context.new_page()
+                    records = self._render_page(page, url)
 
                     # Close browser
                     browser.close()
 
-                    return content
+                    return records
 
             except PlaywrightTimeout as e:
                 logger.error(f"Timeout error: {e}")
@@ -104,24 +162,97 @@ class ShopDunkScraper:
 
         return None
 
-    def parse_products(self, html):
-        """Parse products from HTML"""
+    def _fetch_html(self, url):
+        """Fetch a page over plain HTTP; None if it failed"""
+        try:
+            with self.telemetry.span('navigation'):
+                response = self.sessions.get().get(url, timeout=15)
+        except Exception as e:
+            logger.warning(f"  Error fetching {url}: {e}")
+            return None
+
+        if response.status_code != 200:
+            logger.warning(f"  HTTP {response.status_code} for {url}")
+            return None
+        return response.content
+
+    def _fetch_page_records(self, url):
+        """Records of one listing page fetched over HTTP; None if it failed"""
+        html = self._fetch_html(url)
+        if not html:
+            return None
+        with self.telemetry.span('parse'):
+            return self._listing_records(html)
+
+    def _more_records(self, url, records):
+        """Records from pages 2..N of a listing, fetched in parallel over HTTP
+        (rendered in the browser when HTTP shows no product cards)"""
+        more = fetch_more_pages(self._fetch_page_records, url, self.PAGE_PARAM, records,
+                                key=lambda record: record['href'] or record['name'],
+                                render=lambda page: self.scrape_with_playwright(page, retry=1),
+                                telemetry=self.telemetry, shop='shopdunk')
+        if more:
+            logger.info(f"  Found {len(more)} more product items on later pages")
+        return more
+
+    def _listing_records(self, html):
+        """Product card records from listing HTML (the utils/dom_extract shape)"""
+        # Products embedded as JSON-LD / hydration state take one JSON decode
+        # instead of a selector query per card; the selectors are the fallback
+        records = structured_records(html, min_count=max(card_count(html, self.CARD_CLASS), 1))
+        if records:
+            logger.info(f"Found {len(records)} products in embedded structured data")
+            return records
+
+        from bs4 import BeautifulSoup
+
         soup = BeautifulSoup(html, 'html.parser')
+        records = []
+
+        for item in soup.select('.product-item'):
+            name_elem = item.select_one('h3') or item.select_one('.product-name')
+            price_elem = item.select_one('.actual-price')
+            link_elem = item.select_one('a')
+            img_elem = item.select_one('img')
+            records.append({
+                'name': name_elem.get_text(strip=True) if name_elem else None,
+                'price_text': price_elem.get_text(strip=True) if price_elem else None,
+                'href': link_elem.get('href') if link_elem else None,
+                'image': img_elem.get('src') or img_elem.get('data-src') if img_elem else None,
+                'product_id': item.get('data-productid'),
+            })
+
+        return records
+
+    def parse_products(self, html, frontier=None):
+        """Parse products from HTML
+
+        Args:
+            html: Listing page HTML
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped before any detail fetch or spec parse
+        """
+        return self.products_from_records(self._listing_records(html), frontier=frontier)
+
+    def products_from_records(self, records, frontier=None):
+        """Build products from listing card records
+
+        Args:
+            records: Card records from _listing_records or parse_detail or,
+                for rendered pages, straight from the browser (utils/dom_extract)
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped before the spec parse
+        """
         products = []
+        logger.info(f"Found {len(records)} product items")
 
-        # Find all product items
-        product_items = soup.select('.product-item')
-        logger.info(f"Found {len(product_items)} product items")
-
-        for item in product_items:
+        for record in records:
             try:
                 # Extract product name
-                name_elem = item.select_one('h3') or item.select_one('.product-name')
-                if not name_elem:
+                raw_name = record['name']
+                if not raw_name:
                     continue
 
-                raw_name = name_elem.get_text(strip=True)
-
                 # Filter only MacBooks
                 if 'MacBook' not in raw_name:
                     continue
@@ -129,25 +260,20 @@ class ShopDunkScraper:
                 model_name = self._parse_model_name(raw_name)
 
                 # Extract price - ShopDunk uses .actual-price for the final price
-                price_elem = item.select_one('.actual-price')
-                price_text = price_elem.get_text(strip=True) if price_elem else None
+                price_text = record['price_text']
                 price_vnd = self._clean_price(price_text)
 
                 # Extract URL
-                link_elem = item.select_one('a')
-                url = link_elem.get('href') if link_elem else None
+                url = record['href']
                 if url and not url.startswith('http'):
                     url = self.base_url + url if url.startswith('/') else self.base_url + '/' + url
 
-                # Extract product ID
-                product_id = item.get('data-productid')
-
-                # Extract image
-                img_elem = item.select_one('img')
-                image_url = img_elem.get('src') or img_elem.get('data-src') if img_elem else None
+                if frontier is not None and not frontier.add(url, shop='shopdunk'):
+                    continue
 
                 # Parse specs using spec parser
-                parsed_specs = self.spec_parser.parse(raw_name)
+                with self.telemetry.span('spec_parse'):
+                    parsed_specs = self.spec_parser.parse(raw_name)
 
                 product = {
                     'model': model_name,
@@ -155,8 +281,8 @@ class ShopDunkScraper:
                     'price_vnd': price_vnd,
                     'price_text': price_text,
                     'url': url,
-                    'product_id': product_id,
-                    'image_url': image_url,
+                    'product_id': record['product_id'],
+                    'image_url': record['image'],
                     'shop': 'shopdunk',
                     # Add parsed specs
                     'specs': {
@@ -171,6 +297,7 @@ class ShopDunkScraper:
                         'storage_display': parsed_specs.get('storage_display'),
                         'year': parsed_specs.get('year'),
                     },
+                    'canonical_id': parsed_specs.get('id'),
                     'clean_name': parsed_specs.get('clean_name'),
                 }
 
@@ -183,31 +310,125 @@ class ShopDunkScraper:
 
         return products
 
-    def scrape(self):
-        """Main scraping method"""
+    def fetch_detail(self, url):
+        """Fetch a product page's HTML (None if it could not be fetched)"""
+        return self._fetch_html(url)
+
+    def parse_detail(self, html, url, frontier=None):
+        """Parse the product on a product page found by sitemap discovery
+
+        Args:
+            html: Product page HTML
+            url: The page's URL
+            frontier: Optional URLFrontier shared with the rest of the run
+        """
+        # The product's JSON-LD, when the page has it, spares the HTML parse
+        record = record_for_url(structured_records(html), url)
+        if record:
+            return self.products_from_records([{**record, 'href': url}], frontier=frontier)
+
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        name_elem = soup.select_one('.product-name h1') or soup.select_one('h1')
+        price_elem = (soup.select_one('.actual-price') or soup.select_one('.product-price') or
+                      soup.select_one('.price'))
+        if not name_elem or not price_elem:
+            # Not a product page, or not on sale
+            logger.info(f"  No product name/price on {url}")
+            return []
+
+        image_elem = soup.select_one('meta[property="og:image"]')
+        id_elem = soup.select_one('[data-productid]')
+        return self.products_from_records([{
+            'name': name_elem.get_text(strip=True),
+            'price_text': price_elem.get_text(strip=True),
+            'href': url,
+            'image': image_elem.get('content') if image_elem else None,
+            'product_id': id_elem.get('data-productid') if id_elem else None,
+        }], frontier=frontier)
+
+    def scrape_detail(self, page_info, frontier=None):
+        """Fetch and parse one product page; None if the page could not be fetched"""
+        with self.telemetry.span('detail_fetch', shop='shopdunk', url=page_info['url']):
+            html = self.fetch_detail(page_info['url'])
+        if not html:
+            return None
+
+        with self.telemetry.span('parse', shop='shopdunk', url=page_info['url']):
+            products = self.parse_detail(html, page_info['url'], frontier=frontier)
+        for product in products:
+            product['source_page'] = page_info['url']
+        return products
+
+    def render_mode(self, page_info):
+        """How a listing page has to be fetched (every page needs Playwright)"""
+        return 'playwright'
+
+    def fetch_listing(self, url, render='playwright'):
+        """Fetch a listing page's product records (rendered in the browser)"""
+        return self.scrape_with_playwright(url)
+
+    def scrape_listing(self, page_info, render=None, frontier=None, offers=None):
+        """Fetch and parse one listing page; None if the page could not be fetched
+
+        Args:
+            page_info: {'name', 'url'} of the listing page
+            render: Render mode (defaults to render_mode(page_info))
+            frontier: Optional URLFrontier; products it has already seen this
+                run are skipped
+            offers: Optional list that receives the page's (url, price) offers,
+                all of them, before the frontier skips any (utils/refresh_scheduler)
+        """
+        with self.telemetry.span('listing', shop='shopdunk', url=page_info['url']):
+            records = self.fetch_listing(page_info['url'], render or self.render_mode(page_info))
+            if records is None:
+                return None
+            records += self._more_records(page_info['url'], records)
+
+            if offers is not None:
+                offers.extend(listing_offers(records))
+
+            with self.telemetry.span('parse'):
+                products = self.products_from_records(records, frontier=frontier)
+            for product in products:
+                product['source_page'] = page_info['url']
+            return products
+
+    def scrape(self, pages=None, frontier=None):
+        """Main scraping method
+
+        Args:
+            pages: Optional subset of PAGES to scrape (defaults to all pages)
+            frontier: URLFrontier shared with the rest of the run (a private
+                one is used if omitted)
+        """
         logger.info("="*80)
         logger.info("Starting ShopDunk scraper...")
         logger.info("="*80)
 
-        # All ShopDunk MacBook URLs
-        urls = [
-            "https://shopdunk.com/mac",
-            "https://shopdunk.com/macbook-pro-m5",
-            "https://shopdunk.com/macbook-pro-m4",
-            "https://shopdunk.com/macbook-air-m4",
-            "https://shopdunk.com/macbook-air",
-            "https://shopdunk.com/macbook-pro-2",
-        ]
-
         all_products = []
+        pages = pages or self.PAGES
+        frontier = frontier if frontier is not None else URLFrontier()
         seen_urls = set()  # Avoid duplicates
+        # Outcome of every page, with all the offers it listed (utils/refresh_scheduler)
+        page_results = []
 
-        for url in urls:
+        for page_info in pages:
+            url = page_info['url']
             logger.info(f"\nScraping: {url}")
-            html = self.scrape_with_playwright(url)
-
-            if html:
-                products = self.parse_products(html)
+            offers = []
+            products = self.scrape_listing(page_info, frontier=frontier, offers=offers)
+            page_results.append({
+                'name': page_info['name'],
+                'url': page_info['url'],
+                # An overlapping page may be all duplicates: empty but scraped
+                'status': 'failed' if products is None else 'done',
+                'offers': offers,
+                'products': products or [],
+            })
+
+            if products is not None:
                 # Filter out duplicates based on product URL
                 for product in products:
                     if product['url'] and product['url'] not in seen_urls:
@@ -218,7 +439,8 @@ class ShopDunkScraper:
                 logger.warning(f"Failed to scrape {url}")
 
             # Polite delay between pages
-            time.sleep(5)
+            with self.telemetry.span('polite_delay', shop='shopdunk'):
+                time.sleep(5)
 
         logger.info("="*80)
         logger.info(f"ShopDunk scraping complete: {len(all_products)} total unique products")
@@ -230,6 +452,7 @@ class ShopDunkScraper:
                 'shop': 'shopdunk',
                 'products': all_products,
                 'count': len(all_products),
+                'pages': page_results,
             }
         else:
             logger.error("Failed to scrape ShopDunk - no products found")
@@ -239,6 +462,7 @@ class ShopDunkScraper:
                 'error': 'No products found',
                 'products': [],
                 'count': 0,
+                'pages': page_results,
             }
 
 
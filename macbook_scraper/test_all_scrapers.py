@@ -5,7 +5,7 @@ Test all scrapers with updated URLs and generate comprehensive report
 import json
 import sys
 from datetime import datetime
-from scrapers.cellphones_scraper import CellphonesScraper
+from scrapers.registry import get_scraper_class
 
 def test_cellphones():
     """Test CellphoneS scraper"""
@@ -14,7 +14,7 @@ def test_cellphones():
     print("="*80)
 
     try:
-        scraper = CellphonesScraper()
+        scraper = get_scraper_class('cellphones')()
         result = scraper.scrape()
         return result
     except Exception as e:
@@ -6,33 +6,50 @@ Runs scrapers and updates the latest_products.json file for the Next.js API
 import json
 import sys
 import os
+import queue
+import signal
+import socket
+import subprocess
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
 # Add scrapers directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from scrapers.cellphones_scraper import CellphonesScraper
-from scrapers.shopdunk_scraper import ShopDunkScraper
+# Scraper modules (and their browser backends) are resolved lazily by shop name
+from scrapers.registry import SHOPS, shop_names, get_scraper_class
+from utils.refresh_scheduler import RefreshScheduler
+from utils.sitemap import SitemapDiscovery
+from utils.browser_pool import BrowserPool
+from utils.work_queue import TaskQueue
+from utils.telemetry import RunTelemetry
+from utils.url_frontier import URLFrontier, canonicalize_url
+from utils.output_writer import publish_json
+from utils.snapshot_archive import SnapshotArchive
+from utils.comparison_index import build_comparison_index
 
-# Optional: Try to import FPT and TopZone (may fail due to blocks)
-try:
-    from scrapers.fptshop_scraper import FPTShopScraper
-    FPTSHOP_AVAILABLE = True
-except:
-    FPTSHOP_AVAILABLE = False
 
-try:
-    from scrapers.topzone_scraper import TopZoneScraper
-    TOPZONE_AVAILABLE = False  # Disable by default due to timeouts
-except:
-    TOPZONE_AVAILABLE = False
+DEFAULT_SOCKET = Path(__file__).parent / "output" / "update_daemon.sock"
+DEFAULT_OUTPUT_DIR = Path(__file__).parent / "output"
+METRICS_FILE = DEFAULT_OUTPUT_DIR / "metrics" / "vietmac_scrape.prom"
 
 
 class PriceUpdater:
-    def __init__(self):
-        self.output_dir = Path(__file__).parent / "output"
-        self.output_dir.mkdir(exist_ok=True)
+    def __init__(self, browser_pool=None, scraper_cache=None, output_dir=None):
+        self.output_dir = Path(output_dir) if output_dir else DEFAULT_OUTPUT_DIR
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.metrics_file = self.output_dir / METRICS_FILE.relative_to(DEFAULT_OUTPUT_DIR)
+
+        # Shared across runs by the daemon so browsers, HTTP sessions and
+        # scraper caches stay warm
+        self.browser_pool = browser_pool
+        self.scraper_cache = scraper_cache
+        self.telemetry = RunTelemetry()
+        # One frontier per run: a product URL is fetched and parsed once,
+        # whichever page or shop lists it first
+        self.frontier = URLFrontier()
 
         self.results = {
             'timestamp': datetime.now().isoformat(),
@@ -44,38 +61,61 @@ class PriceUpdater:
             }
         }
 
-    def run_scraper(self, scraper_class, shop_name):
-        """Run a scraper and collect results"""
+    def get_scraper(self, scraper_class):
+        """Create a scraper, or reuse the warm instance kept by the daemon"""
+        if self.scraper_cache is None:
+            return scraper_class(browser_pool=self.browser_pool, telemetry=self.telemetry)
+        if scraper_class not in self.scraper_cache:
+            self.scraper_cache[scraper_class] = scraper_class(browser_pool=self.browser_pool)
+        scraper = self.scraper_cache[scraper_class]
+        # Cached scrapers outlive the run; point them at this run's telemetry
+        scraper.telemetry = self.telemetry
+        return scraper
+
+    def record_result(self, shop_name, result):
+        """Add one shop's scrape() result to the run results"""
+        if result.get('success') and result.get('products'):
+            products = result['products']
+            self.results['products'].extend(products)
+            self.results['summary']['by_shop'][shop_name] = {
+                'count': len(products),
+                'success': True
+            }
+            print(f"✅ {shop_name}: Successfully scraped {len(products)} products")
+            return True
+        else:
+            error_msg = result.get('error', 'Unknown error')
+            self.results['summary']['errors'].append({
+                'shop': shop_name,
+                'error': error_msg
+            })
+            self.results['summary']['by_shop'][shop_name] = {
+                'count': 0,
+                'success': False,
+                'error': error_msg
+            }
+            print(f"❌ {shop_name}: Failed - {error_msg}")
+            return False
+
+    def run_scraper(self, scraper_class, shop_name, pages=None):
+        """
+        Run a scraper and collect results
+
+        Returns:
+            The scraper's per-page results for the pages that listed any
+            cards, even if the run had already seen all of them (empty when
+            the shop failed)
+        """
         print(f"\n{'='*80}")
         print(f"Running {shop_name} scraper...")
         print(f"{'='*80}")
 
         try:
-            scraper = scraper_class()
-            result = scraper.scrape()
-
-            if result.get('success') and result.get('products'):
-                products = result['products']
-                self.results['products'].extend(products)
-                self.results['summary']['by_shop'][shop_name] = {
-                    'count': len(products),
-                    'success': True
-                }
-                print(f"✅ {shop_name}: Successfully scraped {len(products)} products")
-                return True
-            else:
-                error_msg = result.get('error', 'Unknown error')
-                self.results['summary']['errors'].append({
-                    'shop': shop_name,
-                    'error': error_msg
-                })
-                self.results['summary']['by_shop'][shop_name] = {
-                    'count': 0,
-                    'success': False,
-                    'error': error_msg
-                }
-                print(f"❌ {shop_name}: Failed - {error_msg}")
-                return False
+            scraper = self.get_scraper(scraper_class)
+            result = scraper.scrape(pages=pages, frontier=self.frontier)
+            if not self.record_result(shop_name, result):
+                return []
+            return [page for page in result.get('pages', []) if page['status'] == 'done' and page['offers']]
 
         except Exception as e:
             error_msg = str(e)
@@ -89,25 +129,217 @@ class PriceUpdater:
                 'error': error_msg
             }
             print(f"❌ {shop_name}: Exception - {error_msg}")
-            return False
+            return []
+
+    def load_previous_products(self):
+        """Load products from the last published latest_products.json"""
+        latest_file = self.output_dir / "latest_products.json"
+        if latest_file.exists():
+            with open(latest_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('products', [])
+        return []
+
+    def carry_over_products(self, previous_products, refreshed):
+        """
+        Keep previously scraped products for pages that were not refreshed
+        on this run, so a partial (scheduled) run still publishes the full catalog.
+
+        Args:
+            previous_products: Products from the last published run
+            refreshed: Mapping of shop name to the set of refreshed page URLs
+        """
+        fresh_keys = {(p['shop'], canonicalize_url(p.get('url'))) for p in self.results['products']}
+        carried = 0
+
+        for product in previous_products:
+            shop = product.get('shop')
+            source_page = product.get('source_page')
+            if shop in refreshed and (source_page is None or source_page in refreshed[shop]):
+                continue
+            if (shop, canonicalize_url(product.get('url'))) in fresh_keys:
+                continue
+            self.results['products'].append(product)
+            carried += 1
+
+        self.results['summary']['carried_over'] = carried
+        print(f"\n♻️  Carried over {carried} products from pages not refreshed this run")
+
+    def run_scheduled(self, shops, budget=None):
+        """Refresh only the pages the volatility scheduler considers stale"""
+        scheduler = RefreshScheduler() if budget is None else RefreshScheduler(budget=budget)
+        if not scheduler.state['shops'] and not scheduler.state['pages']:
+            scheduler.seed_from_snapshots(SnapshotArchive(self.output_dir / "archive" / "products").iter_snapshots())
+
+        shop_pages = {shop_name: scraper_class.PAGES for scraper_class, shop_name in shops}
+        plan = scheduler.plan(shop_pages)
+        previous_products = self.load_previous_products()
+
+        print(f"\n🗓️  Scheduled refresh: {sum(len(p) for p in plan.values())} of "
+              f"{sum(len(p) for p in shop_pages.values())} pages (budget {scheduler.budget})")
+        for row in scheduler.describe(shop_pages):
+            print(f"  {row['shop']:<12} {row['page']:<28} {row['changes_per_day']:>6} changes/day")
+
+        refreshed = {}
+        for scraper_class, shop_name in shops:
+            pages = plan.get(shop_name)
+            if not pages:
+                continue
+            # Failed or empty pages keep their carried-over products and schedule
+            done = self.run_scraper(scraper_class, shop_name, pages=pages)
+            if done:
+                scheduler.record_run(shop_name, done)
+                refreshed[shop_name] = {page['url'] for page in done}
+
+        self.carry_over_products(previous_products, refreshed)
+        scheduler.save_state()
+
+    def _run_on_queue(self, tasks, queue_path=None, workers=2, timeout_minutes=None):
+        """
+        Put tasks on the work queue, let workers (scrape_worker.py, local
+        and/or remote) scrape them, and return the run id and the merged
+        per-shop results.
+        """
+        task_queue = TaskQueue(queue_path)
+        run_id = task_queue.enqueue_run(tasks)
+        print(f"\n📬 Enqueued {len(tasks)} page tasks as run {run_id} ({task_queue.db_path})")
+
+        worker_script = Path(__file__).parent / "scrape_worker.py"
+        procs = [
+            subprocess.Popen([sys.executable, str(worker_script), '--queue', str(task_queue.db_path)])
+            for _ in range(workers)
+        ]
+        print(f"👷 Started {len(procs)} local workers")
+
+        try:
+            status = task_queue.wait_for_run(run_id, timeout=timeout_minutes * 60 if timeout_minutes else None)
+        finally:
+            # Workers finish their current task and close their browsers on
+            # SIGINT; a second one interrupts the task and releases its lease
+            for proc in procs:
+                proc.send_signal(signal.SIGINT)
+            for proc in procs:
+                try:
+                    proc.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    proc.send_signal(signal.SIGINT)
+                    try:
+                        proc.wait(timeout=10)
+                    except subprocess.TimeoutExpired:
+                        proc.kill()
+
+        print(f"📦 Run {run_id}: {status['done']} done, {status['failed']} failed, "
+              f"{status['pending'] + status['leased']} unfinished")
+
+        results = task_queue.run_results(run_id)
+        task_queue.close()
+        for result in results.values():
+            self.telemetry.merge(result.pop('timings', []))
+        return run_id, results
+
+    def run_distributed(self, shops, queue_path=None, workers=2, timeout_minutes=None):
+        """
+        Put one task per listing page on the work queue and merge the
+        per-page results into this run.
+        """
+        tasks = []
+        for scraper_class, shop_name in shops:
+            scraper = self.get_scraper(scraper_class)
+            for page in scraper_class.PAGES:
+                tasks.append({
+                    'shop': shop_name,
+                    'url': page['url'],
+                    'page_name': page['name'],
+                    'render': scraper.render_mode(page),
+                })
+
+        run_id, results = self._run_on_queue(tasks, queue_path, workers, timeout_minutes)
+        for shop_name, result in results.items():
+            self.record_result(shop_name, result)
+
+        self.results['summary']['run_id'] = run_id
+
+    def run_discovery(self, shops, queue_path=None, workers=2, timeout_minutes=None):
+        """
+        Find the MacBook product pages that changed since their last crawl in
+        the shops' sitemaps, scrape only those (one detail task each, through
+        the work queue) and carry everything else over from the last run.
+        """
+        started = time.time()
+        discovery = SitemapDiscovery(self.output_dir / "sitemap_state.json")
+        tasks = []
+        for scraper_class, shop_name in shops:
+            listing_urls = {page['url'] for page in scraper_class.PAGES}
+            with self.telemetry.span('discovery', shop=shop_name):
+                changed = discovery.discover(shop_name, scraper_class.SITEMAPS)
+            changed = [page for page in changed if page['url'] not in listing_urls]
+
+            stats = discovery.stats[shop_name]
+            print(f"🗺️  {shop_name}: {stats['sitemaps']} sitemaps read ({stats['sitemaps_skipped']} unchanged), "
+                  f"{stats['macbooks']} MacBook pages, {len(changed)} changed since last crawl")
+            for error in stats['errors']:
+                print(f"   ⚠️  {error}")
+            tasks.extend({
+                'shop': shop_name,
+                'url': page['url'],
+                'page_name': 'product',
+                'render': scraper_class.DETAIL_RENDER,
+                'kind': 'detail',
+            } for page in changed)
+
+        previous_products = self.load_previous_products()
+        results = {}
+        if tasks:
+            run_id, results = self._run_on_queue(tasks, queue_path, workers, timeout_minutes)
+            self.results['summary']['run_id'] = run_id
+
+        refreshed = {}
+        for scraper_class, shop_name in shops:
+            result = results.get(shop_name)
+            if result is None:
+                # Nothing changed: the last run's products stand
+                self.results['summary']['by_shop'][shop_name] = {'count': 0, 'success': True}
+                print(f"✅ {shop_name}: No product pages changed")
+            else:
+                self.record_result(shop_name, result)
+                crawled = [page['url'] for page in result['pages'] if page['status'] == 'done']
+                for url in crawled:
+                    discovery.mark_crawled(shop_name, url)
+                refreshed[shop_name] = set(crawled)
+
+            if not discovery.stats[shop_name]['errors'] and (result is None or not result['errors']):
+                discovery.mark_complete(shop_name, started)
+
+        self.carry_over_products(previous_products, refreshed)
+        self.results['summary']['discovery'] = discovery.stats
+        discovery.save_state()
 
     def save_results(self):
         """Save results to JSON files"""
         # Update total count
         self.results['summary']['total_products'] = len(self.results['products'])
+        self.results['summary']['timings'] = self.telemetry.summary()
+        self.results['summary']['frontier'] = self.frontier.summary()
 
-        # Save to latest_products.json (used by Next.js API)
+        # Publish latest_products.json (used by Next.js API) atomically
         latest_file = self.output_dir / "latest_products.json"
-        with open(latest_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
-        print(f"\n✅ Saved latest prices to: {latest_file}")
+        size = publish_json(self.results, latest_file, telemetry=self.telemetry)
+        print(f"\n✅ Saved latest prices to: {latest_file} ({size / 1024:.0f} KB)")
 
-        # Also save timestamped backup
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_file = self.output_dir / f"products_{timestamp}.json"
-        with open(backup_file, 'w', encoding='utf-8') as f:
-            json.dump(self.results, f, indent=2, ensure_ascii=False)
-        print(f"✅ Saved backup to: {backup_file}")
+        # Precomputed comparison view served by the Next.js API
+        index_file = self.output_dir / "comparison_index.json"
+        index = build_comparison_index(self.results['products'], self.results['timestamp'])
+        publish_json(index, index_file, telemetry=self.telemetry)
+        print(f"✅ Saved comparison index ({len(index['groups'])} configurations) to: {index_file}")
+
+        # History goes to the keyframe + delta archive instead of a full copy per run
+        archive = SnapshotArchive(self.output_dir / "archive" / "products")
+        with self.telemetry.span('write'):
+            kind = archive.append(self.results)
+        print(f"✅ Archived run as {kind} in: {archive.archive_dir}")
+
+        # Prometheus textfile for node_exporter (includes the writes above)
+        self.telemetry.write_prometheus(self.metrics_file, self.results['summary']['by_shop'])
+        print(f"✅ Saved metrics to: {self.metrics_file}")
 
     def print_summary(self):
         """Print execution summary"""
@@ -127,26 +359,40 @@ class PriceUpdater:
         if self.results['summary']['errors']:
             print(f"\n⚠️  Errors encountered: {len(self.results['summary']['errors'])}")
 
+        print()
+        for line in self.telemetry.format_breakdown():
+            print(line)
+
         print(f"{'='*80}\n")
 
-    def run(self, include_all=False):
+    def run(self, include_all=False, scheduled=False, budget=None, only_shops=None,
+            distributed=False, workers=2, queue_path=None, run_timeout=None, discover=False):
         """Run all scrapers and update prices"""
         print("\n🚀 Starting automated price update...")
         print(f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
-        # Always run the reliable scrapers
-        self.run_scraper(CellphonesScraper, 'cellphones')
-        self.run_scraper(ShopDunkScraper, 'shopdunk')
-
-        # Optionally run FPT and TopZone (usually blocked)
-        if include_all:
-            if FPTSHOP_AVAILABLE:
-                print("\n⚠️  Warning: FPTShop usually gets blocked by Cloudflare")
-                self.run_scraper(FPTShopScraper, 'fptshop')
-
-            if TOPZONE_AVAILABLE:
-                print("\n⚠️  Warning: TopZone usually times out")
-                self.run_scraper(TopZoneScraper, 'topzone')
+        # Always run the reliable scrapers; optionally FPT and TopZone (usually blocked)
+        shops = []
+        for shop_name in only_shops or shop_names(include_all):
+            if SHOPS[shop_name].get('warning'):
+                print(f"\n⚠️  Warning: {SHOPS[shop_name]['warning']}")
+            try:
+                shops.append((get_scraper_class(shop_name), shop_name))
+            except ImportError as e:
+                self.results['summary']['errors'].append({'shop': shop_name, 'error': str(e)})
+                print(f"❌ {shop_name}: Unavailable - {e}")
+
+        if discover:
+            self.run_discovery(shops, queue_path=queue_path, workers=workers,
+                               timeout_minutes=run_timeout)
+        elif distributed:
+            self.run_distributed(shops, queue_path=queue_path, workers=workers,
+                                 timeout_minutes=run_timeout)
+        elif scheduled:
+            self.run_scheduled(shops, budget=budget)
+        else:
+            for scraper_class, shop_name in shops:
+                self.run_scraper(scraper_class, shop_name)
 
         # Save results
         self.save_results()
@@ -161,6 +407,157 @@ class PriceUpdater:
         return 0 if success else 1
 
 
+class PriceUpdateDaemon:
+    """
+    Long-running price updater.
+
+    Keeps one BrowserPool and the scraper instances (HTTP sessions, detail
+    caches) alive between runs. Runs are triggered on a fixed interval and/or
+    on request over a local Unix socket speaking one JSON line per message:
+
+        {"cmd": "run", "all": false, "scheduled": true}   -> run summary
+        {"cmd": "status"}                                  -> daemon status
+        {"cmd": "stop"}                                    -> shut down
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, interval_minutes=None,
+                 include_all=False, scheduled=False, budget=None):
+        self.socket_path = Path(socket_path)
+        self.interval = interval_minutes * 60 if interval_minutes else None
+        self.defaults = {'all': include_all, 'scheduled': scheduled, 'budget': budget, 'shops': None}
+
+        self.browser_pool = BrowserPool()
+        self.scraper_cache = {}
+        self.jobs = queue.Queue()
+        self.running = True
+        self.status = {
+            'started': datetime.now().isoformat(),
+            'runs': 0,
+            'busy': False,
+            'last_run': None,
+        }
+
+    def run_update(self, options):
+        """Run one price update with the warm browsers and scrapers"""
+        options = {**self.defaults, **{k: v for k, v in options.items() if k in self.defaults}}
+
+        self.status['busy'] = True
+        started = time.monotonic()
+        try:
+            updater = PriceUpdater(browser_pool=self.browser_pool, scraper_cache=self.scraper_cache)
+            exit_code = updater.run(
+                include_all=bool(options['all']),
+                scheduled=bool(options['scheduled']),
+                budget=options['budget'],
+                only_shops=options['shops'],
+            )
+        finally:
+            self.status['busy'] = False
+
+        result = {
+            'success': exit_code == 0,
+            'exit_code': exit_code,
+            'timestamp': updater.results['timestamp'],
+            'duration': round(time.monotonic() - started, 2),
+            'summary': updater.results['summary'],
+        }
+        self.status['runs'] += 1
+        self.status['browser_launches'] = self.browser_pool.launches
+        self.status['last_run'] = {k: result[k] for k in ('success', 'timestamp', 'duration')}
+        return result
+
+    def _handle_client(self, conn):
+        """Answer one request from the control socket"""
+        with conn, conn.makefile('rwb') as stream:
+            try:
+                request = json.loads(stream.readline() or b'{}')
+            except ValueError:
+                request = None
+
+            cmd = request.get('cmd', 'run') if isinstance(request, dict) else None
+            if not isinstance(request, dict):
+                response = {'success': False, 'error': "Request must be a JSON object"}
+            elif cmd == 'run':
+                job = {'options': request, 'done': threading.Event()}
+                self.jobs.put(job)
+                job['done'].wait()
+                response = job['result']
+            elif cmd == 'status':
+                response = {**self.status, 'queued': self.jobs.qsize()}
+            elif cmd == 'stop':
+                self.stop()
+                response = {'stopping': True}
+            else:
+                response = {'success': False, 'error': f"Unknown command: {cmd}"}
+
+            stream.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            stream.flush()
+
+    def _serve_socket(self, server):
+        """Accept control connections until the daemon stops"""
+        while self.running:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+
+    def stop(self):
+        self.running = False
+        self.jobs.put(None)
+
+    def serve_forever(self):
+        """Run scrapes on the main thread (Playwright's sync API is thread-bound)"""
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(self.socket_path))
+        server.listen()
+        threading.Thread(target=self._serve_socket, args=(server,), daemon=True).start()
+
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        print(f"🛰️  Price update daemon listening on {self.socket_path}")
+
+        next_run = time.monotonic() if self.interval else None
+        try:
+            while self.running:
+                timeout = max(0.0, next_run - time.monotonic()) if next_run is not None else None
+                try:
+                    job = self.jobs.get(timeout=timeout)
+                except queue.Empty:
+                    job = {'options': {}, 'done': None}
+                    next_run += self.interval
+
+                if job is None:
+                    break
+
+                try:
+                    job['result'] = self.run_update(job['options'])
+                except Exception as e:
+                    job['result'] = {'success': False, 'error': str(e)}
+                    print(f"❌ Daemon run failed: {e}")
+
+                if job['done']:
+                    job['done'].set()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            self.browser_pool.close()
+            print("🛑 Price update daemon stopped")
+
+
+def trigger_daemon(request, socket_path=DEFAULT_SOCKET):
+    """Send a request to a running daemon and return its response"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as stream:
+            return json.loads(stream.readline())
+
+
 def main():
     """Main entry point"""
     import argparse
@@ -170,15 +567,73 @@ def main():
                        help='Include FPTShop and TopZone (usually blocked/timeout)')
     parser.add_argument('--quiet', action='store_true',
                        help='Minimal output')
+    parser.add_argument('--scheduled', action='store_true',
+                       help='Only refresh pages whose prices are likely to have changed')
+    parser.add_argument('--budget', type=int, default=None,
+                       help='Maximum pages to refresh in --scheduled mode (default: 6)')
+    parser.add_argument('--shops', type=str, default=None,
+                       help=f"Comma-separated shops to run (any of: {', '.join(SHOPS)})")
+    parser.add_argument('--distributed', action='store_true',
+                       help='Scrape pages through the work queue with scrape_worker.py workers')
+    parser.add_argument('--discover', action='store_true',
+                       help="Scrape only the product pages the shops' sitemaps show as changed (uses the work queue)")
+    parser.add_argument('--workers', type=int, default=2,
+                       help='Local workers to start in --distributed/--discover mode (0 = external workers only)')
+    parser.add_argument('--queue', type=str, default=None,
+                       help='Work queue database for --distributed/--discover (default: output/work_queue.db)')
+    parser.add_argument('--run-timeout', type=float, default=None,
+                       help='Minutes to wait for workers in --distributed/--discover mode before merging')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Stay resident with warm browsers; run on --interval or on socket requests')
+    parser.add_argument('--interval', type=float, default=None,
+                       help='Minutes between automatic runs in --daemon mode')
+    parser.add_argument('--socket', type=str, default=str(DEFAULT_SOCKET),
+                       help='Control socket path for --daemon/--trigger')
+    parser.add_argument('--trigger', action='store_true',
+                       help='Ask a running daemon to update prices (runs in-process if none is listening)')
+    parser.add_argument('--output-dir', type=str, default=None,
+                       help='Directory for latest_products.json, the archive and metrics (default: output/)')
 
     args = parser.parse_args()
 
+    only_shops = None
+    if args.shops:
+        only_shops = [name.strip() for name in args.shops.split(',') if name.strip()]
+        unknown = [name for name in only_shops if name not in SHOPS]
+        if unknown:
+            parser.error(f"unknown shop(s): {', '.join(unknown)}")
+
+    if args.trigger:
+        request = {'cmd': 'run', 'all': args.all, 'scheduled': args.scheduled,
+                   'budget': args.budget, 'shops': only_shops}
+        try:
+            response = trigger_daemon(request, args.socket)
+            print(json.dumps(response, indent=2, ensure_ascii=False))
+            sys.exit(0 if response.get('success') else 1)
+        except (FileNotFoundError, ConnectionRefusedError):
+            print(f"⚠️  No daemon listening on {args.socket}, running in-process")
+
     # Redirect output if quiet mode
     if args.quiet:
         sys.stdout = open(os.devnull, 'w')
 
-    updater = PriceUpdater()
-    exit_code = updater.run(include_all=args.all)
+    if args.daemon:
+        daemon = PriceUpdateDaemon(
+            socket_path=args.socket,
+            interval_minutes=args.interval,
+            include_all=args.all,
+            scheduled=args.scheduled,
+            budget=args.budget,
+        )
+        daemon.serve_forever()
+        sys.exit(0)
+
+    updater = PriceUpdater(output_dir=args.output_dir)
+    exit_code = updater.run(include_all=args.all, scheduled=args.scheduled,
+                            budget=args.budget, only_shops=only_shops,
+                            distributed=args.distributed, workers=args.workers,
+                            queue_path=args.queue, run_timeout=args.run_timeout,
+                            discover=args.discover)
 
     sys.exit(exit_code)
 
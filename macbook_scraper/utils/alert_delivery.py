@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Alert Delivery - Persistent, batched, asynchronous notification queue
+
+enqueue() only writes the notifications to an SQLite outbox and wakes the
+delivery thread, so the caller never waits on SMTP or HTTP. The thread
+claims every due message, merges them per recipient into one email or
+webhook call, and sends them over pooled connections (one SMTP login is
+reused across recipients). Failures are retried with exponential backoff
+until max_attempts; anything still pending when the process exits stays
+in the outbox and is sent by the next DeliveryQueue.
+
+Recipients starting with http:// or https:// get a JSON webhook POST,
+everything else gets an email.
+"""
+
+import json
+import logging
+import os
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    items TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, available_at);
+"""
+
+
+def smtp_config_from_env() -> Optional[Dict]:
+    """SMTP settings from SMTP_* environment variables (None if unset)"""
+    if not os.environ.get('SMTP_HOST'):
+        return None
+    return {
+        'smtp_host': os.environ['SMTP_HOST'],
+        'smtp_port': int(os.environ.get('SMTP_PORT', 587)),
+        'smtp_user': os.environ.get('SMTP_USER'),
+        'smtp_password': os.environ.get('SMTP_PASSWORD'),
+        'from_email': os.environ.get('SMTP_FROM') or os.environ.get('SMTP_USER'),
+        'starttls': os.environ.get('SMTP_STARTTLS', '1') != '0',
+    }
+
+
+def channel_for(recipient: str) -> str:
+    return 'webhook' if recipient.startswith(('http://', 'https://')) else 'email'
+
+
+def default_render_email(items: List[Dict]) -> str:
+    rows = ''.join(
+        f"<li>{item.get('model')} at {item.get('shop')}: "
+        f"{item.get('new_price', item.get('price')):,}₫ <a href=\"{item.get('url')}\">View</a></li>"
+        for item in items
+    )
+    return f"<html><body><h2>📊 MacBook Price Alert</h2><ul>{rows}</ul></body></html>"
+
+
+class SMTPPool:
+    """Logged-in SMTP connections reused across sends"""
+
+    def __init__(self, config: Dict, size: int = 2):
+        self.config = config
+        self.idle = queue.LifoQueue(maxsize=size)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.config['smtp_host'], self.config['smtp_port'], timeout=30)
+        if self.config.get('starttls', True):
+            server.starttls()
+        if self.config.get('smtp_user'):
+            server.login(self.config['smtp_user'], self.config['smtp_password'])
+        return server
+
+    def send(self, msg):
+        try:
+            server = self.idle.get_nowait()
+        except queue.Empty:
+            server = self._connect()
+
+        try:
+            server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Idle connection was dropped by the server; retry once on a fresh one
+            server = self._connect()
+            try:
+                server.send_message(msg)
+            except Exception:
+                self._quit(server)
+                raise
+        except Exception:
+            self._quit(server)
+            raise
+
+        try:
+            self.idle.put_nowait(server)
+        except queue.Full:
+            self._quit(server)
+
+    @staticmethod
+    def _quit(server):
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self.idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class DeliveryQueue:
+    """Outbox-backed background sender for email and webhook alerts"""
+
+    def __init__(self, db_path=None, smtp_config: Optional[Dict] = None,
+                 render_email: Optional[Callable[[List[Dict]], str]] = None,
+                 max_attempts: int = 5, retry_backoff: float = 30, pool_size: int = 2,
+                 webhook_timeout: float = 10, batch_window: float = 0.5):
+        """
+        Args:
+            db_path: Outbox SQLite file (default: output/outbox.db)
+            smtp_config: smtp_host, smtp_port, smtp_user, smtp_password,
+                from_email, starttls (default: SMTP_* environment variables)
+            render_email: Items -> HTML body of one recipient's email
+            max_attempts: Sends per message before it is marked failed
+            retry_backoff: Seconds before the first retry (doubles each time);
+                retries due after close() wait for the next DeliveryQueue
+            batch_window: Seconds to collect more notifications after a wake-up
+        """
+        self.db_path = Path(db_path) if db_path else \
+            Path(__file__).parent.parent / "output" / "outbox.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.smtp_config = smtp_config or smtp_config_from_env()
+        self.render_email = render_email or default_render_email
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.webhook_timeout = webhook_timeout
+        self.batch_window = batch_window
+        self.pool = SMTPPool(self.smtp_config, size=pool_size) if self.smtp_config else None
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._idle = threading.Event()
+        # Makes "nothing enqueued since the outbox was read" and going idle one step
+        self._idle_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='alert-delivery', daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def enqueue(self, recipient: str, items: List[Dict]) -> int:
+        """Persist one recipient's notifications and return immediately"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    """INSERT INTO outbox (channel, recipient, items, available_at, created_at)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (channel_for(recipient), recipient, json.dumps(items, ensure_ascii=False), now, now),
+                )
+        finally:
+            conn.close()
+        with self._idle_lock:
+            self._idle.clear()
+            self._wake.set()
+        return cursor.lastrowid
+
+    def pending(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+        finally:
+            conn.close()
+
+    def drain(self, timeout: float = 10) -> bool:
+        """Wait up to ``timeout`` seconds for the outbox to empty (retries included)"""
+        self._wake.set()
+        return self._idle.wait(timeout)
+
+    def close(self, timeout: float = 10) -> int:
+        """
+        Drain for at most ``timeout`` seconds, then stop the thread.
+
+        Returns:
+            Messages left pending in the outbox for the next run
+        """
+        self.drain(timeout)
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
+        if self.pool:
+            self.pool.close()
+        return self.pending()
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not self._stopping.is_set():
+                self._wake.clear()
+                next_due = self._deliver_due(conn)
+                # Idle = outbox empty and nothing enqueued meanwhile
+                with self._idle_lock:
+                    if next_due is None and not self._wake.is_set():
+                        self._idle.set()
+                self._wake.wait(None if next_due is None else max(0.0, next_due - time.time()))
+                # Let a burst of enqueues accumulate into one batch per recipient
+                self._stopping.wait(self.batch_window)
+        finally:
+            conn.close()
+
+    def _deliver_due(self, conn) -> Optional[float]:
+        """Send all due messages; return when the next retry is due (None if none)"""
+        now = time.time()
+        rows = conn.execute(
+            "SELECT * FROM outbox WHERE status = 'pending' AND available_at <= ? ORDER BY id",
+            (now,),
+        ).fetchall()
+
+        # Everything due for one recipient goes out as a single message
+        batches = defaultdict(list)
+        for row in rows:
+            batches[(row['channel'], row['recipient'])].append(row)
+
+        for (channel, recipient), batch in batches.items():
+            if self._stopping.is_set():
+                break
+            items = [item for row in batch for item in json.loads(row['items'])]
+            ids = [row['id'] for row in batch]
+            try:
+                if channel == 'webhook':
+                    self._send_webhook(recipient, items)
+                else:
+                    self._send_email(recipient, items)
+            except Exception as e:
+                self._record_failure(conn, batch, e)
+            else:
+                with conn:
+                    conn.executemany(
+                        "UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        [(time.time(), i) for i in ids],
+                    )
+
+        row = conn.execute("SELECT MIN(available_at) FROM outbox WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def _record_failure(self, conn, batch, error):
+        logger.warning(f"Alert delivery to {batch[0]['recipient']} failed: {error}")
+        with conn:
+            for row in batch:
+                attempts = row['attempts'] + 1
+                if attempts >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE outbox SET status = 'failed', attempts = ?, error = ? WHERE id = ?",
+                        (attempts, str(error), row['id']),
+                    )
+                else:
+                    conn.execute(
+                        "UPDATE outbox SET attempts = ?, error = ?, available_at = ? WHERE id = ?",
+                        (attempts, str(error),
+                         time.time() + self.retry_backoff * 2 ** (attempts - 1), row['id']),
+                    )
+
+    def _send_email(self, recipient: str, items: List[Dict]):
+        if not self.pool:
+            raise RuntimeError("SMTP not configured (set SMTP_HOST)")
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = f"MacBook Price Alert - {len(items)} updates"
+        msg['From'] = self.smtp_config['from_email']
+        msg['To'] = recipient
+        msg.attach(MIMEText(self.render_email(items), 'html'))
+        self.pool.send(msg)
+
+    def _send_webhook(self, url: str, items: List[Dict]):
+        body = json.dumps({'alerts': items}, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(
+            url, data=body, method='POST', headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.webhook_timeout) as response:
+            response.read()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Alert Subscriptions - Many users' price rules, matched through an index
+
+A subscription targets a canonical configuration ("m4-air-13-16-512gb"), a
+family ("m4-air") or every product ("*"), optionally one shop, with one
+rule:
+
+- below: alert when an offer's price crosses under ``max_price``
+- drop: alert when a price drops by at least ``min_drop_pct`` percent
+
+Rules are indexed by target and kept sorted by threshold, so a run only
+looks up the targets of the changed canonical ids and bisects for the
+matching thresholds instead of testing every rule against every product.
+"""
+
+import sqlite3
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ANY = '*'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    target TEXT NOT NULL DEFAULT '*',
+    shop TEXT,
+    max_price INTEGER,
+    min_drop_pct REAL,
+    created_at REAL NOT NULL,
+    CHECK ((max_price IS NULL) != (min_drop_pct IS NULL))
+);
+CREATE INDEX IF NOT EXISTS idx_subscriptions_recipient ON subscriptions (recipient);
+"""
+
+CHIP_VARIANTS = ('pro', 'max')
+MODEL_TYPES = ('air', 'pro')
+
+
+def family_key(canonical_id: Optional[str]) -> Optional[str]:
+    """Chip + model part of a canonical id ('m4-pro-pro-14-24-1tb' -> 'm4-pro-pro')"""
+    if not canonical_id:
+        return None
+    parts = canonical_id.split('-')
+    if len(parts) >= 3 and parts[1] in CHIP_VARIANTS and parts[2] in MODEL_TYPES:
+        return '-'.join(parts[:3])
+    if len(parts) >= 2 and parts[1] in MODEL_TYPES:
+        return '-'.join(parts[:2])
+    return None
+
+
+class SubscriptionIndex:
+    """Target -> sorted thresholds, built once from all subscriptions"""
+
+    def __init__(self, rows):
+        below = defaultdict(list)
+        drop = defaultdict(list)
+        self.subscriptions = {}
+        for row in rows:
+            self.subscriptions[row['id']] = row
+            if row['max_price'] is not None:
+                below[row['target']].append((row['max_price'], row['id']))
+            else:
+                drop[row['target']].append((row['min_drop_pct'], row['id']))
+
+        # Parallel (thresholds, ids) lists so bisect works on plain numbers
+        self.below = {target: self._split(entries) for target, entries in below.items()}
+        self.drop = {target: self._split(entries) for target, entries in drop.items()}
+
+    @staticmethod
+    def _split(entries):
+        entries.sort()
+        return [threshold for threshold, _ in entries], [sub_id for _, sub_id in entries]
+
+    def __len__(self):
+        return len(self.subscriptions)
+
+    def match(self, canonical_id, shop, new_price, old_price=None) -> List[Dict]:
+        """Subscriptions fired by one price change (old_price None = new offer)"""
+        targets = [ANY]
+        if canonical_id:
+            targets += [canonical_id, family_key(canonical_id)]
+
+        matched = []
+        for target in filter(None, targets):
+            if target in self.below:
+                # Thresholds crossed: new_price <= max_price < old_price
+                thresholds, ids = self.below[target]
+                lo = bisect_left(thresholds, new_price)
+                hi = len(thresholds) if old_price is None else bisect_left(thresholds, old_price)
+                matched.extend(ids[lo:hi])
+
+            if target in self.drop and old_price and new_price < old_price:
+                thresholds, ids = self.drop[target]
+                drop_pct = (old_price - new_price) / old_price * 100
+                matched.extend(ids[:bisect_right(thresholds, drop_pct)])
+
+        return [
+            self.subscriptions[sub_id] for sub_id in matched
+            if not self.subscriptions[sub_id]['shop'] or self.subscriptions[sub_id]['shop'] == shop
+        ]
+
+
+class AlertSubscriptions:
+    """SQLite-backed subscriptions with a lazily rebuilt match index"""
+
+    def __init__(self, db_path=None):
+        """
+        Args:
+            db_path: SQLite file (default: output/subscriptions.db)
+        """
+        self.db_path = Path(db_path) if db_path else \
+            Path(__file__).parent.parent / "output" / "subscriptions.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+        self._index = None
+
+    def close(self):
+        self.conn.close()
+
+    def subscribe(self, recipient: str, target: str = ANY, max_price: Optional[int] = None,
+                  min_drop_pct: Optional[float] = None, shop: Optional[str] = None) -> int:
+        """
+        Register a rule. Exactly one of max_price / min_drop_pct must be set.
+
+        Returns:
+            Subscription id
+        """
+        if (max_price is None) == (min_drop_pct is None):
+            raise ValueError("Set exactly one of max_price or min_drop_pct")
+        with self.conn:
+            cursor = self.conn.execute(
+                """INSERT INTO subscriptions (recipient, target, shop, max_price, min_drop_pct, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                (recipient, target or ANY, shop, max_price, min_drop_pct, time.time()),
+            )
+        self._index = None
+        return cursor.lastrowid
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        with self.conn:
+            deleted = self.conn.execute(
+                "DELETE FROM subscriptions WHERE id = ?", (subscription_id,)).rowcount
+        self._index = None
+        return bool(deleted)
+
+    def list(self, recipient: Optional[str] = None) -> List[Dict]:
+        if recipient:
+            rows = self.conn.execute("SELECT * FROM subscriptions WHERE recipient = ? ORDER BY id", (recipient,))
+        else:
+            rows = self.conn.execute("SELECT * FROM subscriptions ORDER BY id")
+        return [dict(row) for row in rows]
+
+    @property
+    def index(self) -> SubscriptionIndex:
+        if self._index is None:
+            self._index = SubscriptionIndex(self.list())
+        return self._index
+
+    def match(self, changes: Dict) -> Dict[str, List[Dict]]:
+        """
+        Evaluate the rules touched by a run's changes.
+
+        Args:
+            changes: PriceMonitor.detect_changes() result
+
+        Returns:
+            Recipient -> list of {subscription, change} (one per fired rule)
+        """
+        notifications = defaultdict(list)
+        for change in changes['price_drops'] + changes['new_products']:
+            new_price = change.get('new_price', change.get('price'))
+            for subscription in self.index.match(change.get('canonical_id'), change['shop'],
+                                                 new_price, change.get('old_price')):
+                notifications[subscription['recipient']].append({
+                    'subscription': subscription,
+                    'change': change,
+                })
+        return dict(notifications)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Browser Pool - Keep browsers warm across scraper runs
+
+Launching Chromium (Playwright) or an undetected Chrome (SeleniumBase) costs
+seconds per page. A long-running process (update_prices.py --daemon) holds
+one BrowserPool and hands it to the scrapers, which then only open a fresh
+context/page per URL instead of a whole browser.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+
+from utils.telemetry import NullTelemetry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONTEXT = {
+    'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'viewport': {'width': 1920, 'height': 1080},
+    'locale': 'vi-VN',
+}
+
+
+class BrowserPool:
+    """Lazily launched, reusable Playwright browser and UC Chrome driver"""
+
+    def __init__(self, headless=True):
+        self.headless = headless
+        self._lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._uc_driver = None
+        self.launches = 0
+
+    def _ensure_browser(self):
+        """Start Playwright and Chromium on first use, or after a crash"""
+        if self._browser is not None and self._browser.is_connected():
+            return self._browser
+
+        from playwright.sync_api import sync_playwright
+
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+
+        logger.info("Launching pooled Chromium...")
+        self._browser = self._playwright.chromium.launch(
+            headless=self.headless,
+            args=['--disable-blink-features=AutomationControlled']
+        )
+        self.launches += 1
+        return self._browser
+
+    @contextmanager
+    def page(self, telemetry=None, **context_options):
+        """Yield a page in a fresh browser context; the browser itself stays open"""
+        telemetry = telemetry or NullTelemetry()
+        with telemetry.span('browser_launch'), self._lock:
+            browser = self._ensure_browser()
+            context = browser.new_context(**{**DEFAULT_CONTEXT, **context_options})
+            page = context.new_page()
+        try:
+            yield page
+        finally:
+            try:
+                context.close()
+            except Exception as e:
+                logger.warning(f"Failed to close browser context: {e}")
+
+    def uc_driver(self, telemetry=None):
+        """Return the warm SeleniumBase UC driver, launching it on first use"""
+        telemetry = telemetry or NullTelemetry()
+        with telemetry.span('browser_launch'), self._lock:
+            if self._uc_driver is None:
+                from seleniumbase import Driver
+
+                logger.info("Launching pooled UC Chrome...")
+                self._uc_driver = Driver(
+                    uc=True,
+                    headless=False,  # Headless has higher detection rate
+                    chromium_arg="--disable-blink-features=AutomationControlled",
+                )
+                self.launches += 1
+            return self._uc_driver
+
+    def discard_uc_driver(self):
+        """Drop a driver that errored so the next caller gets a clean one"""
+        with self._lock:
+            driver, self._uc_driver = self._uc_driver, None
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
+    def close(self):
+        """Shut down all pooled browsers"""
+        self.discard_uc_driver()
+        with self._lock:
+            if self._browser is not None:
+                try:
+                    self._browser.close()
+                except Exception:
+                    pass
+                self._browser = None
+            if self._playwright is not None:
+                self._playwright.stop()
+                self._playwright = None
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Comparison Index - API-ready view of a run, built once per scrape
+
+The Next.js API used to filter, transform and regroup every scraped product
+on each request. build_comparison_index does that work once, at the end of
+a price update, and the result (output/comparison_index.json) is served as
+is:
+
+- marketplaces: each shop's valid offers in the API's product format
+- groups: offers grouped by canonical (SpecParser) id, with the best offer
+  per shop and the min/max/spread of those best prices
+- sort: group ids precomputed in every supported order
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from utils.spec_parser import SpecParser
+
+INDEX_VERSION = 1
+
+# Scraper shop name -> key used by the API's marketplaces object
+SHOP_KEYS = {
+    'cellphones': 'cellphones',
+    'shopdunk': 'shopDunk',
+    'fptshop': 'fptShop',
+    'topzone': 'topZone',
+}
+
+# Used / refurbished listings are not comparable with new ones
+USED_KEYWORDS = ('cũ', 'trôi bh', 'like new', 'refurbished')
+
+# Anything cheaper than this is a parsing error or an accessory
+MIN_VALID_PRICE = 1_000_000
+
+CHIP_FALLBACKS = [
+    'm5 max', 'm5 pro', 'm5', 'm4 max', 'm4 pro', 'm4',
+    'm3 max', 'm3 pro', 'm3', 'm2', 'm1',
+]
+
+
+def is_valid_offer(product: Dict) -> bool:
+    """New (not used) product with a plausible price"""
+    names = f"{product.get('model') or ''} {product.get('raw_name') or ''}".lower()
+    if any(keyword in names for keyword in USED_KEYWORDS):
+        return False
+    return bool(product.get('price_vnd')) and product['price_vnd'] >= MIN_VALID_PRICE
+
+
+def to_api_product(product: Dict) -> Dict:
+    """Scraped product -> marketplace product, as the API used to build it"""
+    model_name = product.get('model') or ''
+    model_lower = model_name.lower()
+
+    model_type, screen_size = 'MacBook', ''
+    if 'air' in model_lower:
+        model_type = 'MacBook Air'
+        if '13' in model_lower:
+            screen_size = '13"'
+        elif '15' in model_lower:
+            screen_size = '15"'
+    elif 'pro' in model_lower:
+        model_type = 'MacBook Pro'
+        if '14' in model_lower:
+            screen_size = '14"'
+        elif '16' in model_lower:
+            screen_size = '16"'
+
+    specs = product.get('specs') or {}
+    if specs.get('chip'):
+        category = f"{specs['chip']} {specs['chip_variant']}" if specs.get('chip_variant') else specs['chip']
+    else:
+        category = next(
+            (chip.upper().replace('PRO', 'Pro').replace('MAX', 'Max')
+             for chip in CHIP_FALLBACKS if chip in model_lower),
+            'Unknown',
+        )
+
+    return {
+        'model': f"{model_type} {screen_size}" if screen_size else model_type,
+        'modelType': model_type,
+        'screenSize': screen_size,
+        'category': category,
+        'configuration': model_name,
+        'id': re.sub(r'\s+', '-', model_lower)[:100],
+        'vndPrice': product.get('price_vnd'),
+        'url': product.get('url'),
+        'available': True,
+        'shop': product.get('shop'),
+    }
+
+
+def build_comparison_index(products: List[Dict], timestamp: Optional[str] = None) -> Dict:
+    """
+    Build the serving artifact for one run.
+
+    Args:
+        products: Products of the run (latest_products.json 'products')
+        timestamp: Run timestamp to publish as lastScraped
+
+    Returns:
+        Index dict (see module docstring)
+    """
+    parser = SpecParser()
+    marketplaces = {key: [] for key in SHOP_KEYS.values()}
+    groups = {}
+
+    for product in products:
+        if not is_valid_offer(product) or product.get('shop') not in SHOP_KEYS:
+            continue
+        shop_key = SHOP_KEYS[product['shop']]
+        marketplaces[shop_key].append(to_api_product(product))
+
+        # Snapshots from before canonical_id existed: derive it from the name
+        canonical_id = product.get('canonical_id') or \
+            parser.parse(product.get('raw_name') or product.get('model')).get('id')
+        if not canonical_id:
+            continue
+
+        group = groups.setdefault(canonical_id, {
+            'id': canonical_id,
+            'name': product.get('clean_name') or product.get('model'),
+            'specs': product.get('specs') or {},
+            'offers': {},
+        })
+        best = group['offers'].get(shop_key)
+        if best is None or product['price_vnd'] < best['vndPrice']:
+            group['offers'][shop_key] = {
+                'vndPrice': product['price_vnd'],
+                'url': product.get('url'),
+                'configuration': product.get('model'),
+                'imageUrl': product.get('image_url'),
+            }
+
+    for group in groups.values():
+        prices = [offer['vndPrice'] for offer in group['offers'].values()]
+        group['minPrice'] = min(prices)
+        group['maxPrice'] = max(prices)
+        group['spread'] = group['maxPrice'] - group['minPrice']
+        group['bestShop'] = min(group['offers'], key=lambda shop: group['offers'][shop]['vndPrice'])
+        group['shopCount'] = len(group['offers'])
+
+    ids = list(groups)
+    return {
+        'version': INDEX_VERSION,
+        'lastScraped': timestamp,
+        'scrapedProductsCount': sum(len(offers) for offers in marketplaces.values()),
+        'marketplaces': marketplaces,
+        'groups': groups,
+        'sort': {
+            'price_asc': sorted(ids, key=lambda i: (groups[i]['minPrice'], i)),
+            'price_desc': sorted(ids, key=lambda i: (-groups[i]['minPrice'], i)),
+            'spread_desc': sorted(ids, key=lambda i: (-groups[i]['spread'], i)),
+            'shops_desc': sorted(ids, key=lambda i: (-groups[i]['shopCount'], groups[i]['minPrice'], i)),
+            'name': sorted(ids, key=lambda i: ((groups[i]['name'] or '').lower(), i)),
+        },
+    }
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+DOM Extract - Pull product records out of a rendered page in the browser
+
+Rendered listing pages used to be serialized with page.content() (several
+MB of HTML), copied into Python and parsed again with BeautifulSoup. Here
+the card selectors run inside the page via page.evaluate, and only the
+product records cross over:
+
+    {'name', 'price_text', 'href', 'image', 'product_id'}
+
+The selectors are the ones in macbook_scraper/selectors.json (shared with
+the Scrapy spiders), and the text rules match BeautifulSoup's
+get_text(strip=True), so a record carries exactly what the scraper's HTML
+parser would have read from the same card.
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+SELECTORS_PATH = Path(__file__).parent.parent / "macbook_scraper" / "selectors.json"
+
+EXTRACT_PRODUCTS_JS = """
+(spec) => {
+  // Same as BeautifulSoup's get_text(strip=True): stripped text nodes, no separator
+  const text = (el) => {
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    let out = '';
+    for (let node = walker.nextNode(); node; node = walker.nextNode()) {
+      out += node.nodeValue.trim();
+    }
+    return out;
+  };
+  const first = (node, selectors) => {
+    for (const selector of selectors || []) {
+      const match = node.querySelector(selector);
+      if (match) return match;
+    }
+    return null;
+  };
+  const attrOrText = (el, attr) => (attr && el.getAttribute(attr)) || text(el);
+
+  let cards = [];
+  for (const selector of spec.product_container) {
+    cards = Array.from(document.querySelectorAll(selector));
+    if (cards.length) break;
+  }
+
+  return cards.map((card) => {
+    const name = first(card, spec.name);
+    const price = first(card, spec.price);
+    const link = first(card, spec.link);
+    const img = first(card, spec.image);
+    return {
+      name: name ? attrOrText(name, spec.name_attr) : null,
+      price_text: price ? attrOrText(price, spec.price_attr) : null,
+      href: link ? link.getAttribute('href') : null,
+      image: img ? ((spec.image_attrs || []).map((a) => img.getAttribute(a)).find((v) => v) || null) : null,
+      product_id: spec.product_id_attr ? card.getAttribute(spec.product_id_attr) : null,
+    };
+  });
+}
+"""
+
+
+@lru_cache(maxsize=None)
+def shop_selectors(shop: str) -> Dict:
+    """A shop's card selectors from selectors.json"""
+    with open(SELECTORS_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)[shop]
+
+
+def extract_products(page, shop: str):
+    """Product records of the listing rendered in a Playwright page"""
+    return page.evaluate(EXTRACT_PRODUCTS_JS, shop_selectors(shop))
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Output Writer - Serialize once, publish atomically
+
+The Next.js API reads latest_products.json while the updater writes it, so
+the file must never be observed half-written. publish_json serializes the
+run once (orjson when installed, compact stdlib json otherwise), writes it
+to a temp file in the same directory, fsyncs, and renames it over the
+target. Run history lives in the snapshot archive, not in backup copies.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from utils.telemetry import NullTelemetry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data) -> bytes:
+    """Compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def write_atomic(path, payload: bytes):
+    """Write bytes to path via temp file + fsync + rename"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    # Make the rename itself durable
+    try:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+
+
+def publish_json(data, path, telemetry=None) -> int:
+    """
+    Atomically publish data as JSON.
+
+    Args:
+        data: JSON-serializable object
+        path: Published file (replaced atomically)
+        telemetry: Optional RunTelemetry for 'serialize' and 'write' spans
+
+    Returns:
+        Size of the published file in bytes
+    """
+    telemetry = telemetry or NullTelemetry()
+
+    with telemetry.span('serialize'):
+        payload = dumps(data)
+
+    with telemetry.span('write'):
+        write_atomic(path, payload)
+
+    return len(payload)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Pagination - Fetch pages 2..N of a listing in parallel
+
+Scrolling a rendered listing to the bottom only loads the next lazy batch,
+and only after a fixed sleep. The shops also serve every batch as a
+numbered page (CellphoneS ?p=N, ShopDunk ?pagenumber=N), so after page 1
+the scrapers fetch the following pages over plain HTTP, a few at a time:
+
+    records += fetch_more_pages(fetch, url, 'p', records, key=lambda r: r['href'])
+
+Pages are requested in waves of ``workers``, their starts spaced at least
+``interval`` seconds apart across all workers. A page that repeats products
+we already have (past the last page most shops repeat the last page or
+fall back to page 1) ends the listing, so a shop that ignores the
+parameter costs one wave of requests. A page that fails or has no product
+cards at all also ends it, with a warning: over plain HTTP that is what a
+JavaScript-rendered page looks like. Pass ``render`` to fetch such pages
+in the browser instead (from the calling thread, as Playwright's sync API
+requires).
+
+Workers share the scraper, so HTTP goes through ThreadSessions, one
+requests.Session per thread.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGES = 20
+PAGE_WORKERS = 4
+# Seconds between the starts of two page requests to one shop
+PAGE_INTERVAL = 0.5
+
+
+class ThreadSessions:
+    """A requests.Session per thread (Session is not thread-safe)"""
+
+    def __init__(self, headers: Optional[Dict] = None):
+        self.headers = dict(headers or {})
+        self._local = threading.local()
+
+    def get(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+            session.headers.update(self.headers)
+        return session
+
+
+def page_url(url: str, param: str, number: int) -> str:
+    """The listing URL with its page parameter set to ``number``"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != param]
+    query.append((param, str(number)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def fetch_more_pages(fetch_page: Callable[[str], Optional[List[Dict]]], url: str, param: str,
+                     first_page: Iterable[Dict], key: Callable[[Dict], str],
+                     max_pages: int = MAX_PAGES, workers: int = PAGE_WORKERS,
+                     interval: float = PAGE_INTERVAL,
+                     render: Optional[Callable[[str], Optional[List[Dict]]]] = None,
+                     telemetry=None, shop: Optional[str] = None) -> List[Dict]:
+    """
+    Records of pages 2..max_pages that are not on an earlier page
+
+    Args:
+        fetch_page: Fetches one page URL and returns its records (None on failure)
+        url: Listing URL (page 1)
+        param: The shop's page query parameter
+        first_page: Records already read from page 1
+        key: Identity of a record (usually its product link)
+        interval: Least seconds between the starts of two page requests
+        render: Fetches a page in the browser, for pages without product
+            cards over HTTP (called from this thread)
+        telemetry: Optional RunTelemetry; each page is timed as its own listing
+        shop: Shop name for the telemetry spans
+    """
+    seen = {key(record) for record in first_page}
+    records = []
+    turn_lock = threading.Lock()
+    next_start = [time.monotonic()]
+
+    def wait_turn():
+        with turn_lock:
+            start = max(next_start[0], time.monotonic())
+            next_start[0] = start + interval
+        time.sleep(max(0.0, start - time.monotonic()))
+
+    def fetch(number):
+        target = page_url(url, param, number)
+        wait_turn()
+        if telemetry is None:
+            return fetch_page(target)
+        # Worker threads don't see the caller's spans, so name shop/url here
+        with telemetry.span('listing', shop=shop, url=target):
+            return fetch_page(target)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(2, max_pages + 1, workers):
+            numbers = range(start, min(start + workers, max_pages + 1))
+            # map() yields in page order, so "no new products" is judged page by page
+            for number, page in zip(numbers, pool.map(fetch, numbers)):
+                if page == [] and render is not None:
+                    logger.info(f"  {shop}: page {number} has no product cards over HTTP, rendering it")
+                    page = render(page_url(url, param, number))
+                if not page:
+                    logger.warning(f"{shop}: page {number} of {url} "
+                                   f"{'could not be fetched' if page is None else 'has no product cards'}; "
+                                   f"the listing stops at page {number - 1}")
+                    return records
+                new = [record for record in page if key(record) not in seen]
+                if not new:
+                    return records
+                seen.update(key(record) for record in new)
+                records.extend(new)
+
+    return records
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Price Analytics - Batch statistics over the full price history
+
+Loads every observation from the PriceStore into NumPy arrays sorted by
+product and time, then computes per-product statistics with segment
+reductions (reduceat / ufunc.at / bincount) instead of Python loops:
+
+- all-time low (and when it was first reached)
+- trailing 7- and 30-day min / avg / max
+- current drop streak: consecutive price changes that were all decreases
+- cross-shop spread of the latest prices per canonical configuration
+
+The result is published as output/price_analytics.json for the API and
+used by PriceMonitor to annotate alerts.
+"""
+
+from datetime import datetime
+from typing import Dict
+
+import numpy as np
+
+from utils.price_store import PriceStore, to_timestamp
+
+DAY = 86400
+WINDOWS = {'7d': 7 * DAY, '30d': 30 * DAY}
+
+# A product not observed for this long is left out of cross-shop spreads
+STALE_AFTER = 2 * DAY
+
+
+def load_arrays(store: PriceStore, since=None) -> Dict:
+    """
+    Observations as column arrays, sorted by product then time.
+
+    Returns:
+        Dict with product_ids (unique, sorted), product (index into
+        product_ids per row), ts, price and starts (first row per product)
+    """
+    rows = store.observations(since=since)
+    if not rows:
+        return {'product_ids': np.array([], dtype=object), 'product': np.array([], dtype=np.int64),
+                'ts': np.array([]), 'price': np.array([], dtype=np.int64),
+                'starts': np.array([], dtype=np.int64)}
+
+    ids, ts, price = zip(*rows)
+    product_ids, product = np.unique(np.array(ids, dtype=object), return_inverse=True)
+    starts = np.flatnonzero(np.r_[True, product[1:] != product[:-1]])
+    return {
+        'product_ids': product_ids,
+        'product': product,
+        'ts': np.array(ts, dtype=np.float64),
+        'price': np.array(price, dtype=np.int64),
+        'starts': starts,
+    }
+
+
+def _drop_streaks(product, price, n_products):
+    """Length and total amount of each product's current streak of drops"""
+    same = product[1:] == product[:-1]
+    changed = np.flatnonzero(same & (price[1:] != price[:-1])) + 1
+    streak = np.zeros(n_products, dtype=np.int64)
+    amount = np.zeros(n_products, dtype=np.int64)
+    if not len(changed):
+        return streak, amount
+
+    owner = product[changed]
+    idx = np.arange(len(changed))
+    first = np.full(n_products, len(changed))
+    last = np.full(n_products, -1)
+    last_increase = np.full(n_products, -1)
+    np.minimum.at(first, owner, idx)
+    np.maximum.at(last, owner, idx)
+    increases = price[changed] > price[changed - 1]
+    np.maximum.at(last_increase, owner[increases], idx[increases])
+
+    has_changes = last >= 0
+    streak[has_changes] = last[has_changes] - np.maximum(last_increase, first - 1)[has_changes]
+
+    # Price before the first drop of the streak minus the current price
+    in_streak = np.flatnonzero(streak > 0)
+    start = changed[last[in_streak] - streak[in_streak] + 1]
+    amount[in_streak] = price[start - 1] - price[changed[last[in_streak]]]
+    return streak, amount
+
+
+def compute_analytics(store: PriceStore, now=None) -> Dict:
+    """
+    Compute the analytics summary for every product in the store.
+
+    Args:
+        store: PriceStore with the observation history
+        now: Reference time for trailing windows (default: latest observation)
+
+    Returns:
+        Dict with generated_at, products (keyed by product_id) and spreads
+        (keyed by canonical_id)
+    """
+    data = load_arrays(store)
+    product_ids, product, ts, price, starts = (
+        data['product_ids'], data['product'], data['ts'], data['price'], data['starts'])
+    n = len(product_ids)
+    summary = {'generated_at': datetime.now().isoformat(), 'products': {}, 'spreads': {}}
+    if not n:
+        return summary
+
+    now = to_timestamp(now) if now is not None else float(ts.max())
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    current = price[ends]
+    last_seen = ts[ends]
+    low = np.minimum.reduceat(price, starts)
+    low_at = np.minimum.reduceat(np.where(price == low[product], ts, np.inf), starts)
+    high = np.maximum.reduceat(price, starts)
+    counts = np.diff(np.r_[starts, len(ts)])
+
+    windows = {}
+    for name, span in WINDOWS.items():
+        mask = ts >= now - span
+        owner = product[mask]
+        w_count = np.bincount(owner, minlength=n)
+        w_sum = np.bincount(owner, weights=price[mask], minlength=n)
+        w_min = np.full(n, np.iinfo(np.int64).max)
+        w_max = np.full(n, -1, dtype=np.int64)
+        np.minimum.at(w_min, owner, price[mask])
+        np.maximum.at(w_max, owner, price[mask])
+        windows[name] = (w_count, w_sum, w_min, w_max)
+
+    streak, streak_amount = _drop_streaks(product, price, n)
+
+    meta = store.products()
+    for i, product_id in enumerate(product_ids):
+        info = meta.get(product_id, {})
+        entry = {
+            'shop': info.get('shop'),
+            'model': info.get('model'),
+            'canonical_id': info.get('canonical_id'),
+            'url': info.get('url'),
+            'current_price': int(current[i]),
+            'last_seen': datetime.fromtimestamp(last_seen[i]).isoformat(),
+            'observations': int(counts[i]),
+            'all_time_low': int(low[i]),
+            'all_time_low_at': datetime.fromtimestamp(low_at[i]).isoformat(),
+            'all_time_high': int(high[i]),
+            'is_all_time_low': bool(current[i] == low[i]),
+            'drop_streak': int(streak[i]),
+            'drop_streak_vnd': int(streak_amount[i]),
+        }
+        for name, (w_count, w_sum, w_min, w_max) in windows.items():
+            entry[name] = {
+                'min': int(w_min[i]),
+                'avg': int(round(w_sum[i] / w_count[i])),
+                'max': int(w_max[i]),
+            } if w_count[i] else None
+        summary['products'][product_id] = entry
+
+    summary['spreads'] = _cross_shop_spreads(summary['products'], current, last_seen, product_ids, now)
+    return summary
+
+
+def _cross_shop_spreads(products, current, last_seen, product_ids, now) -> Dict:
+    """Min/max of the latest prices of each canonical configuration"""
+    canonical = np.array([products[pid]['canonical_id'] or '' for pid in product_ids], dtype=object)
+    fresh = np.flatnonzero((canonical != '') & (last_seen >= now - STALE_AFTER))
+    if not len(fresh):
+        return {}
+
+    groups, group = np.unique(canonical[fresh], return_inverse=True)
+    prices = current[fresh]
+    order = np.lexsort((prices, group))
+    first = np.flatnonzero(np.r_[True, group[order][1:] != group[order][:-1]])
+    lows = np.minimum.reduceat(prices[order], first)
+    highs = np.maximum.reduceat(prices[order], first)
+    shop_counts = np.diff(np.r_[first, len(order)])
+
+    spreads = {}
+    for g, canonical_id in enumerate(groups):
+        best = products[product_ids[fresh[order[first[g]]]]]
+        spreads[canonical_id] = {
+            'min_price': int(lows[g]),
+            'max_price': int(highs[g]),
+            'spread': int(highs[g] - lows[g]),
+            'spread_pct': round(float(highs[g] - lows[g]) / float(lows[g]) * 100, 2),
+            'best_shop': best['shop'],
+            'best_url': best['url'],
+            'offers': int(shop_counts[g]),
+        }
+    return spreads
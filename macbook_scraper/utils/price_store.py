@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Price Store - Append-only SQLite time series of scraped prices
+
+Every monitoring run appends one observation per product instead of
+rewriting a JSON file holding only the last price, so the full history is
+kept and a run costs one batched transaction regardless of history size.
+
+Products are keyed like the old price_history.json (``{shop}_{model}``);
+canonical_id is the SpecParser id shared by the same configuration across
+shops.
+"""
+
+import json
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    shop TEXT NOT NULL,
+    model TEXT NOT NULL,
+    canonical_id TEXT,
+    url TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS observations (
+    ts REAL NOT NULL,
+    shop TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    price INTEGER NOT NULL,
+    UNIQUE (product_id, ts)
+);
+CREATE INDEX IF NOT EXISTS idx_observations_product_ts ON observations (product_id, ts);
+CREATE INDEX IF NOT EXISTS idx_observations_shop_ts ON observations (shop, ts);
+CREATE INDEX IF NOT EXISTS idx_products_canonical ON products (canonical_id);
+"""
+
+
+def product_key(product: Dict) -> str:
+    """History key of a scraped product (same as price_history.json used)"""
+    return f"{product['shop']}_{product['model']}"
+
+
+def to_timestamp(value) -> float:
+    """Unix time from an ISO string, a datetime or a number (now if empty)"""
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return datetime.fromisoformat(value).timestamp()
+
+
+class PriceStore:
+    """Observations and products tables with indexed change queries"""
+
+    def __init__(self, db_path=None):
+        """
+        Args:
+            db_path: SQLite file (default: output/prices.db)
+        """
+        self.db_path = Path(db_path) if db_path else \
+            Path(__file__).parent.parent / "output" / "prices.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM observations LIMIT 1").fetchone() is None
+
+    def record_run(self, products: Iterable[Dict], ts=None) -> int:
+        """
+        Append one observation per priced product in a single transaction.
+
+        A product listed twice in one run keeps its last price. Recording the
+        same run (timestamp) again is a no-op.
+
+        Args:
+            products: Scraped products (shop, model, price_vnd, url, product_id)
+            ts: Scrape time of the run (default: now)
+
+        Returns:
+            Number of observations inserted
+        """
+        ts = to_timestamp(ts)
+        latest = {}
+        for product in products:
+            if product.get('price_vnd') and product.get('shop') and product.get('model'):
+                latest[product_key(product)] = product
+
+        with self.conn:
+            self.conn.executemany(
+                """INSERT INTO products (product_id, shop, model, canonical_id, url, first_seen, last_seen)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (product_id) DO UPDATE SET
+                       canonical_id = COALESCE(excluded.canonical_id, canonical_id),
+                       url = COALESCE(excluded.url, url),
+                       first_seen = MIN(first_seen, excluded.first_seen),
+                       last_seen = MAX(last_seen, excluded.last_seen)""",
+                [
+                    (key, p['shop'], p['model'], p.get('canonical_id') or p.get('product_id'),
+                     p.get('url'), ts, ts)
+                    for key, p in latest.items()
+                ],
+            )
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO observations (ts, shop, product_id, price) VALUES (?, ?, ?, ?)",
+                [(ts, p['shop'], key, int(p['price_vnd'])) for key, p in latest.items()],
+            )
+            return self.conn.total_changes - before
+
+    def changes_at(self, ts, shops: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Each product observed in the run at ``ts`` with its previous price.
+
+        Uses the (shop, ts) index to find the run's observations and the
+        (product_id, ts) index for each product's previous observation.
+
+        Returns:
+            Dicts with product_id, shop, model, canonical_id, url, new_price
+            and old_price (None for products seen for the first time)
+        """
+        ts = to_timestamp(ts)
+        if shops is None:
+            shops = [row['shop'] for row in self.conn.execute("SELECT DISTINCT shop FROM products")]
+        if not shops:
+            return []
+
+        placeholders = ', '.join('?' for _ in shops)
+        rows = self.conn.execute(
+            f"""SELECT o.product_id, o.shop, p.model, p.canonical_id, p.url, o.price AS new_price,
+                       (SELECT prev.price FROM observations prev
+                         WHERE prev.product_id = o.product_id AND prev.ts < o.ts
+                         ORDER BY prev.ts DESC LIMIT 1) AS old_price
+                FROM observations o
+                JOIN products p ON p.product_id = o.product_id
+                WHERE o.shop IN ({placeholders}) AND o.ts = ?
+                ORDER BY o.shop, p.model""",
+            (*shops, ts),
+        )
+        return [dict(row) for row in rows]
+
+    def history(self, product_id: str, since=None) -> List[Dict]:
+        """Observations of one product, oldest first"""
+        rows = self.conn.execute(
+            "SELECT ts, price FROM observations WHERE product_id = ? AND ts >= ? ORDER BY ts",
+            (product_id, to_timestamp(since) if since is not None else 0),
+        )
+        return [dict(row) for row in rows]
+
+    def observations(self, since=None) -> List[tuple]:
+        """All (product_id, ts, price) rows, ordered by product then time"""
+        return self.conn.execute(
+            "SELECT product_id, ts, price FROM observations WHERE ts >= ? ORDER BY product_id, ts",
+            (to_timestamp(since) if since is not None else 0,),
+        ).fetchall()
+
+    def products(self) -> Dict[str, Dict]:
+        """Product metadata keyed by product_id"""
+        rows = self.conn.execute("SELECT product_id, shop, model, canonical_id, url FROM products")
+        return {row['product_id']: dict(row) for row in rows}
+
+    def import_history_json(self, path) -> int:
+        """
+        Migrate a legacy price_history.json (last price per shop_model key)
+        into the store as one observation per product at its last_updated time.
+
+        Returns:
+            Number of observations imported
+        """
+        path = Path(path)
+        if not path.exists():
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+
+        imported = 0
+        by_ts = {}
+        for entry in history.values():
+            if entry.get('price_vnd') and entry.get('shop') and entry.get('model'):
+                by_ts.setdefault(entry.get('last_updated'), []).append(entry)
+        for last_updated, entries in sorted(by_ts.items(), key=lambda item: to_timestamp(item[0])):
+            imported += self.record_run(entries, ts=last_updated)
+        return imported
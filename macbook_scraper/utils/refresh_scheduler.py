@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Refresh Scheduler - Volatility-driven selection of shop pages to re-scrape
+
+Every scraped page (a shop category URL) is treated as a source that changes
+at an unknown Poisson rate. The rate is estimated from the price history
+(how often a page's offers changed between two observations) and used to
+rank pages by the probability that they changed since we last looked.
+Each tick only the most likely-stale pages are refreshed, within a global
+page budget.
+"""
+
+import hashlib
+import json
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def listing_offers(records: List[Dict]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """(href or name, price text) of every card record on a listing page"""
+    return [(record.get('href') or record.get('name'), record.get('price_text')) for record in records]
+
+
+class RefreshScheduler:
+    """Pick the pages worth re-scraping on this tick"""
+
+    def __init__(self, state_file=None, budget=6, min_interval_hours=1.0,
+                 max_interval_hours=24.0, default_rate=1 / 24, min_observations=3):
+        """
+        Args:
+            state_file: JSON file holding per-page change statistics
+            budget: Maximum number of pages to refresh per tick
+            min_interval_hours: Never refresh a page more often than this
+            max_interval_hours: Always refresh a page at least this often
+            default_rate: Assumed changes/hour for pages with no history
+            min_observations: Observations needed before a page's own rate is trusted
+        """
+        self.state_file = Path(state_file) if state_file else \
+            Path(__file__).parent.parent / "output" / "refresh_schedule.json"
+        self.budget = budget
+        self.min_interval_hours = min_interval_hours
+        self.max_interval_hours = max_interval_hours
+        self.default_rate = default_rate
+        self.min_observations = min_observations
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict:
+        """Load scheduler state"""
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'pages': {}, 'shops': {}}
+
+    def save_state(self):
+        """Save scheduler state"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+
+    @staticmethod
+    def page_key(shop: str, url: str) -> str:
+        return f"{shop}|{url}"
+
+    @staticmethod
+    def _fingerprint(offers: Iterable[Tuple]) -> str:
+        """Hash of (url, price) offers, insensitive to ordering"""
+        lines = sorted(f"{url}={price}" for url, price in offers)
+        return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _product_offers(products: List[Dict]) -> List[Tuple]:
+        return [(p.get('url') or p.get('model'), p.get('price_vnd')) for p in products]
+
+    @staticmethod
+    def _estimate_rate(observations: int, changes: int, observed_hours: float) -> Optional[float]:
+        """
+        Estimate changes/hour from periodic observations.
+
+        Uses the bias-reduced estimator -ln((n - X + 0.5) / (n + 0.5)) / I
+        (Cho & Garcia-Molina), which stays finite when every observation
+        saw a change. Pages that never changed are credited half a change
+        over the observed window so they still age towards a refresh.
+        """
+        if observations <= 0 or observed_hours <= 0:
+            return None
+        interval = observed_hours / observations
+        ratio = (observations - changes + 0.5) / (observations + 0.5)
+        return max(-math.log(ratio) / interval, 0.5 / observed_hours)
+
+    def _observe(self, stats: Dict, fingerprint: str, ts: datetime):
+        """Fold one observation of a page (or shop) into its statistics"""
+        last_seen = stats.get('last_observed')
+        if last_seen and stats.get('fingerprint'):
+            hours = (ts - datetime.fromisoformat(last_seen)).total_seconds() / 3600
+            if hours > 0:
+                stats['observations'] = stats.get('observations', 0) + 1
+                stats['observed_hours'] = stats.get('observed_hours', 0.0) + hours
+                if fingerprint != stats['fingerprint']:
+                    stats['changes'] = stats.get('changes', 0) + 1
+        stats['fingerprint'] = fingerprint
+        stats['last_observed'] = ts.isoformat()
+
+    def record_page(self, shop: str, page: Dict, offers: List[Tuple], ts: Optional[datetime] = None):
+        """Record the (url, price) offers found on a freshly scraped page"""
+        ts = ts or datetime.now()
+        key = self.page_key(shop, page['url'])
+        stats = self.state['pages'].setdefault(key, {
+            'shop': shop,
+            'name': page.get('name'),
+            'url': page['url'],
+        })
+        self._observe(stats, self._fingerprint(offers), ts)
+        stats['last_refreshed'] = ts.isoformat()
+
+    def record_run(self, shop: str, pages: List[Dict], ts: Optional[datetime] = None):
+        """
+        Record a scraper run of ``shop``
+
+        Args:
+            pages: The run's per-page results, as in scrape()['pages']
+                ({'name', 'url', 'status', 'offers', 'products'}). Each page
+                is fingerprinted on its 'offers', every card it listed before
+                the run's URLFrontier and cross-page dedup, so overlapping
+                pages don't depend on which one listed a product first. Pages
+                that failed or listed no cards keep their previous state.
+        """
+        for page in pages:
+            if page['status'] == 'done' and page.get('offers'):
+                self.record_page(shop, page, page['offers'], ts)
+
+    def seed_from_snapshots(self, snapshots: Iterable[Tuple[float, Dict]]):
+        """
+        Bootstrap shop-level change rates from historical runs, as yielded by
+        SnapshotArchive.iter_snapshots(). Older runs have no per-page
+        attribution, so they only inform the shop prior.
+        """
+        runs = []
+        for ts, data in snapshots:
+            if isinstance(data, dict):
+                runs.append((datetime.fromtimestamp(ts), data.get('products', [])))
+
+        for ts, products in sorted(runs, key=lambda s: s[0]):
+            by_shop = {}
+            for product in products:
+                by_shop.setdefault(product.get('shop'), []).append(product)
+            for shop, shop_products in by_shop.items():
+                stats = self.state['shops'].setdefault(shop, {})
+                self._observe(stats, self._fingerprint(self._product_offers(shop_products)), ts)
+
+    def shop_rate(self, shop: str) -> float:
+        """Change rate for a shop, pooling all of its pages"""
+        observations = changes = 0
+        observed_hours = 0.0
+        pooled = [self.state['shops'].get(shop, {})]
+        pooled += [s for s in self.state['pages'].values() if s.get('shop') == shop]
+        for stats in pooled:
+            observations += stats.get('observations', 0)
+            changes += stats.get('changes', 0)
+            observed_hours += stats.get('observed_hours', 0.0)
+
+        rate = self._estimate_rate(observations, changes, observed_hours)
+        return rate if rate is not None else self.default_rate
+
+    def page_rate(self, shop: str, url: str) -> float:
+        """Change rate for one page, falling back to the shop's rate"""
+        stats = self.state['pages'].get(self.page_key(shop, url), {})
+        if stats.get('observations', 0) >= self.min_observations:
+            rate = self._estimate_rate(stats['observations'], stats.get('changes', 0),
+                                       stats['observed_hours'])
+            if rate is not None:
+                return rate
+        return self.shop_rate(shop)
+
+    def plan(self, shop_pages: Dict[str, List[Dict]], now: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+        """
+        Choose pages to refresh on this tick.
+
+        Args:
+            shop_pages: Mapping of shop name to its candidate pages
+            now: Current time (defaults to datetime.now())
+
+        Returns:
+            Mapping of shop name to the pages to scrape, in original page order
+        """
+        now = now or datetime.now()
+        candidates = []
+
+        for shop, pages in shop_pages.items():
+            for index, page in enumerate(pages):
+                stats = self.state['pages'].get(self.page_key(shop, page['url']), {})
+                last_refreshed = stats.get('last_refreshed')
+                if last_refreshed:
+                    age = (now - datetime.fromisoformat(last_refreshed)).total_seconds() / 3600
+                else:
+                    age = math.inf
+
+                if age < self.min_interval_hours:
+                    continue
+
+                rate = self.page_rate(shop, page['url'])
+                # Probability the page changed since it was last scraped
+                stale_probability = 1.0 if math.isinf(age) else 1 - math.exp(-rate * age)
+                overdue = age >= self.max_interval_hours
+                candidates.append((overdue, stale_probability, shop, index, page))
+
+        candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+        selected = candidates[:self.budget]
+
+        plan = {}
+        for _, _, shop, index, page in sorted(selected, key=lambda c: (c[2], c[3])):
+            plan.setdefault(shop, []).append(page)
+        return plan
+
+    def describe(self, shop_pages: Dict[str, List[Dict]]) -> List[Dict]:
+        """Per-page rates and refresh intervals, for logging"""
+        rows = []
+        for shop, pages in shop_pages.items():
+            for page in pages:
+                rate = self.page_rate(shop, page['url'])
+                rows.append({
+                    'shop': shop,
+                    'page': page.get('name'),
+                    'changes_per_day': round(rate * 24, 2),
+                    'expected_interval_hours': round(1 / rate, 1) if rate > 0 else None,
+                })
+        return rows
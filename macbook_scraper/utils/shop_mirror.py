@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Shop Mirror - Point the scrapers at a local copy of the shops
+
+When VIETMAC_SHOP_MIRROR is set (e.g. http://127.0.0.1:8900, the address
+of mock_shop_server.py), every shop URL the scrapers start from is
+rewritten to <mirror>/<shop host>/<path>, so a whole run - listing pages,
+product links, detail pages - stays on the mirror and never reaches the
+real shops. Unset, URLs are returned unchanged.
+"""
+
+import os
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+MIRROR_ENV = 'VIETMAC_SHOP_MIRROR'
+
+
+def mirror_base() -> Optional[str]:
+    """Mirror address from the environment (None when scraping the real shops)"""
+    base = os.environ.get(MIRROR_ENV, '').strip()
+    return base.rstrip('/') or None
+
+
+def mirror_url(url: str) -> str:
+    """https://shop.com/path?q -> <mirror>/shop.com/path?q"""
+    base = mirror_base()
+    if not base or not url or url.startswith(base):
+        return url
+    parts = urlsplit(url)
+    rewritten = f"{base}/{parts.netloc}{parts.path}"
+    return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+
+def mirror_pages(pages: List[Dict]) -> List[Dict]:
+    """A scraper's PAGES with every 'url' mirrored"""
+    return [{**page, 'url': mirror_url(page['url'])} for page in pages]
+
+
+def mirror_host() -> Optional[str]:
+    """Host of the mirror, for Scrapy's allowed_domains"""
+    base = mirror_base()
+    return urlsplit(base).hostname if base else None
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Sitemap Discovery - Changed MacBook product pages from the shops' XML sitemaps
+
+Instead of rendering category pages to find product links, discovery
+streams each shop's sitemap (following sitemap indexes) through an
+incremental XML parser, so even a sitemap of every product a shop sells is
+read in constant memory. It keeps the MacBook product URLs and compares
+each one's <lastmod> with when we last crawled that URL:
+
+    discovery = SitemapDiscovery()
+    changed = discovery.discover('cellphones', CellphonesScraper.SITEMAPS)
+    # -> [{'url': ..., 'lastmod': 1729300000.0}, ...] to scrape as detail pages
+
+A URL is stale when it was never crawled, when its lastmod is newer than
+the last crawl, or (no lastmod given) when the last crawl is older than
+max_age_hours. Child sitemaps whose lastmod predates the shop's last
+complete discovery run are not downloaded at all. Sitemaps reach products
+the category grids leave out (see MISSING_MACBOOKS_ANALYSIS.md).
+"""
+
+import gzip
+import json
+import logging
+import re
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Slug words of accessories that mention MacBook in their URL (cases, chargers...)
+ACCESSORY_WORDS = {
+    'lung', 'tui', 'balo', 'skin', 'case', 'cover', 'sac', 'adapter', 'hub', 'chuot',
+}
+# Accessories named by words that product slugs use too (gia-re, cao-cap,
+# da-kich-hoat), so only the whole phrase counts
+ACCESSORY_PHRASES = (
+    'op-lung', 'bao-da', 'mieng-dan', 'dan-man-hinh', 'cuong-luc', 'de-tan-nhiet',
+    'gia-do', 'cap-chuyen', 'phu-phim', 'ban-phim-phu', 'lot-chuot',
+)
+
+
+def is_macbook_url(url: str) -> bool:
+    """Whether a sitemap URL looks like a MacBook product page"""
+    path = urlsplit(url).path.lower()
+    if 'macbook' not in path:
+        return False
+    words = [word for word in re.split(r'[^a-z0-9]+', path.rsplit('/', 1)[-1]) if word]
+    slug = f"-{'-'.join(words)}-"
+    return not (set(words) & ACCESSORY_WORDS or any(f"-{phrase}-" in slug for phrase in ACCESSORY_PHRASES))
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """W3C datetime (2024-05-01, 2024-05-01T08:00:00+07:00) -> timestamp"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def iter_entries(stream) -> Iterator[Tuple[str, str, Optional[float]]]:
+    """
+    Stream (kind, loc, lastmod) out of a sitemap file object, where kind is
+    'url' (a page of a urlset) or 'sitemap' (a child of a sitemap index).
+    Parsed elements are dropped as soon as they are read.
+    """
+    root = None
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if root is None:
+            root = elem
+            continue
+        if event != 'end':
+            continue
+        kind = elem.tag.rsplit('}', 1)[-1]
+        if kind not in ('url', 'sitemap'):
+            continue
+
+        loc = lastmod = None
+        for child in elem:
+            name = child.tag.rsplit('}', 1)[-1]
+            if name == 'loc':
+                loc = (child.text or '').strip()
+            elif name == 'lastmod':
+                lastmod = parse_lastmod(child.text)
+        if loc:
+            yield kind, loc, lastmod
+        root.clear()
+
+
+class SitemapDiscovery:
+    """Streamed sitemap reading plus the per-URL crawl state it is compared with"""
+
+    def __init__(self, state_file=None, session=None, max_age_hours=24.0, max_depth=3):
+        """
+        Args:
+            state_file: JSON file with the last crawl of every discovered URL
+            session: requests.Session to fetch sitemaps with
+            max_age_hours: Re-crawl URLs without a lastmod after this long
+            max_depth: Deepest sitemap index nesting followed
+        """
+        self.state_file = Path(state_file) if state_file else \
+            Path(__file__).parent.parent / "output" / "sitemap_state.json"
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.headers['User-Agent'] = 'Mozilla/5.0 (compatible; VietMacBot/1.0)'
+        self.session = session
+        self.max_age_hours = max_age_hours
+        self.max_depth = max_depth
+        self.state = self._load_state()
+        self.stats = {}
+
+    def _load_state(self) -> Dict:
+        """Load crawl state"""
+        if self.state_file.exists():
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'urls': {}, 'shops': {}}
+
+    def save_state(self):
+        """Save crawl state"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2, ensure_ascii=False)
+
+    def _entries(self, shop: str, url: str, stats: Dict, depth=0) -> Iterator[Tuple[str, Optional[float]]]:
+        """(loc, lastmod) of every page under a sitemap, following indexes"""
+        response = self.session.get(url, stream=True, timeout=30)
+        response.raise_for_status()
+        response.raw.decode_content = True
+        stream = gzip.GzipFile(fileobj=response.raw) if urlsplit(url).path.endswith('.gz') else response.raw
+        stats['sitemaps'] += 1
+
+        children = []
+        try:
+            for kind, loc, lastmod in iter_entries(stream):
+                if kind == 'url':
+                    yield loc, lastmod
+                else:
+                    children.append((loc, lastmod))
+        finally:
+            response.close()
+
+        last_complete = self.state['shops'].get(shop, {}).get('last_complete')
+        for loc, lastmod in children:
+            if depth >= self.max_depth:
+                logger.warning(f"Sitemap index nested too deep, not following {loc}")
+                continue
+            if lastmod is not None and last_complete is not None and lastmod <= last_complete:
+                stats['sitemaps_skipped'] += 1
+                continue
+            yield from self._entries(shop, loc, stats, depth + 1)
+
+    def is_stale(self, url: str, lastmod: Optional[float], now: Optional[float] = None) -> bool:
+        """Whether a page may have changed since we last crawled it"""
+        entry = self.state['urls'].get(url)
+        if entry is None:
+            return True
+        if lastmod is not None:
+            return lastmod > entry['crawled_at']
+        return (now or time.time()) - entry['crawled_at'] >= self.max_age_hours * 3600
+
+    def discover(self, shop: str, sitemaps: List[str]) -> List[Dict]:
+        """
+        MacBook product pages of a shop that changed since their last crawl
+
+        Args:
+            shop: Shop name (keys the crawl state)
+            sitemaps: Sitemap (or sitemap index) URLs of the shop
+
+        Returns:
+            [{'url', 'lastmod'}] in sitemap order; counts are left in self.stats[shop]
+        """
+        now = time.time()
+        stats = {'sitemaps': 0, 'sitemaps_skipped': 0, 'urls': 0, 'macbooks': 0,
+                 'changed': 0, 'errors': []}
+        changed, seen = [], set()
+
+        for sitemap in sitemaps:
+            try:
+                for loc, lastmod in self._entries(shop, sitemap, stats):
+                    stats['urls'] += 1
+                    if loc in seen or not is_macbook_url(loc):
+                        continue
+                    seen.add(loc)
+                    stats['macbooks'] += 1
+                    if self.is_stale(loc, lastmod, now):
+                        changed.append({'url': loc, 'lastmod': lastmod})
+            except Exception as e:
+                logger.warning(f"Could not read sitemap {sitemap}: {e}")
+                stats['errors'].append(f"{sitemap}: {e}")
+
+        stats['changed'] = len(changed)
+        self.stats[shop] = stats
+        return changed
+
+    def mark_crawled(self, shop: str, url: str, ts: Optional[float] = None):
+        """Record that a discovered page was scraped"""
+        self.state['urls'][url] = {'shop': shop, 'crawled_at': ts or time.time()}
+
+    def mark_complete(self, shop: str, started_at: float):
+        """
+        Record a discovery run in which every stale page of the shop was
+        scraped; child sitemaps older than its start are skipped from now on.
+        """
+        self.state['shops'].setdefault(shop, {})['last_complete'] = started_at
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Snapshot Archive - Keyframe + delta history of scraped runs
+
+Consecutive runs are almost identical, so instead of a full copy per run
+the archive stores a full keyframe every ``keyframe_interval`` runs and,
+in between, only the offers that were added, removed or changed. Each
+keyframe starts a new gzipped JSON-lines segment that its deltas are
+appended to, so reconstructing any run reads one segment of at most
+``keyframe_interval`` lines.
+
+Works for both snapshot shapes in the repo:
+- update_prices.py runs: {"timestamp", "products", "summary"}
+- Scrapy feed exports (data/outputs/macbook_prices_*.json): a list of items
+"""
+
+import gzip
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.price_store import to_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+def offer_key(offer: Dict) -> str:
+    """Identity of an offer across runs: shop plus URL (or model)"""
+    shop = offer.get('shop') or offer.get('shop_name') or ''
+    return f"{shop}|{offer.get('url') or offer.get('model') or ''}"
+
+
+def split_snapshot(snapshot) -> Tuple[Dict, Dict[str, Dict]]:
+    """Split a snapshot into its metadata and its offers keyed by offer_key"""
+    if isinstance(snapshot, list):
+        meta, products = {'_list': True}, snapshot
+    else:
+        meta = {k: v for k, v in snapshot.items() if k != 'products'}
+        products = snapshot.get('products', [])
+
+    offers = {}
+    for offer in products:
+        key = base = offer_key(offer)
+        n = 1
+        while key in offers:
+            n += 1
+            key = f"{base}#{n}"
+        offers[key] = offer
+    return meta, offers
+
+
+def join_snapshot(meta: Dict, offers: Dict[str, Dict]):
+    """Inverse of split_snapshot"""
+    if meta.get('_list'):
+        return list(offers.values())
+    return {**meta, 'products': list(offers.values())}
+
+
+class SnapshotArchive:
+    """Append-only archive of run snapshots in one directory"""
+
+    def __init__(self, archive_dir=None, keyframe_interval=24):
+        """
+        Args:
+            archive_dir: Directory of segment files (default: output/archive/products)
+            keyframe_interval: Runs per segment (one keyframe + deltas)
+        """
+        self.archive_dir = Path(archive_dir) if archive_dir else \
+            Path(__file__).parent.parent / "output" / "archive" / "products"
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        self.keyframe_interval = keyframe_interval
+
+    def segments(self) -> List[Path]:
+        """Segment files, oldest first"""
+        return sorted(self.archive_dir.glob("segment_*.jsonl.gz"))
+
+    @staticmethod
+    def _load_segment(path: Path) -> Tuple[List[Dict], bool]:
+        """(readable records, whether the segment ends in a torn record)"""
+        records = []
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    records.append(json.loads(line))
+        except (EOFError, OSError, ValueError):
+            return records, True
+        return records, False
+
+    def _read_segment(self, path: Path) -> List[Dict]:
+        records, torn = self._load_segment(path)
+        if torn:
+            # A run interrupted while appending leaves a torn last record
+            logger.warning(f"Ignoring truncated tail of {path.name}")
+        return records
+
+    def _repair_tail(self, path: Path, records: List[Dict]) -> bool:
+        """
+        Drop a torn last record from a segment before appending to it:
+        gzip members written after a torn one could never be read. The
+        readable ``records`` are rewritten to a temporary file that
+        replaces the segment. Returns whether the segment still exists.
+        """
+        logger.warning(f"Dropping torn last record of {path.name} ({len(records)} runs kept)")
+        if not records:
+            path.unlink()
+            return False
+        tmp = path.with_name(path.name + '.tmp')
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        os.replace(tmp, path)
+        return True
+
+    @staticmethod
+    def _apply(state: Optional[Tuple[Dict, Dict]], record: Dict) -> Tuple[Dict, Dict]:
+        if record['type'] == 'keyframe':
+            return record['meta'], dict(record['offers'])
+        _, offers = state
+        for key in record['removed']:
+            offers.pop(key, None)
+        offers.update(record['changed'])
+        offers.update(record['added'])
+        return record['meta'], offers
+
+    def _replay(self, path: Path, until: Optional[float] = None, records: Optional[List[Dict]] = None):
+        """Yield (ts, meta, offers) for each run of a segment up to ``until``"""
+        state = None
+        for record in self._read_segment(path) if records is None else records:
+            if until is not None and record['ts'] > until:
+                break
+            state = self._apply(state, record)
+            yield record['ts'], state[0], state[1]
+
+    def _latest(self):
+        """(segment, runs in it, last ts, meta, offers) of the newest run"""
+        segments = self.segments()
+        records = []
+        while segments:
+            # Read the newest segment once, for both the tail check and the replay
+            records, torn = self._load_segment(segments[-1])
+            if not torn or self._repair_tail(segments[-1], records):
+                break
+            segments.pop()
+        if not segments or not records:
+            return None
+        last = None
+        for ts, meta, offers in self._replay(segments[-1], records=records):
+            last = (ts, meta, offers)
+        return (segments[-1], len(records)) + last
+
+    def append(self, snapshot, ts=None) -> str:
+        """
+        Archive one run.
+
+        Args:
+            snapshot: Run result dict or Scrapy item list
+            ts: Run time (default: the snapshot's 'timestamp')
+
+        Returns:
+            'keyframe', 'delta' or 'skipped' (run not newer than the archive)
+        """
+        if ts is None and isinstance(snapshot, dict):
+            ts = snapshot.get('timestamp')
+        ts = to_timestamp(ts)
+        meta, offers = split_snapshot(snapshot)
+
+        latest = self._latest()
+        if latest is not None and ts <= latest[2]:
+            return 'skipped'
+
+        if latest is None or latest[1] >= self.keyframe_interval:
+            stamp = datetime.fromtimestamp(ts).strftime('%Y%m%d_%H%M%S')
+            path = self.archive_dir / f"segment_{stamp}.jsonl.gz"
+            record = {'ts': ts, 'type': 'keyframe', 'meta': meta, 'offers': offers}
+        else:
+            path, previous = latest[0], latest[4]
+            record = {
+                'ts': ts,
+                'type': 'delta',
+                'meta': meta,
+                'added': {k: v for k, v in offers.items() if k not in previous},
+                'changed': {k: v for k, v in offers.items() if k in previous and previous[k] != v},
+                'removed': [k for k in previous if k not in offers],
+            }
+
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        # Each append adds a gzip member; readers see one continuous stream
+        with gzip.open(path, 'at', encoding='utf-8') as f:
+            f.write(line)
+        return record['type']
+
+    def timestamps(self) -> List[float]:
+        """Times of all archived runs, oldest first"""
+        return [
+            record['ts']
+            for path in self.segments()
+            for record in self._read_segment(path)
+        ]
+
+    def reconstruct(self, at=None):
+        """
+        Snapshot as of ``at`` (latest run at or before it; newest if omitted).
+
+        Only the segment containing that run is read.
+        """
+        at = to_timestamp(at) if at is not None else None
+        candidates = self.segments()
+        if at is not None:
+            stamp = datetime.fromtimestamp(at).strftime('%Y%m%d_%H%M%S')
+            candidates = [p for p in candidates if p.name[len('segment_'):-len('.jsonl.gz')] <= stamp]
+        if not candidates:
+            return None
+
+        result = None
+        for _, meta, offers in self._replay(candidates[-1], until=at):
+            result = (meta, offers)
+        return join_snapshot(*result) if result else None
+
+    def iter_snapshots(self) -> Iterator[Tuple[float, object]]:
+        """Every archived run as (ts, snapshot), oldest first"""
+        for path in self.segments():
+            for ts, meta, offers in self._replay(path):
+                yield ts, join_snapshot(meta, dict(offers))
+
+    def stats(self) -> Dict:
+        segments = self.segments()
+        return {
+            'segments': len(segments),
+            'runs': len(self.timestamps()),
+            'bytes': sum(p.stat().st_size for p in segments),
+        }
+
+    def import_files(self, files: List[Path]) -> Tuple[Dict[str, int], List[Path]]:
+        """
+        Convert full-copy snapshot files into the archive, oldest first.
+
+        Run time comes from the snapshot's 'timestamp' or, for Scrapy
+        exports, from the _YYYYMMDD_HHMMSS suffix of the file name.
+        Empty and unreadable files are skipped.
+
+        Returns:
+            Counts of 'keyframe', 'delta' and 'skipped' runs, and the files
+            that were archived (only these are safe to delete)
+        """
+        loaded = []
+        counts = {'keyframe': 0, 'delta': 0, 'skipped': 0}
+        for path in files:
+            path = Path(path)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                ts = snapshot.get('timestamp') if isinstance(snapshot, dict) else None
+                if ts is None:
+                    ts = datetime.strptime('_'.join(path.stem.split('_')[-2:]), '%Y%m%d_%H%M%S')
+                ts = to_timestamp(ts)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping {path}: {e}")
+                counts['skipped'] += 1
+                continue
+            if not snapshot:
+                counts['skipped'] += 1
+                continue
+            loaded.append((ts, path, snapshot))
+
+        imported = []
+        for ts, path, snapshot in sorted(loaded, key=lambda item: item[0]):
+            kind = self.append(snapshot, ts=ts)
+            counts[kind] += 1
+            if kind != 'skipped':
+                imported.append(path)
+        return counts, imported
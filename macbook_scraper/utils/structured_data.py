@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Structured Data - Product records from JSON embedded in a page
+
+Many storefronts ship their product data twice: once as markup and once as
+JSON for search engines (JSON-LD Product / Offer / ItemList blocks) or for
+their frontend framework (hydration state such as Next.js __NEXT_DATA__).
+Finding those <script> blocks is a plain substring search, and decoding
+them is one JSON parse (orjson when installed), far cheaper than a
+BeautifulSoup tree plus a selector query per card:
+
+    records = structured_records(html, min_count=card_count(html, 'product-info'))
+    if not records:
+        records = ...  # CSS selectors, as before
+
+Records have the shape of the scrapers' card records (utils/dom_extract):
+{'name', 'price_text', 'href', 'image', 'product_id'}, with prices written
+the way the shops display them (21.990.000đ).
+"""
+
+import json
+import re
+from typing import Dict, Iterator, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from utils.url_frontier import canonicalize_url
+
+Page = Union[str, bytes]
+
+JSON_LD_MARKER = 'application/ld+json'
+HYDRATION_MARKERS = ('id="__NEXT_DATA__"',)
+
+# Keys a hydration-state product is recognised by, most specific first
+NAME_KEYS = ('name', 'displayName', 'productName', 'title')
+PRICE_KEYS = ('currentPrice', 'salePrice', 'sale_price', 'specialPrice', 'special_price',
+              'finalPrice', 'final_price', 'price')
+URL_KEYS = ('url', 'urlPath', 'url_path', 'slug', 'href', 'link')
+IMAGE_KEYS = ('image', 'imageUrl', 'image_url', 'thumbnail', 'thumb')
+ID_KEYS = ('productId', 'productID', 'sku', 'id')
+
+# Offer fields holding the discounted price, and priceSpecification types
+# that describe the price before the discount
+SALE_KEYS = PRICE_KEYS[:-1]
+LIST_PRICE_TYPES = ('StrikethroughPrice', 'ListPrice', 'MSRP')
+
+# The rest of a class attribute up to one of its tokens: class="a b token
+CLASS_VALUE = re.compile(r'''\s*=\s*["']?[^"'>]*''')
+CLASS_VALUE_BYTES = re.compile(CLASS_VALUE.pattern.encode())
+
+
+def loads(data: Page):
+    """Decode JSON (orjson when installed)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def script_blocks(html: Page, marker: str) -> Iterator[Page]:
+    """Bodies of the <script> tags whose opening tag contains ``marker``"""
+    if isinstance(html, bytes):
+        marker, open_end, close = marker.encode(), b'>', b'</script'
+    else:
+        open_end, close = '>', '</script'
+
+    pos = html.find(marker)
+    while pos != -1:
+        start = html.find(open_end, pos) + 1
+        end = html.find(close, start)
+        if start == 0 or end == -1:
+            return
+        yield html[start:end]
+        pos = html.find(marker, end)
+
+
+def price_text(value) -> Optional[str]:
+    """21990000 / "21990000.00" -> '21.990.000đ' (None for missing or zero)"""
+    try:
+        amount = int(round(float(value)))
+    except (TypeError, ValueError):
+        return str(value) if value else None
+    return f"{amount:,}".replace(',', '.') + 'đ' if amount > 0 else None
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _image(value) -> Optional[str]:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get('url') or value.get('contentUrl')
+    return value if isinstance(value, str) else None
+
+
+def _json_ld_products(data) -> Iterator[Dict]:
+    """Product nodes of a JSON-LD document, through @graph, ItemList and ProductGroup"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        types = node.get('@type')
+        if types == 'Product' or (isinstance(types, list) and 'Product' in types):
+            yield node
+            continue
+        for key in ('hasVariant', 'item', 'itemListElement', 'mainEntity', '@graph'):
+            if key in node:
+                stack.append(node[key])
+
+
+def _amount(value) -> Optional[float]:
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return amount if amount > 0 else None
+
+
+def _offer_price(offers):
+    """
+    The price a product sells at, across its offers.
+
+    A SalePrice priceSpecification or a sale field (salePrice, specialPrice,
+    ...) wins over the offer's price, which some shops fill with the list
+    price; list-price specifications are never used. The lowest candidate
+    is taken, as lowPrice would be.
+    """
+    offers = offers if isinstance(offers, list) else [offers]
+    sale, regular = [], []
+    for offer in offers:
+        if not isinstance(offer, dict):
+            continue
+        specs = offer.get('priceSpecification')
+        for spec in specs if isinstance(specs, list) else [specs]:
+            if not isinstance(spec, dict):
+                continue
+            price_type = str(spec.get('priceType') or '')
+            if price_type.endswith('SalePrice'):
+                sale.append(spec.get('price'))
+            elif not price_type.endswith(LIST_PRICE_TYPES):
+                regular.append(spec.get('price'))
+        sale.extend(offer[k] for k in SALE_KEYS if k in offer)
+        regular.extend(offer[k] for k in ('price', 'lowPrice') if k in offer)
+
+    for candidates in (sale, regular):
+        amounts = [a for a in map(_amount, candidates) if a]
+        if amounts:
+            return min(amounts)
+    # Not a number: keep the text as written
+    return next((value for value in regular if value), None)
+
+
+def _json_ld_record(product: Dict) -> Dict:
+    offer = _first(product.get('offers')) or {}
+    if not isinstance(offer, dict):
+        offer = {}
+    return {
+        'name': product.get('name'),
+        'price_text': price_text(_offer_price(product.get('offers'))),
+        'href': product.get('url') or offer.get('url'),
+        'image': _image(product.get('image')),
+        'product_id': product.get('productID') or product.get('sku'),
+    }
+
+
+def _hydration_records(data) -> Iterator[Dict]:
+    """Product-like objects (a name and a price) anywhere in hydration state"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        name = next((node[k] for k in NAME_KEYS if isinstance(node.get(k), str)), None)
+        price = next((node[k] for k in PRICE_KEYS
+                      if isinstance(node.get(k), (int, float)) and not isinstance(node.get(k), bool)), None)
+        if name and price:
+            href = next((node[k] for k in URL_KEYS if isinstance(node.get(k), str)), None)
+            yield {
+                'name': name,
+                'price_text': price_text(price),
+                'href': href,
+                'image': next((_image(node[k]) for k in IMAGE_KEYS if node.get(k)), None),
+                'product_id': next((str(node[k]) for k in ID_KEYS if node.get(k) is not None), None),
+            }
+            continue
+        stack.extend(reversed(list(node.values())))
+
+
+def structured_records(html: Page, min_count: int = 1) -> Optional[List[Dict]]:
+    """
+    Product records embedded in a page, or None when it has none to offer
+
+    Args:
+        html: Page HTML (str or bytes)
+        min_count: Fewest records to accept. Pass the number of product cards
+            on the page (card_count) so a block that describes only some of
+            them (one featured product, the first batch of a grid) is not
+            mistaken for the whole listing.
+    """
+    records, seen = [], set()
+
+    def add(record):
+        key = record['href'] or record['name']
+        if record['name'] and key not in seen:
+            seen.add(key)
+            records.append(record)
+
+    for block in script_blocks(html, JSON_LD_MARKER):
+        try:
+            data = loads(block)
+        except ValueError:
+            continue
+        for product in _json_ld_products(data):
+            add(_json_ld_record(product))
+
+    if not records:
+        for marker in HYDRATION_MARKERS:
+            for block in script_blocks(html, marker):
+                try:
+                    data = loads(block)
+                except ValueError:
+                    continue
+                for record in _hydration_records(data):
+                    add(record)
+
+    return records if records and len(records) >= min_count else None
+
+
+def card_count(html: Page, class_name: str) -> int:
+    """
+    Elements with ``class_name`` among their classes in a str or bytes page
+
+    Matches the class as a token, like the CSS selector .class_name does, so
+    cards written class="product-info p-2" or class='product-info' count too.
+    """
+    if isinstance(html, bytes):
+        value, attr, class_name, delimiters = CLASS_VALUE_BYTES, b'class', class_name.encode(), b' \t\r\n"\'=>'
+    else:
+        value, attr, delimiters = CLASS_VALUE, 'class', ' \t\r\n"\'=>'
+
+    # Find the name first (a substring search) and only then check it is a
+    # whole token inside a class attribute
+    count, size = 0, len(class_name)
+    pos = html.find(class_name)
+    while pos != -1:
+        end = pos + size
+        if html[pos - 1:pos] in delimiters and html[end:end + 1] in delimiters:
+            start = html.rfind(attr, 0, pos)
+            if start > 0 and html[start - 1:start].isspace() and value.fullmatch(html, start + len(attr), pos):
+                count += 1
+        pos = html.find(class_name, end)
+    return count
+
+
+def record_for_url(records: Optional[List[Dict]], url: str) -> Optional[Dict]:
+    """
+    The record describing the product page at ``url``
+
+    Product pages also embed related and recently viewed products, so the
+    record is the one whose href is the page's URL. A page whose only record
+    names no URL describes itself.
+    """
+    if not records:
+        return None
+    page = canonicalize_url(url)
+    for record in records:
+        if record['href'] and canonicalize_url(record['href'], url) == page:
+            return record
+    if len(records) == 1 and not records[0]['href']:
+        return records[0]
+    return None
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Run Telemetry - Per-shop, per-URL, per-stage timing breakdown
+
+Scrapers wrap each stage of their work in a span:
+
+    with self.telemetry.span('navigation', shop='cellphones', url=url):
+        page.goto(url)
+
+Spans nest; shop and url are inherited from the enclosing span and each span
+records its exclusive time (its own duration minus nested spans), so the
+stage totals of a run add up to the time actually spent. Spans are
+aggregated per (shop, url, stage) rather than stored individually.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Stages used by the scrapers and the updater, in pipeline order
+STAGES = [
+    'discovery',  # reading sitemaps for changed product pages
+    'listing',  # unattributed time while handling a listing page
+    'browser_launch',
+    'navigation',
+    'readiness_wait',
+    'html_transfer',
+    'parse',
+    'spec_parse',
+    'detail_fetch',
+    'polite_delay',
+    'serialize',
+    'write',
+]
+
+
+class RunTelemetry:
+    """Aggregated timing spans for one run"""
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._entries = {}
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, stage: str, shop: Optional[str] = None, url: Optional[str] = None):
+        """Time a block of work as ``stage`` (shop/url default to the enclosing span's)"""
+        stack = self._stack()
+        if stack:
+            shop = shop or stack[-1]['shop']
+            url = url or stack[-1]['url']
+
+        frame = {'shop': shop, 'url': url, 'children': 0.0}
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1]['children'] += elapsed
+            self.record(stage, elapsed - frame['children'], shop=shop, url=url)
+
+    def record(self, stage: str, seconds: float, shop: Optional[str] = None,
+               url: Optional[str] = None, count: int = 1):
+        """Add a measured duration without a context manager"""
+        key = (shop, url, stage)
+        with self._lock:
+            entry = self._entries.setdefault(key, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            entry['count'] += count
+            entry['seconds'] += seconds
+            entry['max_seconds'] = max(entry['max_seconds'], seconds)
+
+    def export(self) -> List[Dict]:
+        """Raw aggregates, e.g. to ship a worker's timings back to the producer"""
+        with self._lock:
+            return [
+                {'shop': shop, 'url': url, 'stage': stage, **entry}
+                for (shop, url, stage), entry in self._entries.items()
+            ]
+
+    def merge(self, entries: List[Dict]):
+        """Fold in aggregates produced by export() elsewhere"""
+        with self._lock:
+            for item in entries:
+                key = (item['shop'], item['url'], item['stage'])
+                entry = self._entries.setdefault(key, {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+                entry['count'] += item['count']
+                entry['seconds'] += item['seconds']
+                entry['max_seconds'] = max(entry['max_seconds'], item['max_seconds'])
+
+    def summary(self) -> Dict:
+        """Timing breakdown for the run summary JSON"""
+        stages, shops = {}, {}
+        urls = []
+        for item in sorted(self.export(), key=lambda e: (e['shop'] or '', e['url'] or '', e['stage'])):
+            stage = stages.setdefault(item['stage'], {'count': 0, 'seconds': 0.0, 'max_seconds': 0.0})
+            stage['count'] += item['count']
+            stage['seconds'] += item['seconds']
+            stage['max_seconds'] = max(stage['max_seconds'], item['max_seconds'])
+
+            shop = shops.setdefault(item['shop'] or 'run', {'seconds': 0.0, 'stages': {}})
+            shop['seconds'] += item['seconds']
+            shop['stages'][item['stage']] = round(shop['stages'].get(item['stage'], 0.0) + item['seconds'], 3)
+
+            if item['url']:
+                urls.append({**item, 'seconds': round(item['seconds'], 3),
+                             'max_seconds': round(item['max_seconds'], 3)})
+
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        return {
+            'wall_seconds': round(time.time() - self.started, 3),
+            'stages': {
+                name: {k: round(v, 3) if isinstance(v, float) else v for k, v in stage.items()}
+                for name, stage in sorted(stages.items(), key=lambda s: order.get(s[0], len(order)))
+            },
+            'shops': {
+                name: {'seconds': round(shop['seconds'], 3), 'stages': shop['stages']}
+                for name, shop in shops.items()
+            },
+            'urls': urls,
+        }
+
+    def write_prometheus(self, path, shop_results: Optional[Dict] = None):
+        """
+        Export the run as a node_exporter textfile (written atomically).
+
+        Args:
+            path: Target .prom file
+            shop_results: Optional summary['by_shop'] for product counts/success
+        """
+        def labels(**kv):
+            parts = [f'{k}="{_escape(v)}"' for k, v in kv.items() if v is not None]
+            return '{' + ','.join(parts) + '}' if parts else ''
+
+        summary = self.summary()
+        lines = [
+            '# HELP vietmac_scrape_last_run_timestamp_seconds Unix time the last run started',
+            '# TYPE vietmac_scrape_last_run_timestamp_seconds gauge',
+            f'vietmac_scrape_last_run_timestamp_seconds {self.started:.0f}',
+            '# HELP vietmac_scrape_run_duration_seconds Wall time of the last run',
+            '# TYPE vietmac_scrape_run_duration_seconds gauge',
+            f"vietmac_scrape_run_duration_seconds {summary['wall_seconds']}",
+            '# HELP vietmac_scrape_stage_seconds Exclusive time per shop and stage in the last run',
+            '# TYPE vietmac_scrape_stage_seconds gauge',
+        ]
+        for shop, info in summary['shops'].items():
+            for stage, seconds in info['stages'].items():
+                lines.append(f"vietmac_scrape_stage_seconds{labels(shop=shop, stage=stage)} {seconds}")
+
+        lines += [
+            '# HELP vietmac_scrape_url_stage_seconds Exclusive time per page and stage in the last run',
+            '# TYPE vietmac_scrape_url_stage_seconds gauge',
+        ]
+        for item in summary['urls']:
+            lines.append(
+                f"vietmac_scrape_url_stage_seconds"
+                f"{labels(shop=item['shop'], url=item['url'], stage=item['stage'])} {item['seconds']}"
+            )
+
+        lines += [
+            '# HELP vietmac_scrape_stage_count Spans per stage in the last run',
+            '# TYPE vietmac_scrape_stage_count gauge',
+        ]
+        for stage, info in summary['stages'].items():
+            lines.append(f"vietmac_scrape_stage_count{labels(stage=stage)} {info['count']}")
+
+        if shop_results:
+            lines += [
+                '# HELP vietmac_scrape_products Products scraped per shop in the last run',
+                '# TYPE vietmac_scrape_products gauge',
+            ]
+            for shop, info in shop_results.items():
+                lines.append(f"vietmac_scrape_products{labels(shop=shop)} {info.get('count', 0)}")
+            lines += [
+                '# HELP vietmac_scrape_shop_success Whether the shop scraped successfully in the last run',
+                '# TYPE vietmac_scrape_shop_success gauge',
+            ]
+            for shop, info in shop_results.items():
+                lines.append(f"vietmac_scrape_shop_success{labels(shop=shop)} {1 if info.get('success') else 0}")
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+
+    def format_breakdown(self, top=None) -> List[str]:
+        """Human-readable lines for the printed run summary"""
+        summary = self.summary()
+        lines = ["Time by stage:"]
+        for stage, info in summary['stages'].items():
+            lines.append(f"  {stage:<16} {info['seconds']:>9.2f}s  ({info['count']} spans, max {info['max_seconds']:.2f}s)")
+        lines.append("Time by shop:")
+        for shop, info in sorted(summary['shops'].items(), key=lambda s: -s[1]['seconds'])[:top]:
+            slowest = max(info['stages'].items(), key=lambda s: s[1]) if info['stages'] else ('-', 0)
+            lines.append(f"  {shop:<16} {info['seconds']:>9.2f}s  (slowest stage: {slowest[0]} {slowest[1]:.2f}s)")
+        return lines
+
+
+class NullTelemetry:
+    """Drop-in for RunTelemetry when nobody is collecting timings"""
+
+    @contextmanager
+    def span(self, stage, shop=None, url=None):
+        yield
+
+    def record(self, stage, seconds, shop=None, url=None, count=1):
+        pass
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+URL Frontier - Canonicalize and deduplicate product URLs before fetching
+
+The listing pages of a shop overlap heavily (CellphoneS' "All Mac" page
+contains every Air and Pro), and the same product URL shows up with
+tracking parameters, fragments, trailing slashes or a www./m. host. The
+frontier reduces each URL to a canonical form and admits it only once per
+run, across pages and across shops, so the duplicates never cost a detail
+request or a spec parse.
+"""
+
+import threading
+from typing import Dict, Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+# Host prefixes that serve the same pages as the bare domain
+HOST_PREFIXES = ('www.', 'm.', 'mobile.')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def canonicalize_url(url: Optional[str], base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Reduce a product URL to its canonical form.
+
+    Resolves relative URLs against base_url, lowercases scheme and host,
+    drops www./m. host prefixes, default ports, query string, fragment,
+    duplicate and trailing slashes.
+
+    Args:
+        url: Raw href from a listing page
+        base_url: Shop base URL for relative links
+
+    Returns:
+        Canonical URL, or None for empty / non-http URLs
+    """
+    if not url:
+        return None
+
+    url = url.strip()
+    if base_url:
+        url = urljoin(base_url + '/', url)
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS:
+        return None
+
+    host = (parts.hostname or '').lower()
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{parts.port}"
+
+    path = '/'.join(segment for segment in parts.path.split('/') if segment)
+    return urlunsplit(('https', host, '/' + path, '', ''))
+
+
+class URLFrontier:
+    """Run-scoped set of canonical product URLs (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seen = set()
+        self.stats = {}
+
+    def add(self, url: Optional[str], shop: Optional[str] = None) -> bool:
+        """
+        Admit a URL to the frontier.
+
+        Returns:
+            True the first time a canonical URL is seen in this run, False for
+            duplicates. URLs that can't be canonicalized are always admitted.
+        """
+        key = canonicalize_url(url)
+        with self._lock:
+            stats = self.stats.setdefault(shop or 'unknown', {'admitted': 0, 'duplicates': 0})
+            if key is not None and key in self._seen:
+                stats['duplicates'] += 1
+                return False
+            if key is not None:
+                self._seen.add(key)
+            stats['admitted'] += 1
+            return True
+
+    def summary(self) -> Dict:
+        """Admitted/duplicate counts per shop for the run summary"""
+        with self._lock:
+            return {shop: dict(stats) for shop, stats in self.stats.items()}
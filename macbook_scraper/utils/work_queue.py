@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Work Queue - Durable SQLite queue of scraping tasks
+
+The unit of work is one page: (shop, URL, render mode), either a listing
+page or (kind 'detail') a product page found by sitemap discovery. A producer
+enqueues every page of a run; any number of worker processes
+(scrape_worker.py) claim tasks under a time-limited lease, heartbeat while
+they work, and either complete the task with its products or fail it. Failed
+tasks are retried with exponential backoff until max_attempts; tasks whose
+lease expires (crashed worker) go back to the queue. The producer then merges
+the per-task results into a single run.
+
+SQLite with WAL gives safe concurrent access for workers on one machine (or
+on a filesystem with working POSIX locks). The public methods are the whole
+interface, so a networked backend (e.g. Redis) can implement the same ones.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.url_frontier import canonicalize_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    shop TEXT NOT NULL,
+    url TEXT NOT NULL,
+    page_name TEXT,
+    render TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'listing',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (run_id, shop, url, render)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks (status, available_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_run ON tasks (run_id, seq);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class TaskQueue:
+    """Leased, retrying task queue backed by a single SQLite file"""
+
+    def __init__(self, db_path=None, lease_seconds=300, max_attempts=3, retry_backoff=30):
+        """
+        Args:
+            db_path: SQLite file (default: output/work_queue.db)
+            lease_seconds: How long a claim is valid without a heartbeat
+            max_attempts: Attempts per task before it is marked failed
+            retry_backoff: Base delay in seconds before retrying a failed task
+        """
+        self.db_path = Path(db_path) if db_path else \
+            Path(__file__).parent.parent / "output" / "work_queue.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add columns introduced after a queue file was created"""
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(tasks)")}
+        if 'kind' not in columns:
+            try:
+                self.conn.execute("ALTER TABLE tasks ADD COLUMN kind TEXT NOT NULL DEFAULT 'listing'")
+            except sqlite3.OperationalError:
+                pass  # another process added it first
+
+    def close(self):
+        self.conn.close()
+
+    def _transaction(self):
+        """BEGIN IMMEDIATE takes the write lock up front so claims never race"""
+        return _ImmediateTransaction(self.conn)
+
+    def enqueue_run(self, tasks: List[Dict], run_id: Optional[str] = None) -> str:
+        """
+        Enqueue the tasks of one run.
+
+        Args:
+            tasks: Dicts with shop, url, render and optional page_name and
+                kind ('listing', the default, or 'detail')
+            run_id: Identifier to group results by (generated if omitted)
+
+        Returns:
+            The run id
+        """
+        run_id = run_id or f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        now = time.time()
+        with self._transaction():
+            for seq, task in enumerate(tasks):
+                self.conn.execute(
+                    """INSERT OR IGNORE INTO tasks
+                       (run_id, seq, shop, url, page_name, render, kind, available_at, created_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (run_id, seq, task['shop'], task['url'], task.get('page_name'),
+                     task['render'], task.get('kind', 'listing'), now, now, now),
+                )
+        return run_id
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Lease the next runnable task to ``worker_id``, or return None"""
+        now = time.time()
+        with self._transaction():
+            # Leases of crashed workers that already used up their attempts
+            self.conn.execute(
+                """UPDATE tasks SET status = 'failed', error = 'lease expired', updated_at = ?
+                   WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                """SELECT * FROM tasks
+                   WHERE (status = 'pending' AND available_at <= ?)
+                      OR (status = 'leased' AND lease_expires < ?)
+                   ORDER BY available_at, id LIMIT 1""",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                """UPDATE tasks SET status = 'leased', lease_owner = ?, lease_expires = ?,
+                       attempts = attempts + 1, updated_at = ?
+                   WHERE id = ?""",
+                (worker_id, now + self.lease_seconds, now, row['id']),
+            )
+
+        task = dict(row)
+        task['attempts'] += 1
+        return task
+
+    def heartbeat(self, task_id: int, worker_id: str) -> bool:
+        """Extend a lease; False means the lease was lost to another worker"""
+        now = time.time()
+        cursor = self.conn.execute(
+            """UPDATE tasks SET lease_expires = ?, updated_at = ?
+               WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+            (now + self.lease_seconds, now, task_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker_id: str, result: Dict) -> bool:
+        """Store a task's result; ignored if the lease was lost meanwhile"""
+        cursor = self.conn.execute(
+            """UPDATE tasks SET status = 'done', result = ?, error = NULL,
+                   lease_owner = NULL, lease_expires = NULL, updated_at = ?
+               WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+            (json.dumps(result, ensure_ascii=False), time.time(), task_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def release(self, task_id: int, worker_id: str) -> bool:
+        """Give a lease back unfinished; the interrupted attempt is not counted"""
+        now = time.time()
+        cursor = self.conn.execute(
+            """UPDATE tasks SET status = 'pending', available_at = ?, attempts = attempts - 1,
+                   lease_owner = NULL, lease_expires = NULL, updated_at = ?
+               WHERE id = ? AND status = 'leased' AND lease_owner = ?""",
+            (now, now, task_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, worker_id: str, error: str) -> bool:
+        """Record a failure and schedule a retry with exponential backoff"""
+        now = time.time()
+        with self._transaction():
+            row = self.conn.execute(
+                "SELECT attempts FROM tasks WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (task_id, worker_id),
+            ).fetchone()
+            if row is None:
+                return False
+
+            if row['attempts'] >= self.max_attempts:
+                status, available_at = 'failed', now
+            else:
+                status = 'pending'
+                available_at = now + self.retry_backoff * 2 ** (row['attempts'] - 1)
+
+            self.conn.execute(
+                """UPDATE tasks SET status = ?, error = ?, available_at = ?,
+                       lease_owner = NULL, lease_expires = NULL, updated_at = ?
+                   WHERE id = ?""",
+                (status, error, available_at, now, task_id),
+            )
+        return True
+
+    def run_status(self, run_id: str) -> Dict:
+        """Task counts per status for a run"""
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for row in self.conn.execute(
+            "SELECT status, COUNT(*) AS n FROM tasks WHERE run_id = ? GROUP BY status", (run_id,)
+        ):
+            counts[row['status']] = row['n']
+        counts['total'] = sum(counts.values())
+        counts['finished'] = counts['done'] + counts['failed'] == counts['total']
+        return counts
+
+    def wait_for_run(self, run_id: str, timeout: Optional[float] = None, poll_interval=2.0) -> Dict:
+        """Block until every task of a run is done or failed (or timeout)"""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            status = self.run_status(run_id)
+            if status['finished'] or (deadline and time.monotonic() >= deadline):
+                return status
+            time.sleep(poll_interval)
+
+    def run_results(self, run_id: str) -> Dict:
+        """
+        Merge the task results of a run into one result per shop, in the same
+        shape as a scraper's scrape() return value. Products are deduplicated
+        by canonical URL in page order, so mirror / www. variants reported by
+        different workers collapse into one; the
+        workers' telemetry aggregates are collected under 'timings'.
+        """
+        shops = {}
+        for row in self.conn.execute(
+            "SELECT * FROM tasks WHERE run_id = ? ORDER BY seq", (run_id,)
+        ):
+            shop = shops.setdefault(row['shop'], {
+                'shop': row['shop'], 'products': [], 'pages': [], 'errors': [], 'timings': [],
+                '_seen': set(),
+            })
+            shop['pages'].append({'name': row['page_name'], 'url': row['url'],
+                                  'kind': row['kind'], 'status': row['status']})
+
+            if row['status'] != 'done':
+                shop['errors'].append(f"{row['url']}: {row['error'] or row['status']}")
+                continue
+
+            result = json.loads(row['result'])
+            shop['timings'].extend(result.get('timings', []))
+            for product in result.get('products', []):
+                product_url = product.get('url')
+                if not product_url:
+                    continue
+                key = canonicalize_url(product_url) or product_url
+                if key not in shop['_seen']:
+                    shop['_seen'].add(key)
+                    shop['products'].append(product)
+
+        results = {}
+        for name, shop in shops.items():
+            del shop['_seen']
+            shop['count'] = len(shop['products'])
+            shop['success'] = shop['count'] > 0
+            if not shop['success']:
+                shop['error'] = '; '.join(shop['errors']) or 'No products found'
+            results[name] = shop
+        return results
+
+
+class _ImmediateTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
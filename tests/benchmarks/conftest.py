@@ -0,0 +1,197 @@
+"""
+Benchmark harness for the per-product hot paths.
+
+The ``benchmark`` fixture times a callable (fastest of several rounds after
+a warm-up, the least noisy statistic) and divides it by a fixed calibration
+loop, so the stored numbers are relative to the machine's speed and
+baselines carry across machines. They do not carry across environments
+with different optional speedups (orjson, lxml): record baselines where
+the benchmarks gate.
+
+Each result is compared with tests/benchmarks/baselines.json and the test
+fails when it is slower than the baseline by more than the threshold:
+
+    VIETMAC_BENCH_THRESHOLD=0.5   # allowed slowdown, default +50%
+    VIETMAC_BENCH_SAVE=1          # rewrite the baselines from this run
+    VIETMAC_BENCH_RESULTS=path    # also write this run's results as JSON
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+SCRAPER_DIR = Path(__file__).resolve().parents[2] / "macbook_scraper"
+sys.path.insert(0, str(SCRAPER_DIR))
+
+BASELINES_FILE = Path(__file__).parent / "baselines.json"
+RECORDED_SHOPDUNK = SCRAPER_DIR / "shopdunk.html"
+
+THRESHOLD = float(os.environ.get('VIETMAC_BENCH_THRESHOLD', 0.5))
+SAVE = os.environ.get('VIETMAC_BENCH_SAVE') == '1'
+RESULTS_FILE = os.environ.get('VIETMAC_BENCH_RESULTS')
+
+_results = {}
+
+
+def _calibrate(rounds=5):
+    """Best time of a fixed pure-Python loop (the unit benchmarks are measured in)"""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        total = 0
+        for i in range(300_000):
+            total += i * i % 7
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@pytest.fixture(scope='session')
+def calibration():
+    return _calibrate()
+
+
+@pytest.fixture(scope='session')
+def baselines():
+    if BASELINES_FILE.exists():
+        return json.loads(BASELINES_FILE.read_text(encoding='utf-8'))
+    return {}
+
+
+@pytest.fixture
+def benchmark(request, calibration, baselines):
+    """
+    benchmark(func, setup=None, rounds=7, warmup=1) -> func's last result
+
+    ``setup`` (untimed) returns the positional arguments of each round.
+    """
+    name = f"{request.node.path.name}::{request.node.name}"
+
+    def measure(func, setup, rounds, warmup):
+        times = []
+        result = None
+        for i in range(warmup + rounds):
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            result = func(*args)
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                times.append(elapsed)
+        return times, result
+
+    def run(func, setup=None, rounds=7, warmup=1):
+        times, result = measure(func, setup, rounds, warmup)
+        baseline = baselines.get(name)
+        if baseline and not SAVE and min(times) / calibration > baseline['normalized'] * (1 + THRESHOLD):
+            # Confirm before failing: a single noisy burst shouldn't flag a regression
+            more, result = measure(func, setup, rounds * 2, 0)
+            times += more
+
+        seconds = min(times)
+        record = {
+            'seconds': round(seconds, 6),
+            'normalized': round(seconds / calibration, 4),
+            'median_seconds': round(statistics.median(times), 6),
+            'rounds': len(times),
+        }
+        if baseline:
+            record['vs_baseline'] = round(record['normalized'] / baseline['normalized'], 3)
+        _results[name] = record
+
+        if baseline and not SAVE:
+            assert record['vs_baseline'] <= 1 + THRESHOLD, (
+                f"{name} regressed: {record['vs_baseline']:.2f}x its baseline "
+                f"({seconds * 1000:.1f} ms, threshold +{THRESHOLD:.0%})"
+            )
+        return result
+
+    return run
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+    if SAVE:
+        stored = json.loads(BASELINES_FILE.read_text(encoding='utf-8')) if BASELINES_FILE.exists() else {}
+        stored.update({
+            name: {k: v for k, v in record.items() if k != 'vs_baseline'}
+            for name, record in _results.items()
+        })
+        BASELINES_FILE.write_text(json.dumps(dict(sorted(stored.items())), indent=2) + '\n', encoding='utf-8')
+    if RESULTS_FILE:
+        Path(RESULTS_FILE).write_text(json.dumps(_results, indent=2), encoding='utf-8')
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section('benchmarks')
+    for name, record in sorted(_results.items()):
+        ratio = f"{record['vs_baseline']:.2f}x baseline" if 'vs_baseline' in record else 'no baseline'
+        terminalreporter.write_line(f"{record['seconds'] * 1000:10.2f} ms  {ratio:<16} {name}")
+    if SAVE:
+        terminalreporter.write_line(f"Baselines saved to {BASELINES_FILE}")
+
+
+def import_scraper(shop):
+    """Scraper class for a shop, skipping the test when its dependencies are missing"""
+    try:
+        from scrapers.registry import get_scraper_class
+        return get_scraper_class(shop)
+    except ImportError as e:
+        pytest.skip(f"{shop} scraper unavailable: {e}")
+
+
+@pytest.fixture(scope='session')
+def mock_shop():
+    """Generated listing pages in each shop's markup (see mock_shop_server.py)"""
+    from mock_shop_server import MockShop
+    return MockShop('http://mock', variants=5, recordings=None)
+
+
+@pytest.fixture(scope='session')
+def mock_shop_json_ld():
+    """The same listings with their products also embedded as JSON-LD"""
+    from mock_shop_server import MockShop
+    return MockShop('http://mock', variants=5, recordings=None, json_ld=True)
+
+
+@pytest.fixture(scope='session')
+def product_names(mock_shop):
+    """Card names as each shop writes them, for every catalog product"""
+    from mock_shop_server import LAYOUTS
+    return [layout.name(p) for layout in LAYOUTS.values() for p in mock_shop.catalog]
+
+
+@pytest.fixture(scope='session')
+def products(product_names):
+    """Scraped-product dicts (the latest_products.json schema) for every name"""
+    from utils.spec_parser import SpecParser
+    from mock_shop_server import LAYOUTS
+
+    parser = SpecParser()
+    shops = [shop for shop in LAYOUTS for _ in range(len(product_names) // len(LAYOUTS))]
+    result = []
+    for i, (shop, name) in enumerate(zip(shops, product_names)):
+        specs = parser.parse(name)
+        price = 20_000_000 + (i * 137_000) % 60_000_000
+        result.append({
+            'model': name,
+            'raw_name': name,
+            'price_vnd': price,
+            'price_text': f"{price:,}đ".replace(',', '.'),
+            'url': f"https://{shop}.example/p/{i}",
+            'image_url': None,
+            'shop': shop,
+            'specs': {key: specs.get(key) for key in (
+                'model_type', 'chip', 'chip_variant', 'screen_size', 'cpu_cores',
+                'gpu_cores', 'ram_gb', 'storage_gb', 'storage_display', 'year')},
+            'product_id': specs.get('id'),
+            'canonical_id': specs.get('id'),
+            'clean_name': specs.get('clean_name'),
+        })
+    return result
@@ -0,0 +1,71 @@
+"""Price history change detection and run output serialization"""
+import json
+
+from .conftest import SCRAPER_DIR
+
+
+def _run(products, ts, every=10, delta=-500_000):
+    """A run of ``products`` with every ``every``-th price changed by ``delta``"""
+    return {
+        'timestamp': ts,
+        'products': [
+            {**p, 'price_vnd': p['price_vnd'] + (delta if i % every == 0 else 0)}
+            for i, p in enumerate(products)
+        ],
+    }
+
+
+def test_detect_changes(benchmark, products, tmp_path):
+    from monitor_prices import PriceMonitor
+    from utils.price_store import PriceStore
+
+    store = PriceStore(tmp_path / "prices.db")
+    store.record_run(products, ts='2025-01-01T00:00:00')
+    monitor = PriceMonitor(store=store)
+    rounds = iter(range(1, 100))
+
+    def setup():
+        # A new run each round (the same run is only recorded once), cheaper than the last
+        n = next(rounds)
+        run = _run(products, f"2025-01-{n + 1:02d}T00:00:00", delta=-100_000 * n)
+        monitor.load_latest_run = lambda: run
+        return ()
+
+    changes = benchmark(monitor.detect_changes, setup=setup)
+    store.close()
+
+    assert changes['price_drops']
+    assert not changes['new_products']
+
+
+def test_publish_json(benchmark, products, tmp_path):
+    from utils.output_writer import publish_json
+
+    results = {'timestamp': '2025-01-01T00:00:00', 'products': products,
+               'summary': {'total_products': len(products)}}
+    target = tmp_path / "latest_products.json"
+
+    size = benchmark(lambda: publish_json(results, target))
+    assert size == target.stat().st_size
+    assert len(json.loads(target.read_bytes())['products']) == len(products)
+
+
+def test_comparison_index(benchmark, products):
+    from utils.comparison_index import build_comparison_index
+
+    index = benchmark(lambda: build_comparison_index(products, '2025-01-01T00:00:00'))
+    assert index['groups']
+
+
+def test_snapshot_archive(benchmark, products, tmp_path):
+    from utils.snapshot_archive import SnapshotArchive
+
+    archive = SnapshotArchive(tmp_path / "archive")
+    rounds = iter(range(1, 100))
+
+    def setup():
+        n = next(rounds)
+        return (_run(products, f"2025-01-01T{n:02d}:00:00", every=n % 7 + 3),)
+
+    kind = benchmark(archive.append, setup=setup)
+    assert kind in ('keyframe', 'delta')
@@ -0,0 +1,75 @@
+"""SpecParser, listing parsers and price cleaning: the work done for every product"""
+import pytest
+
+from .conftest import RECORDED_SHOPDUNK, import_scraper
+
+SHOP_HOSTS = {
+    'cellphones': ('cellphones.com.vn', '/laptop/mac.html'),
+    'fptshop': ('fptshop.com.vn', '/may-tinh-xach-tay/apple-macbook'),
+    'topzone': ('www.topzone.vn', '/mac'),
+}
+
+PRICE_TEXTS = ['46.890.000đ', '25.990.000 ₫', '1.234.567đ', 'Giá: 32,490,000 VND', '', None,
+               'Liên hệ', '18.990.000đ 21.990.000đ']
+
+
+def test_spec_parser(benchmark, product_names):
+    from utils.spec_parser import SpecParser
+
+    parser = SpecParser()
+    results = benchmark(lambda: [parser.parse(name) for name in product_names])
+
+    assert len(results) == len(product_names)
+    assert sum(1 for specs in results if specs.get('id')) >= len(results) * 0.9
+
+
+@pytest.mark.parametrize('shop', ['cellphones', 'shopdunk', 'fptshop', 'topzone'])
+def test_parse_products(benchmark, mock_shop, shop):
+    pytest.importorskip('bs4')
+    scraper = import_scraper(shop)()
+
+    if shop == 'shopdunk':
+        html = RECORDED_SHOPDUNK.read_bytes()
+    else:
+        host, path = SHOP_HOSTS[shop]
+        html, _ = mock_shop.listing_page(shop, host, path, {})
+
+    if shop == 'cellphones':
+        # Pretend every detail page was fetched earlier, so no network and no polite delay
+        import re
+        from utils.url_frontier import canonicalize_url
+        for href in re.findall(rb'class="product__link" href="([^"]+)"', html):
+            scraper.detail_cache[canonicalize_url(href.decode())] = {}
+
+    products = benchmark(lambda: scraper.parse_products(html), rounds=5)
+    assert products
+    assert all(p['shop'] == shop for p in products)
+
+
+@pytest.mark.parametrize('shop', ['cellphones', 'shopdunk', 'fptshop', 'topzone'])
+def test_parse_products_json_ld(benchmark, mock_shop_json_ld, shop):
+    """The utils/structured_data fast path: one JSON decode instead of the card selectors"""
+    pytest.importorskip('bs4')
+    scraper = import_scraper(shop)()
+    host, path = SHOP_HOSTS.get(shop, ('shopdunk.com', '/macbook'))
+    html, _ = mock_shop_json_ld.listing_page(shop, host, path, {})
+
+    if shop == 'cellphones':
+        import re
+        from utils.url_frontier import canonicalize_url
+        for href in re.findall(rb'class="product__link" href="([^"]+)"', html):
+            scraper.detail_cache[canonicalize_url(href.decode())] = {}
+
+    products = benchmark(lambda: scraper.parse_products(html), rounds=5)
+    from utils.structured_data import card_count
+    assert len(products) == card_count(html, scraper.CARD_CLASS)
+    assert all(p['shop'] == shop and p['price_vnd'] for p in products)
+
+
+@pytest.mark.parametrize('shop', ['cellphones', 'shopdunk', 'fptshop', 'topzone'])
+def test_clean_price(benchmark, shop):
+    scraper_class = import_scraper(shop)
+    texts = PRICE_TEXTS * 2500
+
+    prices = benchmark(lambda: [scraper_class._clean_price(None, text) for text in texts])
+    assert prices[0] == 46890000
@@ -0,0 +1,6 @@
+"""Unit tests for macbook_scraper; run from the repository root with python -m pytest tests"""
+import sys
+from pathlib import Path
+
+SCRAPER_DIR = Path(__file__).resolve().parents[1] / "macbook_scraper"
+sys.path.insert(0, str(SCRAPER_DIR))
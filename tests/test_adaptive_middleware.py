@@ -0,0 +1,57 @@
+"""MacbookScraperDownloaderMiddleware: AIMD back-off per downloader slot"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+from scrapy import Request  # noqa: E402
+from scrapy.http import HtmlResponse  # noqa: E402
+from scrapy.utils.test import get_crawler  # noqa: E402
+from twisted.internet.error import TimeoutError  # noqa: E402
+
+from macbook_scraper.middlewares import MacbookScraperDownloaderMiddleware  # noqa: E402
+
+SLOT = 'cellphones.com.vn'
+
+
+def middleware():
+    crawler = get_crawler(settings_dict={'DOWNLOAD_DELAY': 0.5, 'CONCURRENT_REQUESTS_PER_DOMAIN': 8,
+                                         'ADAPTIVE_START_CONCURRENCY': 4})
+    crawler.stats.open_spider(None)
+    slot = SimpleNamespace(concurrency=8, delay=0.5)
+    crawler.engine = SimpleNamespace(downloader=SimpleNamespace(slots={SLOT: slot}))
+    return MacbookScraperDownloaderMiddleware(crawler), slot
+
+
+def request():
+    return Request(f'https://{SLOT}/laptop/mac.html', meta={'download_slot': SLOT, 'download_latency': 0.2})
+
+
+def test_first_request_timing_out_backs_off():
+    mw, slot = middleware()
+    assert mw.process_exception(request(), TimeoutError(), None) is None
+    assert (slot.concurrency, slot.delay) == (2, 1.0)
+    assert mw.stats.get_value(f'adaptive/{SLOT}/exceptions') == 1
+
+
+def test_blocked_response_halves_and_clean_window_adds_one():
+    mw, slot = middleware()
+    blocked = HtmlResponse(request().url, status=429, request=request())
+    mw.process_response(request(), blocked, None)
+    assert (slot.concurrency, slot.delay) == (2, 1.0)
+
+    for _ in range(2):
+        ok = HtmlResponse(request().url, body=b'<html></html>', request=request())
+        mw.process_response(request(), ok, None)
+    assert (slot.concurrency, slot.delay) == (3, 0.75)
+
+
+def test_captcha_widgets_are_not_blocks():
+    mw, _ = middleware()
+    form = (b'<html><script src="/cdn-cgi/challenge-platform/scripts/jsd/main.js"></script>'
+            b'<form><div class="g-recaptcha"></div><div class="h-captcha"></div></form></html>')
+    assert mw.is_blocked(HtmlResponse(request().url, body=form, request=request())) is None
+
+    interstitial = b'<html><title>Just a moment...</title><script src="/cdn-cgi/cf-chl/x.js"></script></html>'
+    assert mw.is_blocked(HtmlResponse(request().url, body=interstitial, request=request())) == 'challenge'
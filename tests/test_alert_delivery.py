@@ -0,0 +1,163 @@
+"""DeliveryQueue against local SMTP and webhook stand-ins"""
+import email
+import json
+import socketserver
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils.alert_delivery import DeliveryQueue
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Just enough SMTP (no TLS, no auth) to receive messages"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        self.messages = []
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b'\r\n')
+
+    def handle(self):
+        self.reply('220 stand-in')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'DATA':
+                self.reply('354 go ahead')
+                data = []
+                for raw in iter(self.rfile.readline, b''):
+                    if raw in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(raw[1:] if raw.startswith(b'..') else raw)
+                self.server.messages.append((recipients, email.message_from_bytes(b''.join(data))))
+                recipients = []
+                self.reply('250 queued')
+            elif command == 'RCPT':
+                recipients.append(line.split(':', 1)[1].strip(' <>'))
+                self.reply('250 ok')
+            else:
+                self.reply('250 ok')
+
+
+class WebhookStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, status=200):
+        self.status = status
+        self.bodies = []
+        super().__init__(('127.0.0.1', 0), WebhookHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/hook"
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.bodies.append(json.loads(body))
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def smtp_server():
+    server = serve(SMTPStandIn())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def webhook():
+    server = serve(WebhookStandIn())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def outbox_rows(db_path):
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute("SELECT * FROM outbox ORDER BY id")]
+    finally:
+        conn.close()
+
+
+def item(n):
+    return {'model': f"MacBook {n}", 'shop': 'cellphones', 'new_price': 20_000_000 + n, 'url': f"https://x/{n}"}
+
+
+def test_notifications_are_batched_per_recipient(tmp_path, smtp_server, webhook):
+    smtp_config = {'smtp_host': '127.0.0.1', 'smtp_port': smtp_server.server_address[1],
+                   'from_email': 'alerts@vietmac.test', 'starttls': False}
+    delivery = DeliveryQueue(tmp_path / 'outbox.db', smtp_config=smtp_config, batch_window=0.3)
+    for n in range(3):
+        delivery.enqueue('a@example.com', [item(n)])
+    delivery.enqueue('b@example.com', [item(9)])
+    delivery.enqueue(webhook.url, [item(1)])
+    delivery.enqueue(webhook.url, [item(2)])
+
+    assert delivery.close(timeout=10) == 0
+    by_recipient = {tuple(recipients): msg for recipients, msg in smtp_server.messages}
+    assert sorted(by_recipient) == [('a@example.com',), ('b@example.com',)]
+    assert by_recipient[('a@example.com',)]['Subject'] == 'MacBook Price Alert - 3 updates'
+    assert webhook.bodies == [{'alerts': [item(1), item(2)]}]
+    assert {row['status'] for row in outbox_rows(tmp_path / 'outbox.db')} == {'sent'}
+
+
+def test_failed_sends_back_off_until_max_attempts(tmp_path, webhook):
+    webhook.status = 500
+    delivery = DeliveryQueue(tmp_path / 'outbox.db', max_attempts=3, retry_backoff=0.05, batch_window=0)
+    delivery.enqueue(webhook.url, [item(1)])
+
+    assert delivery.drain(timeout=10)
+    delivery.close()
+    [row] = outbox_rows(tmp_path / 'outbox.db')
+    assert row['status'] == 'failed'
+    assert row['attempts'] == 3
+    assert 'HTTP Error 500' in row['error']
+    assert len(webhook.bodies) == 3
+
+
+def test_close_leaves_undelivered_rows_for_the_next_queue(tmp_path, webhook):
+    webhook.status = 500
+    delivery = DeliveryQueue(tmp_path / 'outbox.db', retry_backoff=60, batch_window=0)
+    delivery.enqueue(webhook.url, [item(1)])
+
+    assert not delivery.drain(timeout=0.5)
+    assert delivery.close(timeout=0) == 1
+    [row] = outbox_rows(tmp_path / 'outbox.db')
+    assert (row['status'], row['attempts']) == ('pending', 1)
+
+    # The next run's queue picks it up once its retry is due
+    conn = sqlite3.connect(str(tmp_path / 'outbox.db'))
+    with conn:
+        conn.execute("UPDATE outbox SET available_at = 0")
+    conn.close()
+    webhook.status = 200
+    resumed = DeliveryQueue(tmp_path / 'outbox.db', batch_window=0)
+    assert resumed.close(timeout=10) == 0
+    assert outbox_rows(tmp_path / 'outbox.db')[0]['status'] == 'sent'
@@ -0,0 +1,61 @@
+"""SubscriptionIndex: which rules a price change fires"""
+import pytest
+
+from utils.alert_subscriptions import AlertSubscriptions, family_key
+
+AIR = 'm4-air-13-16-512gb'
+
+
+@pytest.fixture
+def subscriptions(tmp_path):
+    subscriptions = AlertSubscriptions(tmp_path / 'subscriptions.db')
+    yield subscriptions
+    subscriptions.close()
+
+
+def fired(subscriptions, new_price, old_price=None, canonical_id=AIR, shop='cellphones'):
+    return sorted(s['recipient'] for s in subscriptions.index.match(canonical_id, shop, new_price, old_price))
+
+
+def test_below_fires_on_crossing_exactly_at_threshold(subscriptions):
+    subscriptions.subscribe('at@x', AIR, max_price=25_000_000)
+    subscriptions.subscribe('lower@x', AIR, max_price=24_000_000)
+
+    # new_price == max_price counts as crossed; old_price == max_price was already there
+    assert fired(subscriptions, 25_000_000, old_price=26_000_000) == ['at@x']
+    assert fired(subscriptions, 24_500_000, old_price=25_000_000) == []
+    assert fired(subscriptions, 24_000_000, old_price=25_000_000) == ['lower@x']
+    # A repeated price crosses nothing
+    assert fired(subscriptions, 24_000_000, old_price=24_000_000) == []
+    # New offers fire every rule they are under
+    assert fired(subscriptions, 23_000_000) == ['at@x', 'lower@x']
+
+
+def test_drop_fires_at_exactly_min_drop_pct(subscriptions):
+    subscriptions.subscribe('ten@x', 'm4-air', min_drop_pct=10)
+    subscriptions.subscribe('five@x', min_drop_pct=5)
+
+    assert fired(subscriptions, 18_000_000, old_price=20_000_000) == ['five@x', 'ten@x']
+    assert fired(subscriptions, 19_000_000, old_price=20_000_000) == ['five@x']
+    assert fired(subscriptions, 19_500_000, old_price=20_000_000) == []
+    assert fired(subscriptions, 20_000_000, old_price=20_000_000) == []
+    assert fired(subscriptions, 21_000_000, old_price=20_000_000) == []
+    # New offers have no drop
+    assert fired(subscriptions, 1_000_000) == []
+
+
+def test_targets_and_shop_filter(subscriptions):
+    subscriptions.subscribe('family@x', 'm4-air', max_price=30_000_000)
+    subscriptions.subscribe('shopdunk@x', AIR, max_price=30_000_000, shop='shopdunk')
+    subscriptions.subscribe('pro@x', 'm4-pro', max_price=30_000_000)
+
+    assert family_key(AIR) == 'm4-air'
+    assert fired(subscriptions, 29_000_000, old_price=31_000_000) == ['family@x']
+    assert fired(subscriptions, 29_000_000, old_price=31_000_000, shop='shopdunk') == ['family@x', 'shopdunk@x']
+
+    changes = {'price_drops': [{'canonical_id': AIR, 'shop': 'shopdunk', 'new_price': 29_000_000,
+                                'old_price': 31_000_000}], 'new_products': []}
+    assert sorted(subscriptions.match(changes)) == ['family@x', 'shopdunk@x']
+
+    with pytest.raises(ValueError):
+        subscriptions.subscribe('bad@x', AIR)
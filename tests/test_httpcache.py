@@ -0,0 +1,74 @@
+"""ListingFreshnessPolicy / ListingCacheMiddleware: when a cached page may be served"""
+import time
+
+import pytest
+
+pytest.importorskip('scrapy')
+
+from scrapy.http import HtmlResponse, Request  # noqa: E402
+from scrapy.settings import Settings  # noqa: E402
+from scrapy.utils.test import get_crawler  # noqa: E402
+from twisted.internet.error import TimeoutError  # noqa: E402
+
+from macbook_scraper.httpcache import (  # noqa: E402
+    STORED_AT_HEADER, ListingCacheMiddleware, ListingFreshnessPolicy,
+)
+
+URL = 'https://cellphones.com.vn/laptop/mac.html'
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return Settings({
+        'HTTPCACHE_ENABLED': True,
+        'HTTPCACHE_DIR': str(tmp_path),
+        'HTTPCACHE_STORAGE': 'macbook_scraper.httpcache.SQLiteCacheStorage',
+        'HTTPCACHE_POLICY': 'macbook_scraper.httpcache.ListingFreshnessPolicy',
+        'HTTPCACHE_DETAIL_MAX_AGE': 3600,
+    })
+
+
+def request(page_type):
+    return Request(URL, meta={'page_type': page_type})
+
+
+def cached(headers=None):
+    return HtmlResponse(URL, status=200, body=b'<html>cached</html>', headers=headers)
+
+
+@pytest.mark.parametrize('status', [500, 502, 503])
+def test_listing_never_falls_back_to_cache_on_5xx(settings, status):
+    policy = ListingFreshnessPolicy(settings)
+    assert not policy.is_cached_response_valid(cached(), HtmlResponse(URL, status=status), request('listing'))
+    # Details keep RFC 2616 behaviour: a stale spec page beats an error
+    assert policy.is_cached_response_valid(cached(), HtmlResponse(URL, status=status), request('detail'))
+
+
+def test_listing_revalidates_with_conditional_headers(settings):
+    policy = ListingFreshnessPolicy(settings)
+    req = request('listing')
+    response = cached({'ETag': '"abc"', 'Last-Modified': 'Wed, 01 Jan 2025 08:00:00 GMT'})
+
+    assert not policy.is_cached_response_fresh(response, req)
+    assert req.headers[b'If-None-Match'] == b'"abc"'
+    assert req.headers[b'If-Modified-Since'] == b'Wed, 01 Jan 2025 08:00:00 GMT'
+    assert policy.is_cached_response_valid(response, HtmlResponse(URL, status=304), req)
+    assert not policy.is_cached_response_valid(response, HtmlResponse(URL, status=200), req)
+
+
+def test_detail_is_fresh_for_max_age(settings):
+    policy = ListingFreshnessPolicy(settings)
+    recent = cached({STORED_AT_HEADER: str(time.time() - 60)})
+    old = cached({STORED_AT_HEADER: str(time.time() - 7200)})
+    assert policy.is_cached_response_fresh(recent, request('detail'))
+    assert not policy.is_cached_response_fresh(old, request('detail'))
+
+
+def test_download_errors_only_fall_back_to_cache_for_details(settings):
+    middleware = ListingCacheMiddleware(settings, get_crawler().stats)
+    for page_type, expected in (('listing', None), ('detail', 'cached')):
+        req = request(page_type)
+        req.meta['cached_response'] = response = cached()
+        result = middleware.process_exception(req, TimeoutError(), None)
+        assert result is (response if expected else None)
+        assert 'cached_response' not in req.meta
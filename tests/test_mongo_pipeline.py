@@ -0,0 +1,78 @@
+"""MacbookScraperPipeline: buffered upserts against mongomock"""
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+pytest.importorskip('pymongo')
+pytest.importorskip('scrapy')
+
+from scrapy.exceptions import NotConfigured  # noqa: E402
+from scrapy.utils.test import get_crawler  # noqa: E402
+from twisted.internet import defer, task  # noqa: E402
+
+from macbook_scraper import pipelines  # noqa: E402
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    # Run the pool-thread writes inline; the tests have no running reactor
+    monkeypatch.setattr(pipelines.threads, 'deferToThread',
+                        lambda func, *args, **kwargs: defer.maybeDeferred(func, *args, **kwargs))
+    clock = task.Clock()
+    pipeline = pipelines.MacbookScraperPipeline(
+        client=mongomock.MongoClient(), db_name='vietmac', bulk_size=3,
+        flush_interval=5.0, bucket_secs=3600, clock=clock)
+    pipeline.open_spider(None)
+    return pipeline
+
+
+def item(shop, url, price, scraped_at='2025-01-01 08:10:00'):
+    return {'shop': shop, 'url': url, 'price_vnd': price, 'scraped_at': scraped_at}
+
+
+def docs(pipeline):
+    return list(pipeline.db['prices'].find({}, {'_id': 0}).sort([('shop', 1), ('url', 1), ('bucket', 1)]))
+
+
+def test_upserts_dedup_per_shop_url_and_bucket(pipeline):
+    for entry in [
+        item('cellphones', 'https://x/air', 20_000_000),
+        item('cellphones', 'https://x/air', 19_500_000, '2025-01-01 08:50:00'),   # same hour bucket
+        item('shopdunk', 'https://x/air', 21_000_000),                            # other shop
+        item('cellphones', 'https://x/air', 19_000_000, '2025-01-01 09:05:00'),   # next bucket
+    ]:
+        pipeline.process_item(entry, None)
+    pipeline.close_spider(None)
+
+    stored = [(d['shop'], d['bucket'].hour, d['price_vnd']) for d in docs(pipeline)]
+    assert stored == [('cellphones', 8, 19_500_000), ('cellphones', 9, 19_000_000), ('shopdunk', 8, 21_000_000)]
+
+
+def test_size_flush_returns_a_deferred_and_timer_flushes_quiet_spiders(pipeline):
+    assert pipeline.process_item(item('topzone', 'https://x/1', 1), None) == item('topzone', 'https://x/1', 1)
+    assert docs(pipeline) == []
+
+    # No more items arrive: the timer flushes the buffer anyway
+    pipeline.clock.advance(5.0)
+    assert [d['url'] for d in docs(pipeline)] == ['https://x/1']
+
+    for n in (2, 3):
+        pipeline.process_item(item('topzone', f'https://x/{n}', n), None)
+    result = pipeline.process_item(item('topzone', 'https://x/4', 4), None)
+    assert isinstance(result, defer.Deferred) and result.result == item('topzone', 'https://x/4', 4)
+    assert len(docs(pipeline)) == 4
+    pipeline.close_spider(None)
+
+
+def test_crawl_without_mongodb_disables_the_pipeline(monkeypatch):
+    monkeypatch.setattr(pipelines, 'load_dotenv', lambda path: None)
+    monkeypatch.delenv('MONGO_URL', raising=False)
+    with pytest.raises(NotConfigured):
+        pipelines.MacbookScraperPipeline.from_crawler(get_crawler())
+
+    monkeypatch.setattr(pipelines, 'MongoClient', None)
+    with pytest.raises(NotConfigured):
+        pipelines.MacbookScraperPipeline.from_crawler(get_crawler(settings_dict={'MONGO_URL': 'mongodb://x'}))
+
+    monkeypatch.setattr(pipelines, 'MongoClient', mongomock.MongoClient)
+    pipeline = pipelines.MacbookScraperPipeline.from_crawler(get_crawler(settings_dict={'MONGO_URL': 'mongodb://x'}))
+    assert pipeline.mongo_url == 'mongodb://x'
@@ -0,0 +1,51 @@
+"""PriceStore: observations per run and the previous-price lookup"""
+import pytest
+
+from utils.price_store import PriceStore
+
+RUN1, RUN2, RUN3 = '2025-01-01T08:00:00', '2025-01-02T08:00:00', '2025-01-03T08:00:00'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PriceStore(tmp_path / 'prices.db')
+    yield store
+    store.close()
+
+
+def offer(model, price, shop='cellphones'):
+    return {'shop': shop, 'model': model, 'price_vnd': price, 'url': f"https://x/{model}",
+            'canonical_id': model.lower()}
+
+
+def prices(changes):
+    return {c['model']: (c['old_price'], c['new_price']) for c in changes}
+
+
+def test_price_drop_and_first_sighting(store):
+    assert store.record_run([offer('Air', 20_000_000), offer('Pro', 40_000_000)], ts=RUN1) == 2
+    assert prices(store.changes_at(RUN1)) == {'Air': (None, 20_000_000), 'Pro': (None, 40_000_000)}
+
+    store.record_run([offer('Air', 18_500_000), offer('Pro', 40_000_000)], ts=RUN2)
+    assert prices(store.changes_at(RUN2)) == {'Air': (20_000_000, 18_500_000), 'Pro': (40_000_000, 40_000_000)}
+
+
+def test_repeated_price_and_repeated_run(store):
+    store.record_run([offer('Air', 20_000_000)], ts=RUN1)
+    store.record_run([offer('Air', 20_000_000)], ts=RUN2)
+    # Same run recorded again (even with another price): UNIQUE(product_id, ts) keeps the first
+    assert store.record_run([offer('Air', 1)], ts=RUN2) == 0
+    store.record_run([offer('Air', 19_000_000)], ts=RUN3)
+
+    assert prices(store.changes_at(RUN2)) == {'Air': (20_000_000, 20_000_000)}
+    # The previous price is the latest one before the run, not the first ever
+    assert prices(store.changes_at(RUN3)) == {'Air': (20_000_000, 19_000_000)}
+    assert [row['price'] for row in store.history('cellphones_Air')] == [20_000_000, 20_000_000, 19_000_000]
+
+
+def test_duplicates_in_a_run_keep_the_last_price_and_shops_filter(store):
+    store.record_run([offer('Air', 21_000_000), offer('Air', 20_000_000),
+                      offer('Air', 22_000_000, shop='shopdunk'), {'shop': 'x', 'model': 'Unpriced'}], ts=RUN1)
+    assert store.history('cellphones_Air') == [{'ts': store.history('cellphones_Air')[0]['ts'], 'price': 20_000_000}]
+    assert [c['shop'] for c in store.changes_at(RUN1, shops=['shopdunk'])] == ['shopdunk']
+    assert store.changes_at(RUN1, shops=[]) == []
@@ -0,0 +1,80 @@
+"""RefreshScheduler.record_run: what counts as an observation of a page"""
+from datetime import datetime, timedelta
+
+from utils.refresh_scheduler import RefreshScheduler
+from utils.url_frontier import URLFrontier
+
+T0 = datetime(2025, 1, 1, 8)
+
+
+def product(url, price):
+    return {'url': url, 'model': url, 'price_vnd': price}
+
+
+def page(url, products, status='done'):
+    offers = [(p['url'], p['price_vnd']) for p in products]
+    return {'name': url, 'url': url, 'status': status, 'offers': offers, 'products': products}
+
+
+def test_failed_and_empty_pages_keep_their_state(tmp_path):
+    scheduler = RefreshScheduler(state_file=tmp_path / 'schedule.json')
+    scheduler.record_run('shop', [page('/air', [product('a', 1)]), page('/pro', [product('p', 2)])], ts=T0)
+    before = dict(scheduler.state['pages']['shop|/pro'])
+
+    later = T0 + timedelta(hours=3)
+    scheduler.record_run('shop', [page('/air', [product('a', 1)]), page('/pro', [], status='failed')], ts=later)
+    scheduler.record_run('shop', [page('/pro', [])], ts=later + timedelta(hours=1))
+
+    assert scheduler.state['pages']['shop|/pro'] == before
+    air = scheduler.state['pages']['shop|/air']
+    assert air['last_refreshed'] == later.isoformat()
+    assert air['observations'] == 1 and air.get('changes', 0) == 0
+
+
+def test_overlapping_pages_fingerprint_their_full_listing(tmp_path):
+    scheduler = RefreshScheduler(state_file=tmp_path / 'schedule.json')
+    everything = [product('a', 1), product('p', 2)]
+    # Which page a shared product survives the cross-page dedup on varies
+    # between runs; the fingerprints must not
+    scheduler.record_run('shop', [page('/all', everything), page('/air', [product('a', 1)])], ts=T0)
+    scheduler.record_run('shop', [page('/air', [product('a', 1)]), page('/all', everything[::-1])],
+                         ts=T0 + timedelta(hours=2))
+
+    for key in ('shop|/all', 'shop|/air'):
+        assert scheduler.state['pages'][key]['observations'] == 1
+        assert scheduler.state['pages'][key].get('changes', 0) == 0
+
+
+def card(slug, price):
+    return {'name': f"MacBook Air M4 13 inch {slug}", 'price_text': f"{price:,}đ".replace(',', '.'),
+            'href': f"/{slug}", 'image': None, 'product_id': slug}
+
+
+def test_overlapping_pages_through_scrape_listing(tmp_path, monkeypatch):
+    from scrapers.shopdunk_scraper import ShopDunkScraper
+
+    listings = {
+        '/all': [card('air-256', 24_990_000), card('air-512', 29_990_000)],
+        '/air': [card('air-256', 24_990_000)],
+    }
+    scraper = ShopDunkScraper()
+    monkeypatch.setattr(scraper, 'fetch_listing', lambda url, render: list(listings[url]))
+    monkeypatch.setattr(scraper, '_more_records', lambda url, records: [])
+    monkeypatch.setattr('scrapers.shopdunk_scraper.time.sleep', lambda seconds: None)
+    scheduler = RefreshScheduler(state_file=tmp_path / 'schedule.json')
+
+    first = scraper.scrape(pages=[{'name': 'All', 'url': '/all'}, {'name': 'Air', 'url': '/air'}],
+                           frontier=URLFrontier())
+    # The Air page's only product was already taken by the All page
+    assert [(p['status'], len(p['products'])) for p in first['pages']] == [('done', 2), ('done', 0)]
+    scheduler.record_run('shopdunk', first['pages'], ts=T0)
+
+    later = T0 + timedelta(hours=2)
+    second = scraper.scrape(pages=[{'name': 'Air', 'url': '/air'}, {'name': 'All', 'url': '/all'}],
+                            frontier=URLFrontier())
+    scheduler.record_run('shopdunk', second['pages'], ts=later)
+
+    for key in ('shopdunk|/all', 'shopdunk|/air'):
+        stats = scheduler.state['pages'][key]
+        assert stats['last_refreshed'] == later.isoformat()
+        assert stats['observations'] == 1 and stats.get('changes', 0) == 0
@@ -0,0 +1,57 @@
+"""ScrapeWorker: stopping between tasks and releasing an interrupted one"""
+import os
+import signal
+
+import pytest
+
+from scrape_worker import ScrapeWorker
+from utils.work_queue import TaskQueue
+
+
+class FakeScraper:
+    def __init__(self, on_listing):
+        self.on_listing = on_listing
+
+    def scrape_listing(self, page_info, render=None, frontier=None):
+        self.on_listing()
+        return [{'url': page_info['url'], 'price_vnd': 1}]
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    task_queue = TaskQueue(tmp_path / 'queue.db')
+    task_queue.enqueue_run([{'shop': 'cellphones', 'url': f"https://x/{n}", 'render': 'http'} for n in range(2)])
+    task_queue.close()
+    return tmp_path / 'queue.db'
+
+
+def statuses(queue_path):
+    task_queue = TaskQueue(queue_path)
+    try:
+        return [(row['status'], row['attempts'])
+                for row in task_queue.conn.execute("SELECT * FROM tasks ORDER BY seq")]
+    finally:
+        task_queue.close()
+
+
+def worker_with(queue_path, on_listing):
+    worker = ScrapeWorker(queue_path=queue_path, poll_interval=0.01)
+    worker._get_scraper = lambda shop: FakeScraper(on_listing)
+    return worker
+
+
+def test_sigint_finishes_the_current_task_then_exits(queue_path):
+    previous = signal.getsignal(signal.SIGINT)
+    worker = worker_with(queue_path, lambda: os.kill(os.getpid(), signal.SIGINT))
+
+    assert worker.run(idle_exit=0) == 1
+    assert statuses(queue_path) == [('done', 1), ('pending', 0)]
+    assert signal.getsignal(signal.SIGINT) is previous
+
+
+def test_interrupted_task_releases_its_lease(queue_path):
+    def interrupt():
+        raise KeyboardInterrupt
+
+    assert worker_with(queue_path, interrupt).run(idle_exit=0) == 0
+    assert statuses(queue_path) == [('pending', 0), ('pending', 0)]
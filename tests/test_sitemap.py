@@ -0,0 +1,111 @@
+"""Sitemap discovery: MacBook URL filter, lastmod parsing and index traversal"""
+import gzip
+import io
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from utils.sitemap import SitemapDiscovery, is_macbook_url, iter_entries, parse_lastmod
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+T = datetime(2025, 1, 1, 8, tzinfo=timezone.utc).timestamp()
+
+
+def urlset(*entries):
+    urls = ''.join(f"<url><loc>{loc}</loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</url>"
+                   for loc, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{urls}</urlset>'.encode()
+
+
+def index(*entries):
+    maps = ''.join(f"<sitemap><loc> {loc} </loc><lastmod>{lastmod}</lastmod></sitemap>" for loc, lastmod in entries)
+    return f'<?xml version="1.0"?><sitemapindex {NS}>{maps}</sitemapindex>'.encode()
+
+
+class Response:
+    def __init__(self, body):
+        self.raw = io.BytesIO(body)
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StubSession:
+    def __init__(self, sitemaps):
+        self.sitemaps = sitemaps
+        self.fetched = []
+
+    def get(self, url, stream=False, timeout=None):
+        self.fetched.append(url)
+        if url not in self.sitemaps:
+            raise IOError(f"404 {url}")
+        return Response(self.sitemaps[url])
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://cellphones.com.vn/macbook-air-m2-2022-16gb-256gb.html', True),
+    ('https://shopdunk.com/macbook-air-m1-gia-re', True),
+    ('https://shopdunk.com/macbook-pro-m3-max-cao-cap', True),
+    ('https://fptshop.com.vn/may-tinh-xach-tay/macbook-air-m2-da-kich-hoat', True),
+    ('https://cellphones.com.vn/op-lung-macbook-air-13.html', False),
+    ('https://cellphones.com.vn/bao-da-macbook-pro-14.html', False),
+    ('https://cellphones.com.vn/de-tan-nhiet-macbook.html', False),
+    ('https://cellphones.com.vn/gia-do-macbook-nhom.html', False),
+    ('https://cellphones.com.vn/cap-sac-macbook-usb-c.html', False),
+    ('https://cellphones.com.vn/mieng-dan-man-hinh-macbook-air.html', False),
+    ('https://cellphones.com.vn/iphone-15-pro.html', False),
+])
+def test_is_macbook_url(url, expected):
+    assert is_macbook_url(url) is expected
+
+
+def test_parse_lastmod():
+    assert parse_lastmod('2025-01-01T08:00:00Z') == T
+    assert parse_lastmod('2025-01-01T15:00:00+07:00') == T
+    # No offset is taken as UTC, a bare date as its midnight
+    assert parse_lastmod(' 2025-01-01T08:00:00 ') == T
+    assert parse_lastmod('2025-01-01') == T - 8 * 3600
+    assert parse_lastmod('yesterday') is None
+    assert parse_lastmod('') is None and parse_lastmod(None) is None
+
+
+def test_iter_entries_urlset_and_index():
+    assert list(iter_entries(io.BytesIO(urlset(('https://x/macbook-a', '2025-01-01T08:00:00Z'),
+                                               ('https://x/macbook-b', None))))) == [
+        ('url', 'https://x/macbook-a', T), ('url', 'https://x/macbook-b', None)]
+    assert list(iter_entries(io.BytesIO(index(('https://x/products.xml', '2025-01-01'))))) == [
+        ('sitemap', 'https://x/products.xml', T - 8 * 3600)]
+
+
+def test_discover_follows_the_index_and_skips_unchanged_children(tmp_path):
+    session = StubSession({
+        'https://x/sitemap.xml': index(('https://x/old.xml', '2024-12-01T00:00:00Z'),
+                                       ('https://x/new.xml.gz', '2025-01-02T00:00:00Z'),
+                                       ('https://x/missing.xml', '2025-01-02T00:00:00Z')),
+        'https://x/old.xml': urlset(('https://x/macbook-old', '2024-12-01T00:00:00Z')),
+        'https://x/new.xml.gz': gzip.compress(urlset(
+            ('https://x/macbook-air-m4', '2025-01-02T00:00:00Z'),
+            ('https://x/macbook-pro-m4', '2024-12-20T00:00:00Z'),
+            ('https://x/macbook-air-m3', None),
+            ('https://x/op-lung-macbook', '2025-01-02T00:00:00Z'),
+            ('https://x/macbook-air-m4', '2025-01-02T00:00:00Z'),
+        )),
+    })
+    discovery = SitemapDiscovery(state_file=tmp_path / 'state.json', session=session)
+    discovery.mark_complete('shop', T)
+    discovery.mark_crawled('shop', 'https://x/macbook-pro-m4', ts=T)
+    # No lastmod: stale only once max_age_hours have passed since the crawl
+    discovery.mark_crawled('shop', 'https://x/macbook-air-m3', ts=time.time() - 3600)
+
+    changed = discovery.discover('shop', ['https://x/sitemap.xml'])
+
+    # The old child predates the last complete run: never downloaded
+    assert 'https://x/old.xml' not in session.fetched
+    assert [c['url'] for c in changed] == ['https://x/macbook-air-m4']
+    stats = discovery.stats['shop']
+    assert (stats['sitemaps'], stats['sitemaps_skipped'], stats['urls'], stats['macbooks']) == (2, 1, 5, 3)
+    assert len(stats['errors']) == 1 and 'missing.xml' in stats['errors'][0]
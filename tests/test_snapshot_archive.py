@@ -0,0 +1,90 @@
+"""SnapshotArchive: keyframe + delta round trip, and recovery from a torn tail"""
+from datetime import datetime, timedelta
+
+from utils.snapshot_archive import SnapshotArchive
+
+T0 = datetime(2025, 1, 1, 8)
+
+
+def append_torn(archive, snapshot):
+    """Append a run, then cut its record in half as a killed process would"""
+    segments = {path: path.stat().st_size for path in archive.segments()}
+    archive.append(snapshot)
+    segment = archive.segments()[-1]
+    before = segments.get(segment, 0)
+    data = segment.read_bytes()
+    segment.write_bytes(data[:before + (len(data) - before) // 2])
+
+
+def run(n):
+    """Run n: prices move, one product comes and goes, one is renamed"""
+    products = [
+        {'shop': 'cellphones', 'url': f"https://x/{i}", 'model': f"MacBook {i}",
+         'price_vnd': 20_000_000 + (n * 100_000 if i % 2 else 0)}
+        for i in range(6) if not (i == 5 and n % 2)
+    ]
+    products[0]['model'] = f"MacBook 0 rev {n}"
+    return {'timestamp': (T0 + timedelta(hours=n)).isoformat(), 'products': products,
+            'summary': {'total_products': len(products)}}
+
+
+def test_keyframes_and_deltas_reconstruct_every_run(tmp_path):
+    archive = SnapshotArchive(tmp_path, keyframe_interval=3)
+    kinds = [archive.append(run(n)) for n in range(7)]
+
+    assert kinds == ['keyframe', 'delta', 'delta'] * 2 + ['keyframe']
+    assert len(archive.segments()) == 3
+    for n in range(7):
+        assert archive.reconstruct(run(n)['timestamp']) == run(n)
+    assert archive.reconstruct() == run(6)
+    assert [snapshot for _, snapshot in archive.iter_snapshots()] == [run(n) for n in range(7)]
+    assert archive.append(run(3)) == 'skipped'
+
+
+def test_torn_tail_does_not_hide_later_runs(tmp_path):
+    archive = SnapshotArchive(tmp_path, keyframe_interval=10)
+    for n in range(2):
+        archive.append(run(n))
+    append_torn(archive, run(2))
+
+    assert archive.reconstruct() == run(1)
+    assert archive.append(run(3)) == 'delta'
+    assert archive.append(run(4)) == 'delta'
+
+    assert [snapshot for _, snapshot in archive.iter_snapshots()] == [run(0), run(1), run(3), run(4)]
+    assert archive.reconstruct() == run(4)
+    assert archive.reconstruct(run(2)['timestamp']) == run(1)
+
+
+def test_torn_keyframe_only_segment_is_dropped(tmp_path):
+    archive = SnapshotArchive(tmp_path, keyframe_interval=2)
+    for n in range(2):
+        archive.append(run(n))
+    append_torn(archive, run(2))
+
+    assert archive.append(run(3)) == 'keyframe'
+    assert [snapshot for _, snapshot in archive.iter_snapshots()] == [run(0), run(1), run(3)]
+
+
+def test_import_files_reports_only_archived_files(tmp_path):
+    import json
+
+    sources = tmp_path / 'runs'
+    sources.mkdir()
+    files = []
+    for n in (0, 1):
+        path = sources / f"run_{n}.json"
+        path.write_text(json.dumps(run(n)))
+        files.append(path)
+    corrupt = sources / 'run_2.json'
+    corrupt.write_text('{"timestamp": "2025-01-01T10:00:00", "products": [')
+    empty = sources / 'macbook_prices_20250101_110000.json'
+    empty.write_text('[]')
+
+    archive = SnapshotArchive(tmp_path / 'archive')
+    counts, imported = archive.import_files(files + [corrupt, empty])
+    assert counts == {'keyframe': 1, 'delta': 1, 'skipped': 2}
+    assert imported == files
+
+    # Converting again archives nothing new, so nothing may be deleted
+    assert archive.import_files(files) == ({'keyframe': 0, 'delta': 0, 'skipped': 2}, [])
@@ -0,0 +1,59 @@
+"""structured_data: sale prices, card counts and detail-page records"""
+import json
+
+from utils.structured_data import card_count, record_for_url, structured_records
+
+
+def json_ld(*products):
+    body = json.dumps({'@type': 'ItemList', 'itemListElement': [
+        {'@type': 'ListItem', 'item': product} for product in products]})
+    return f'<script type="application/ld+json">{body}</script>'
+
+
+def product(name, url, offers):
+    return {'@type': 'Product', 'name': name, 'url': url, 'offers': offers}
+
+
+def test_sale_price_wins_over_offer_price():
+    html = json_ld(
+        product('Spec', '/a', {'@type': 'Offer', 'price': 30990000, 'priceSpecification': [
+            {'@type': 'UnitPriceSpecification', 'priceType': 'https://schema.org/StrikethroughPrice', 'price': 30990000},
+            {'@type': 'UnitPriceSpecification', 'priceType': 'https://schema.org/SalePrice', 'price': 27490000},
+        ]}),
+        product('Field', '/b', {'@type': 'Offer', 'price': '30990000', 'salePrice': '28990000'}),
+        product('List only', '/c', {'@type': 'Offer', 'price': 25990000, 'priceSpecification': {
+            'priceType': 'https://schema.org/ListPrice', 'price': 31990000}}),
+        product('Aggregate', '/d', {'@type': 'AggregateOffer', 'lowPrice': 24990000, 'highPrice': 29990000}),
+        product('Sellers', '/e', [{'@type': 'Offer', 'price': 26990000}, {'@type': 'Offer', 'price': 25490000}]),
+    )
+    prices = {r['name']: r['price_text'] for r in structured_records(html)}
+    assert prices == {'Spec': '27.490.000đ', 'Field': '28.990.000đ', 'List only': '25.990.000đ',
+                      'Aggregate': '24.990.000đ', 'Sellers': '25.490.000đ'}
+
+
+def test_cards_count_by_class_token():
+    cards = ('<div class="product-info p-2">a</div>'
+             "<div class='col product-info'>b</div>"
+             '<div class=product-info>c</div>'
+             '<div class="product-info-wrapper" data-name="product-info">not a card</div>')
+    assert card_count(cards, 'product-info') == 3
+    assert card_count(cards.encode(), 'product-info') == 3
+
+    # A block describing only the first two of three cards is not the listing
+    partial = json_ld(product('A', '/a', {'price': 1}), product('B', '/b', {'price': 2}))
+    assert structured_records(partial + cards, min_count=card_count(cards, 'product-info')) is None
+
+
+def test_detail_record_is_the_page_product():
+    page = 'https://www.shop.vn/macbook-air-m4?utm_source=x'
+    records = structured_records(json_ld(
+        product('Related', 'https://shop.vn/macbook-pro-m4', {'price': 1}),
+        product('This one', '/macbook-air-m4/', {'price': 2}),
+    ))
+    assert record_for_url(records, page)['name'] == 'This one'
+    assert record_for_url(records[:1], page) is None
+    assert record_for_url(None, page) is None
+
+    # A page that only describes itself may leave the URL out
+    own = structured_records(json_ld({'@type': 'Product', 'name': 'Self', 'offers': {'price': 3}}))
+    assert record_for_url(own, page)['name'] == 'Self'
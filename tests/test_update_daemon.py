@@ -0,0 +1,32 @@
+"""PriceUpdateDaemon control socket: one JSON line in, one JSON line out"""
+import json
+import socket
+import threading
+
+import pytest
+
+from update_prices import PriceUpdateDaemon
+
+
+def ask(daemon, line: bytes):
+    client, server = socket.socketpair()
+    handler = threading.Thread(target=daemon._handle_client, args=(server,))
+    handler.start()
+    with client:
+        client.sendall(line + b'\n')
+        reply = client.makefile('rb').readline()
+    handler.join(timeout=5)
+    assert not handler.is_alive()
+    return json.loads(reply)
+
+
+@pytest.mark.parametrize('line', [b'[]', b'"run"', b'42', b'null', b'{not json'])
+def test_requests_that_are_not_objects_get_an_error(tmp_path, line):
+    daemon = PriceUpdateDaemon(socket_path=tmp_path / 'daemon.sock')
+    assert ask(daemon, line) == {'success': False, 'error': 'Request must be a JSON object'}
+
+
+def test_status_and_unknown_command(tmp_path):
+    daemon = PriceUpdateDaemon(socket_path=tmp_path / 'daemon.sock')
+    assert ask(daemon, b'{"cmd": "status"}')['queued'] == 0
+    assert ask(daemon, b'{"cmd": "reboot"}')['error'] == 'Unknown command: reboot'
@@ -0,0 +1,119 @@
+"""TaskQueue: leases, heartbeats, retries and the merged run results"""
+import json
+import time
+
+import pytest
+
+from utils.work_queue import TaskQueue
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(**options):
+        queues.append(TaskQueue(tmp_path / 'queue.db', **options))
+        return queues[-1]
+
+    yield make
+    for task_queue in queues:
+        task_queue.close()
+
+
+def task(url, shop='cellphones'):
+    return {'shop': shop, 'url': url, 'render': 'http', 'page_name': url}
+
+
+def make_due(task_queue, task_id):
+    task_queue.conn.execute("UPDATE tasks SET available_at = 0 WHERE id = ?", (task_id,))
+
+
+def test_expired_lease_goes_to_another_worker(make_queue):
+    task_queue = make_queue(lease_seconds=0.05)
+    task_queue.enqueue_run([task('https://x/mac')])
+
+    first = task_queue.claim('w1')
+    assert task_queue.claim('w2') is None
+    time.sleep(0.1)
+
+    second = task_queue.claim('w2')
+    assert second['id'] == first['id'] and second['attempts'] == 2
+    # The crashed worker's late calls are ignored
+    assert not task_queue.heartbeat(first['id'], 'w1')
+    assert not task_queue.complete(first['id'], 'w1', {'products': []})
+    assert task_queue.complete(second['id'], 'w2', {'products': []})
+
+
+def test_heartbeat_keeps_the_lease(make_queue):
+    task_queue = make_queue(lease_seconds=0.2)
+    task_queue.enqueue_run([task('https://x/mac')])
+    claimed = task_queue.claim('w1')
+
+    for _ in range(3):
+        time.sleep(0.1)
+        assert task_queue.heartbeat(claimed['id'], 'w1')
+    assert task_queue.claim('w2') is None
+
+
+def test_expired_lease_without_attempts_left_fails(make_queue):
+    task_queue = make_queue(lease_seconds=0.05, max_attempts=1)
+    run_id = task_queue.enqueue_run([task('https://x/mac')])
+    task_queue.claim('w1')
+    time.sleep(0.1)
+
+    assert task_queue.claim('w2') is None
+    status = task_queue.run_status(run_id)
+    assert status['failed'] == 1 and status['finished']
+
+
+def test_fail_backs_off_exponentially_then_gives_up(make_queue):
+    task_queue = make_queue(max_attempts=3, retry_backoff=10)
+    run_id = task_queue.enqueue_run([task('https://x/mac')])
+
+    for attempt, backoff in ((1, 10), (2, 20)):
+        claimed = task_queue.claim('w1')
+        assert claimed['attempts'] == attempt
+        before = time.time()
+        assert task_queue.fail(claimed['id'], 'w1', 'HTTP 503')
+        row = task_queue.conn.execute("SELECT * FROM tasks WHERE id = ?", (claimed['id'],)).fetchone()
+        assert row['status'] == 'pending'
+        assert before + backoff - 1 <= row['available_at'] <= time.time() + backoff
+        assert task_queue.claim('w1') is None
+        make_due(task_queue, claimed['id'])
+
+    claimed = task_queue.claim('w1')
+    assert task_queue.fail(claimed['id'], 'w1', 'HTTP 503')
+    assert task_queue.run_status(run_id)['failed'] == 1
+    assert not task_queue.fail(claimed['id'], 'w1', 'again')
+
+
+def test_run_results_dedup_on_canonical_url(make_queue):
+    task_queue = make_queue(max_attempts=1)
+    run_id = task_queue.enqueue_run([task('https://x/all'), task('https://x/air'), task('https://x/pro')])
+    results = {
+        'https://x/all': [{'url': 'https://www.shop.vn/macbook-air/', 'price_vnd': 1},
+                          {'url': 'https://shop.vn/macbook-pro', 'price_vnd': 2}],
+        'https://x/air': [{'url': 'https://m.shop.vn/macbook-air?utm_source=x', 'price_vnd': 1}],
+    }
+    while (claimed := task_queue.claim('w1')) is not None:
+        if claimed['url'] in results:
+            task_queue.complete(claimed['id'], 'w1', {'products': results[claimed['url']]})
+        else:
+            task_queue.fail(claimed['id'], 'w1', 'timeout')
+
+    shop = task_queue.run_results(run_id)['cellphones']
+    assert [p['url'] for p in shop['products']] == ['https://www.shop.vn/macbook-air/', 'https://shop.vn/macbook-pro']
+    assert [page['status'] for page in shop['pages']] == ['done', 'done', 'failed']
+    assert shop['success'] and shop['errors'] == ['https://x/pro: timeout']
+    assert json.loads(json.dumps(shop)) == shop
+
+
+def test_release_hands_the_task_back_uncounted(make_queue):
+    task_queue = make_queue(max_attempts=1)
+    task_queue.enqueue_run([task('https://x/mac')])
+    claimed = task_queue.claim('w1')
+
+    assert not task_queue.release(claimed['id'], 'w2')
+    assert task_queue.release(claimed['id'], 'w1')
+    again = task_queue.claim('w2')
+    assert again['id'] == claimed['id'] and again['attempts'] == 1